@@ -0,0 +1,101 @@
+"""
+Versioned caching helpers shared by the job and users apps.
+
+Every cached value lives under a *namespace* (``"jobs"``, ``"job:42"``,
+``"employer:7"`` ...). Each namespace has a version stamp stored in the cache,
+and that stamp is part of every key in the namespace. Invalidation bumps the
+stamp instead of hunting down keys, so stale entries simply stop being read
+and expire on their own. The stamp is a microsecond timestamp, so it also
+tells conditional GET handlers when the namespace last changed.
+
+Hits and misses are counted per namespace prefix for monitoring, per process
+here and across workers in backend.metrics. The ``a`` prefixed functions are
+the same helpers for async views.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import cache_requests
+
+DEFAULT_TIMEOUT = 60 * 5
+
+_MISSING = object()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+
+def _record(namespace, hit):
+    group = namespace.split(':', 1)[0]
+    with _stats_lock:
+        _stats[group]['hits' if hit else 'misses'] += 1
+    cache_requests.inc(namespace=group, result='hit' if hit else 'miss')
+
+
+def cache_stats():
+    """Per-namespace hit/miss counters for this process."""
+    with _stats_lock:
+        stats = {group: dict(counts) for group, counts in _stats.items()}
+    for counts in stats.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / lookups, 4) if lookups else None
+    return stats
+
+
+def namespace_version(namespace):
+    key = f'ns:{namespace}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+async def anamespace_version(namespace):
+    key = f'ns:{namespace}'
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns() // 1000, None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_namespace(*namespaces):
+    """Invalidate everything cached under ``namespaces`` once the current transaction commits."""
+    def bump():
+        stamp = time.time_ns() // 1000
+        cache.set_many({f'ns:{namespace}': stamp for namespace in namespaces}, None)
+    transaction.on_commit(bump)
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join([namespace, str(namespace_version(namespace)), *map(str, parts)])
+
+
+def get_or_set(namespace, parts, loader, timeout=DEFAULT_TIMEOUT):
+    """Read-through fetch of ``loader()`` cached under ``namespace``."""
+    key = versioned_key(namespace, *parts)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _record(namespace, hit=True)
+        return value
+    _record(namespace, hit=False)
+    value = loader()
+    cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_set(namespace, parts, loader, timeout=DEFAULT_TIMEOUT):
+    """Async :func:`get_or_set`; ``loader`` is a coroutine function."""
+    key = ':'.join([namespace, str(await anamespace_version(namespace)), *map(str, parts)])
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        _record(namespace, hit=True)
+        return value
+    _record(namespace, hit=False)
+    value = await loader()
+    await cache.aset(key, value, timeout)
+    return value
@@ -0,0 +1,63 @@
+"""
+Database connection metrics for this worker process.
+
+``connects`` counts every time Django opened (or, when pooled, checked out) a
+connection, per alias. With persistent connections it should grow with the
+number of worker threads, not with the number of requests. When
+``OPTIONS["pool"]`` is configured, the psycopg pool's own counters are added:
+connections checked out, requests waiting, and the time spent waiting for a
+free connection.
+"""
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_connects = Counter()
+_connects_lock = threading.Lock()
+
+
+@receiver(connection_created, dispatch_uid='backend.db.count_connects')
+def count_connects(sender, connection, **kwargs):
+    with _connects_lock:
+        _connects[connection.alias] += 1
+
+
+def pool_stats(alias):
+    """Counters of the psycopg pool behind ``alias``, or None when it is not pooled."""
+    wrapper = connections[alias]
+    if not wrapper.settings_dict['OPTIONS'].get('pool'):
+        return None
+    stats = wrapper.pool.get_stats()
+    size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    requests = stats.get('requests_num', 0)
+    return {
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'size': size,
+        'checked_out': size - available,
+        'available': available,
+        'requests_waiting': stats.get('requests_waiting', 0),
+        'requests': requests,
+        'wait_ms_total': stats.get('requests_wait_ms', 0),
+        'wait_ms_avg': round(stats.get('requests_wait_ms', 0) / requests, 2) if requests else None,
+        'timeouts': stats.get('requests_errors', 0),
+    }
+
+
+def connection_stats():
+    """Per-alias connection counters for this process."""
+    with _connects_lock:
+        connects = dict(_connects)
+    stats = {}
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        stats[alias] = {
+            'connects': connects.get(alias, 0),
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+            'pool': pool_stats(alias),
+        }
+    return stats
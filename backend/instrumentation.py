@@ -0,0 +1,203 @@
+"""
+Opt-in per-request SQL and serializer instrumentation.
+
+With ``QUERY_INSTRUMENTATION_SAMPLE_RATE`` above 0 the settings add
+:class:`QueryInstrumentationMiddleware`, which measures that share of requests
+(1.0 = all). For each measured request it records:
+
+* the number of queries and the time spent in them, on every database alias;
+* exact duplicates (same SQL and parameters) and statements run
+  ``REPEATED_QUERY_THRESHOLD`` or more times with different parameters,
+  the usual sign of an N+1 in a serializer;
+* the time spent producing ``serializer.data``.
+
+The numbers go out as a ``Server-Timing`` header (visible in the browser's
+network panel) and as one JSON log line on the ``backend.instrumentation``
+logger. The line is logged at WARNING when the request looks like an N+1 or
+ran more queries than its view declared with :func:`query_budget`.
+``backend.testing.QueryBudgetMixin`` enforces those budgets in tests.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+REPEATED_QUERY_THRESHOLD = 5
+
+_current = ContextVar('request_metrics', default=None)
+_IN_LIST = re.compile(r'IN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+
+
+def query_budget(max_queries, methods=('GET',)):
+    """
+    Declare the most queries one request to this view may run. Works on
+    function views and view classes; ``methods`` are the HTTP methods it covers.
+    """
+    def decorator(view):
+        view.query_budget = (max_queries, tuple(methods))
+        return view
+    return decorator
+
+
+def view_query_budget(view_func, method):
+    """The budget a view declared with :func:`query_budget` for ``method``, or None."""
+    view = view_func
+    for attr in ('cls', 'view_class'):  # DRF views / Django class-based views
+        view = getattr(view_func, attr, view)
+    declared = getattr(view_func, 'query_budget', None) or getattr(view, 'query_budget', None)
+    if declared and method.upper() in declared[1]:
+        return declared[0]
+    return None
+
+
+def statement_shape(sql):
+    """SQL with IN lists collapsed, so the same query over different ids compares equal."""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class RequestMetrics:
+    """Collects one request's numbers; also the ``execute_wrapper`` installed on every connection."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+            self.statements[statement_shape(sql)] += 1
+            self.executions[(sql, repr(params))] += 1
+
+    @property
+    def duplicate_queries(self):
+        return sum(count - 1 for count in self.executions.values() if count > 1)
+
+    def repeated_statements(self, threshold=REPEATED_QUERY_THRESHOLD):
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+    def server_timing(self, total_seconds):
+        return ', '.join([
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serializer_seconds * 1000:.1f}',
+            f'total;dur={total_seconds * 1000:.1f}',
+        ])
+
+
+_base_serializer_data = serializers.BaseSerializer.data
+
+
+def _timed_serializer_data(self):
+    metrics = _current.get()
+    if metrics is None or metrics.serializing:  # nested .data calls are part of the outer one
+        return _base_serializer_data.fget(self)
+    metrics.serializing = True
+    start = time.perf_counter()
+    try:
+        return _base_serializer_data.fget(self)
+    finally:
+        metrics.serializing = False
+        metrics.serializer_seconds += time.perf_counter() - start
+
+
+def install_serializer_timing():
+    """Time ``serializer.data`` for measured requests (Serializer and ListSerializer both go through here)."""
+    serializers.BaseSerializer.data = property(_timed_serializer_data)
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'QUERY_INSTRUMENTATION_SAMPLE_RATE', 1.0)
+        install_serializer_timing()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with self.wrap_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        # Connections are per thread and the async ORM queries from the request's
+        # sync thread, so the wrappers go on there. Unsampled requests skip the hop.
+        stack = await sync_to_async(self.wrap_connections)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def wrap_connections(self, metrics):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(metrics))
+        return stack
+
+    def finish(self, request, response, metrics, start):
+        total = time.perf_counter() - start
+        response['Server-Timing'] = metrics.server_timing(total)
+        self.log(request, response, metrics, total)
+        return response
+
+    def log(self, request, response, metrics, total):
+        match = request.resolver_match
+        # Read from the resolved view rather than in process_view, which would
+        # cost a sync/async adaptation per request under ASGI
+        budget = view_query_budget(match.func, request.method) if match else None
+        repeated = metrics.repeated_statements()
+        over_budget = budget is not None and metrics.queries > budget
+        record = {
+            'event': 'request_metrics',
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_seconds * 1000, 1),
+            'duplicate_queries': metrics.duplicate_queries,
+            'serializer_ms': round(metrics.serializer_seconds * 1000, 1),
+            'query_budget': budget,
+            'over_budget': over_budget,
+            'repeated_statements': [{'sql': sql[:300], 'count': count} for sql, count in repeated],
+        }
+        logger.log(logging.WARNING if over_budget or repeated else logging.INFO, json.dumps(record))
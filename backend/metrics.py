@@ -0,0 +1,453 @@
+"""
+Prometheus metrics, added up across every worker process.
+
+``GET /metrics`` answers in the Prometheus text format (0.0.4). Any scraper can
+read it, and ``curl`` works too. No client library or push gateway is needed.
+
+Each process keeps its values in its own file under ``METRICS_DIR`` (on the
+``/dev/shm`` tmpfs when there is one), mapped into memory with ``mmap``.
+Recording a value takes a lock and a ``struct`` write, with no system call.
+The worker that answers a scrape reads every process's file and sums them.
+Counters and histograms of exited workers still count: gunicorn's
+``child_exit`` hook folds their file into ``counter_archive.json``. Gauges
+only count for live processes.
+
+What is recorded:
+
+* ``http_request_duration_seconds``: a histogram per route (URL name),
+  method and status code. ``http_requests_in_flight`` gauges concurrency.
+* Database connections opened per alias. With a psycopg pool, its size,
+  the connections checked out and the requests waiting, per alias.
+* Cache lookups per namespace and result (see backend.cache), plus the
+  derived ``cache_hit_ratio``.
+* Business counters: applications created, jobs posted and failed logins.
+"""
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .db import pool_stats
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+INITIAL_FILE_SIZE = 1 << 16
+ARCHIVE_FILE = 'counter_archive.json'
+# Request latency buckets in seconds (+Inf is implied)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_HEADER = struct.Struct('i4x')  # bytes in use, including the header
+_KEY_LENGTH = struct.Struct('i')
+_VALUE = struct.Struct('d')
+
+
+def _value_offset(position, key_length):
+    # An entry is <key length><key>, padded to 8 bytes, then the double
+    return position + ((_KEY_LENGTH.size + key_length + 7) & ~7)
+
+
+def _entries(data):
+    """``(key, value, value offset)`` of every entry in a process file's bytes."""
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data)) if len(data) >= _HEADER.size else 0
+    position = _HEADER.size
+    while position + _KEY_LENGTH.size <= used:
+        length = _KEY_LENGTH.unpack_from(data, position)[0]
+        offset = _value_offset(position, length)
+        if length <= 0 or offset + _VALUE.size > used:
+            break
+        key = bytes(data[position + _KEY_LENGTH.size:position + _KEY_LENGTH.size + length]).decode()
+        yield key, _VALUE.unpack_from(data, offset)[0], offset
+        position = offset + _VALUE.size
+
+
+def _read_values(path):
+    try:
+        with open(path, 'rb') as handle:
+            data = handle.read()
+    except FileNotFoundError:
+        return []
+    return [(key, value) for key, value, _ in _entries(data)]
+
+
+class ProcessFile:
+    """One process's ``key -> float`` slots in a memory-mapped file; safe across threads."""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self.fd).st_size
+        if size < INITIAL_FILE_SIZE:
+            os.ftruncate(self.fd, INITIAL_FILE_SIZE)
+            size = INITIAL_FILE_SIZE
+        self.map = mmap.mmap(self.fd, size)
+        self.used = _HEADER.unpack_from(self.map, 0)[0] or _HEADER.size
+        self.positions = {key: offset for key, _, offset in _entries(self.map)}
+
+    def _slot(self, key):
+        offset = self.positions.get(key)
+        if offset is None:
+            encoded = key.encode()
+            offset = _value_offset(self.used, len(encoded))
+            end = offset + _VALUE.size
+            if end > len(self.map):
+                size = len(self.map)
+                while size < end:
+                    size *= 2
+                os.ftruncate(self.fd, size)
+                self.map.resize(size)
+            _KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+            self.map[self.used + _KEY_LENGTH.size:self.used + _KEY_LENGTH.size + len(encoded)] = encoded
+            _VALUE.pack_into(self.map, offset, 0.0)
+            # Publish the entry only once it is complete
+            self.used = end
+            _HEADER.pack_into(self.map, 0, self.used)
+            self.positions[key] = offset
+        return offset
+
+    def add(self, key, amount):
+        with self.lock:
+            offset = self._slot(key)
+            _VALUE.pack_into(self.map, offset, _VALUE.unpack_from(self.map, offset)[0] + amount)
+
+    def set(self, key, value):
+        with self.lock:
+            _VALUE.pack_into(self.map, self._slot(key), value)
+
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+def metrics_dir():
+    return settings.METRICS_DIR
+
+
+def _process_file(kind):
+    # Keyed by pid too: a forked worker must not write into its parent's file
+    key = (metrics_dir(), kind, os.getpid())
+    process_file = _files.get(key)
+    if process_file is None:
+        with _files_lock:
+            process_file = _files.get(key)
+            if process_file is None:
+                os.makedirs(key[0], exist_ok=True)
+                process_file = _files[key] = ProcessFile(os.path.join(key[0], f'{kind}_{key[2]}.db'))
+    return process_file
+
+
+def _process_files(directory):
+    """``(kind, pid, path)`` of every process file in ``directory``."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    files = []
+    for name in names:
+        kind, _, pid = name.removesuffix('.db').partition('_')
+        if name.endswith('.db') and pid.isdigit():
+            files.append((kind, int(pid), os.path.join(directory, name)))
+    return files
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_archive(directory):
+    try:
+        with open(os.path.join(directory, ARCHIVE_FILE)) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {'merged': [], 'values': {}}
+
+
+def _write_archive(directory, archive):
+    archive['generation'] = archive.get('generation', 0) + 1  # tells readers to sum again
+    temporary = os.path.join(directory, f'{ARCHIVE_FILE}.{os.getpid()}')
+    with open(temporary, 'w') as handle:
+        json.dump(archive, handle)
+    os.replace(temporary, os.path.join(directory, ARCHIVE_FILE))
+
+
+def collect(directory=None):
+    """
+    ``{key: value}`` summed over the files of every process. Summed again if a
+    process was folded into the archive meanwhile: its counters would otherwise
+    be missed or counted twice, and a dip reads as a counter reset.
+    """
+    directory = directory or metrics_dir()
+    archive = _read_archive(directory)
+    while True:
+        merged = set(archive['merged'])
+        totals = defaultdict(float, archive['values'])
+        for kind, pid, path in _process_files(directory):
+            if kind == 'counter' and pid in merged:
+                continue  # folded into the archive a moment ago
+            if kind == 'gauge' and not _pid_alive(pid):
+                continue
+            for key, value in _read_values(path):
+                totals[key] += value
+        latest = _read_archive(directory)
+        if latest.get('generation', 0) == archive.get('generation', 0):
+            return totals
+        archive = latest
+
+
+def mark_process_dead(pid, directory=None):
+    """
+    Fold an exited process's counters into the archive and drop its gauges.
+    Run from one process only (gunicorn's master, in ``child_exit``).
+    """
+    directory = directory or metrics_dir()
+    try:
+        os.remove(os.path.join(directory, f'gauge_{pid}.db'))
+    except FileNotFoundError:
+        pass
+    path = os.path.join(directory, f'counter_{pid}.db')
+    if not os.path.exists(path):
+        return
+    archive = _read_archive(directory)
+    for key, value in _read_values(path):
+        archive['values'][key] = archive['values'].get(key, 0.0) + value
+    # Readers skip the file while it is both archived and still on disk
+    archive['merged'] = [pid]
+    _write_archive(directory, archive)
+    os.remove(path)
+    archive['merged'] = []
+    _write_archive(directory, archive)
+
+
+def fold_dead_processes(directory=None):
+    """
+    :func:`mark_process_dead` for every process that left files behind
+    without a ``child_exit`` (a crashed server, ``runserver``).
+    """
+    directory = directory or metrics_dir()
+    for pid in {pid for _, pid, _ in _process_files(directory)}:
+        if not _pid_alive(pid):
+            mark_process_dead(pid, directory)
+
+
+# ------------------------------
+# METRIC TYPES
+# ------------------------------
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample_line(name, labelnames, labels, value):
+    pairs = ','.join(f'{label}="{_escape(text)}"' for label, text in zip(labelnames, labels))
+    value = str(int(value)) if float(value).is_integer() else repr(float(value))
+    return f'{name}{{{pairs}}} {value}' if pairs else f'{name} {value}'
+
+
+class Metric:
+    type = None
+    kind = 'counter'  # the process file it lives in: summed forever, or only over live processes
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _key(self, suffix='', labels=None, extra=()):
+        labels = labels or {}
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes the labels {self.labelnames}, not {tuple(labels)}')
+        return json.dumps([self.name + suffix, [str(labels[name]) for name in self.labelnames] + list(extra)])
+
+    def render(self, samples):
+        return [
+            _sample_line(self.name, self.labelnames, labels, value)
+            for labels, value in sorted(samples[self.name].items())
+        ]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        _process_file(self.kind).add(self._key(labels=labels), amount)
+
+
+class Gauge(Metric):
+    type = 'gauge'
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        _process_file(self.kind).add(self._key(labels=labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        _process_file(self.kind).set(self._key(labels=labels), value)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+
+    def observe(self, value, **labels):
+        process_file = _process_file(self.kind)
+        bound = self.bounds[bisect_left(self.buckets, value)]
+        process_file.add(self._key('_bucket', labels, [bound]), 1)
+        process_file.add(self._key('_sum', labels), value)
+        process_file.add(self._key('_count', labels), 1)
+
+    def render(self, samples):
+        lines = []
+        labelnames = self.labelnames + ('le',)
+        for labels, count in sorted(samples[f'{self.name}_count'].items()):
+            cumulative = 0
+            for bound in self.bounds:
+                cumulative += samples[f'{self.name}_bucket'].get(labels + (bound,), 0)
+                lines.append(_sample_line(f'{self.name}_bucket', labelnames, labels + (bound,), cumulative))
+            lines.append(_sample_line(f'{self.name}_sum', self.labelnames, labels, samples[f'{self.name}_sum'][labels]))
+            lines.append(_sample_line(f'{self.name}_count', self.labelnames, labels, count))
+        return lines
+
+
+class CacheHitRatio(Metric):
+    """Hits / lookups per namespace, derived from ``cache_requests`` when rendering."""
+    type = 'gauge'
+
+    def render(self, samples):
+        lookups = defaultdict(lambda: [0, 0])
+        for (namespace, result), value in samples[cache_requests.name].items():
+            lookups[namespace][result == 'hit'] += value
+        return [
+            _sample_line(self.name, ('namespace',), (namespace,), round(hits / (hits + misses), 4))
+            for namespace, (misses, hits) in sorted(lookups.items()) if hits + misses
+        ]
+
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Time to answer a request, by URL name, method and status.',
+    ['route', 'method', 'status'],
+)
+requests_in_flight = Gauge('http_requests_in_flight', 'Requests being handled right now.')
+db_connections_opened = Counter(
+    'db_connections_opened_total', 'Database connections opened (or checked out of the pool).', ['alias'],
+)
+db_pool_size = Gauge('db_pool_size', 'Connections held by the psycopg pools.', ['alias'])
+db_pool_checked_out = Gauge('db_pool_checked_out', 'Pooled connections in use.', ['alias'])
+db_pool_requests_waiting = Gauge('db_pool_requests_waiting', 'Requests waiting for a pooled connection.', ['alias'])
+cache_requests = Counter('cache_requests_total', 'Cache lookups by namespace and result.', ['namespace', 'result'])
+cache_hit_ratio = CacheHitRatio('cache_hit_ratio', 'Share of cache lookups that were hits, by namespace.')
+applications_created = Counter('applications_created_total', 'Job applications submitted.')
+jobs_posted = Counter('jobs_posted_total', 'Job postings created, one by one or in bulk.')
+logins_failed = Counter('logins_failed_total', 'Login attempts rejected for bad credentials.')
+
+
+def render(directory=None):
+    """Every registered metric in the text exposition format."""
+    samples = defaultdict(dict)
+    for key, value in collect(directory).items():
+        name, labels = json.loads(key)
+        samples[name][tuple(labels)] = value
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        lines.extend(metric.render(samples))
+    return '\n'.join(lines) + '\n'
+
+
+@receiver(connection_created, dispatch_uid='backend.metrics.count_connections')
+def count_connections(sender, connection, **kwargs):
+    db_connections_opened.inc(alias=connection.alias)
+
+
+def record_pool_stats():
+    """Publish the gauges of the connection pools this process has opened."""
+    for alias in connections:
+        # Pools belong to the process, not to a thread's connections (under ASGI
+        # the middleware runs in the event loop thread, which has none). Check
+        # the backend's registry so that reading the gauges never opens a pool.
+        if alias not in getattr(connections[alias], '_connection_pools', ()):
+            continue
+        stats = pool_stats(alias)
+        if stats is not None:
+            db_pool_size.set(stats['size'], alias=alias)
+            db_pool_checked_out.set(stats['checked_out'], alias=alias)
+            db_pool_requests_waiting.set(stats['requests_waiting'], alias=alias)
+
+
+class MetricsMiddleware:
+    """Times every request (put it first in MIDDLEWARE) and counts the ones in flight."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        requests_in_flight.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            requests_in_flight.dec()
+        return self.record(request, response, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        requests_in_flight.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            requests_in_flight.dec()
+        return self.record(request, response, start)
+
+    def record(self, request, response, start):
+        match = request.resolver_match
+        request_duration.observe(
+            time.perf_counter() - start,
+            route=match.view_name if match else 'unmatched', method=request.method, status=response.status_code,
+        )
+        record_pool_stats()
+        return response
+
+
+def metrics_view(request):
+    """
+    The metrics of all workers. Scrapers send ``Authorization: Bearer
+    <METRICS_TOKEN>``; staff users signed in to the admin may read it too.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    authorized = bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    if not (authorized or request.user.is_staff):
+        return HttpResponseForbidden('Metrics need the METRICS_TOKEN bearer token or a staff session.')
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,186 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a composite, unique ordering.
+
+    The cursor carries the ordering values of the last row seen, and the next
+    page is fetched with ``WHERE a <= x AND (a < x OR (a = x AND b < y))
+    ORDER BY a, b LIMIT n``. The leading ``a <= x`` is what lets PostgreSQL
+    start the index scan at the cursor (it cannot bound a scan with the OR
+    alone), so every page costs the same as the first. Rows inserted
+    meanwhile never shift a page. Responses keep the ``count``/``next``/``previous``/``results`` shape.
+    ``?count=false`` skips the ``COUNT(*)`` over the filtered set.
+    """
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(self.ordering)
+        assert ordering[-1].lstrip('-') in ('id', 'pk'), (
+            'Keyset pagination needs a unique ordering; end it with "id" or "-id".'
+        )
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def include_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() not in ('0', 'false', 'no')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_query = self.get_page_query(queryset, request, view)
+        self.count = queryset.count() if self.include_count(request) else None
+        return self.set_page(list(page_query))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """:meth:`paginate_queryset` on the async ORM, for async views."""
+        page_query = self.get_page_query(queryset, request, view)
+        self.count = await queryset.acount() if self.include_count(request) else None
+        return self.set_page([row async for row in page_query.aiterator()])
+
+    def get_page_query(self, queryset, request, view):
+        """The sliced queryset for the requested page (one row extra, to detect more)."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.cursor and self.cursor['reverse']:
+            ordering = tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+        if self.cursor:
+            position = self.clean_position(queryset, ordering, self.cursor['position'])
+            queryset = queryset.filter(self.seek_filter(ordering, position))
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.cursor and self.cursor['reverse']:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        self.page = rows
+        return rows
+
+    def ordering_field(self, queryset, name):
+        """The model field or annotation output field that ``name`` orders by."""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        if name == 'pk':
+            return queryset.model._meta.pk
+        return queryset.model._meta.get_field(name)
+
+    def clean_position(self, queryset, ordering, position):
+        """The cursor's values as the ordering fields' Python types; a tampered cursor is a 404."""
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                self.ordering_field(queryset, field.lstrip('-')).to_python(value)
+                for field, value in zip(ordering, position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def seek_filter(self, ordering, position):
+        """
+        Rows strictly after ``position`` in ``ordering``: a lexicographic OR of
+        ANDs, behind a range condition on the first field that an index can seek to.
+        """
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        clauses = []
+        for index, field in enumerate(ordering):
+            equal = {name.lstrip('-'): value for name, value in zip(ordering[:index], position)}
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clauses.append(Q(**equal, **{f'{field.lstrip("-")}__{lookup}': position[index]}))
+        first = ordering[0]
+        bound = Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': position[0]})
+        return bound & reduce(or_, clauses)
+
+    def get_position(self, instance):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            return {'position': list(payload['p']), 'reverse': bool(payload['r'])}
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        body = OrderedDict()
+        if self.count is not None:
+            body['count'] = self.count
+        body['next'] = self.get_next_link()
+        body['previous'] = self.get_previous_link()
+        body['results'] = data
+        return body
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,180 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to the ``replica`` alias only while
+a view marked with :func:`reads_from` handles a safe (GET/HEAD/OPTIONS)
+request. Every other read stays on the primary. After a client writes
+(any unsafe request that succeeds), its reads are pinned to the primary for
+``REPLICA_PIN_SECONDS``, so the client sees its own changes despite
+replication lag. Clients are identified by their Authorization header, else
+their session, else their IP address.
+
+Without a ``replica`` entry in ``DATABASES`` everything reads from ``default``.
+"""
+import hashlib
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Models whose rows must be visible right after they are written elsewhere,
+# e.g. a token issued by the login request and used by the very next GET
+PRIMARY_ONLY_MODELS = {'authtoken.token'}
+
+_read_alias = ContextVar('read_alias', default=DEFAULT_DB_ALIAS)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def reads_from(alias, actions=None):
+    """
+    Mark a view so its safe requests read from ``alias`` (``'replica'`` or
+    ``'default'``). Works on function views and view classes; for viewsets,
+    ``actions`` limits it to e.g. ``['list']``.
+    """
+    def decorator(view):
+        view.read_database = alias
+        view.read_database_actions = actions
+        return view
+    return decorator
+
+
+class using_database:
+    """Context manager / decorator that routes the reads inside it to ``alias``."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __enter__(self):
+        self._token = _read_alias.set(self.alias)
+
+    def __exit__(self, *exc_info):
+        _read_alias.reset(self._token)
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def client_identity(request):
+    auth = request.META.get('HTTP_AUTHORIZATION')
+    if auth:
+        return 'auth:' + hashlib.sha256(auth.encode()).hexdigest()
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return 'session:' + session.session_key
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def pin_cache_key(request):
+    return f'db-pin:{client_identity(request)}'
+
+
+def view_read_database(view_func, method):
+    """The alias a view asked for with :func:`reads_from`, or None."""
+    view = view_func
+    for attr in ('cls', 'view_class'):  # DRF viewsets / Django class-based views
+        view = getattr(view_func, attr, view)
+    alias = getattr(view_func, 'read_database', None) or getattr(view, 'read_database', None)
+    actions = getattr(view_func, 'read_database_actions', None) or getattr(view, 'read_database_actions', None)
+    if alias and actions is not None:
+        action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+        if action not in actions:
+            return None
+    return alias
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Chooses the read database per request and pins writers to the primary.
+    Runs natively under both WSGI and ASGI, so async views are not pushed
+    through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _read_alias.set(DEFAULT_DB_ALIAS)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if self.pins_client(request, response):
+            cache.set(pin_cache_key(request), 1, getattr(settings, 'REPLICA_PIN_SECONDS', 10))
+        return response
+
+    async def __acall__(self, request):
+        token = _read_alias.set(DEFAULT_DB_ALIAS)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if self.pins_client(request, response):
+            await cache.aset(pin_cache_key(request), 1, getattr(settings, 'REPLICA_PIN_SECONDS', 10))
+        return response
+
+    def pins_client(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400 and replica_configured()
+
+    def requested_alias(self, request, view_func):
+        if request.method not in SAFE_METHODS or not replica_configured():
+            return None
+        return view_read_database(view_func, request.method)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        alias = self.requested_alias(request, view_func)
+        if alias == REPLICA_DB_ALIAS and cache.get(pin_cache_key(request)):
+            alias = DEFAULT_DB_ALIAS  # this client wrote recently: read your writes
+        if alias:
+            _read_alias.set(alias)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        alias = self.requested_alias(request, view_func)
+        if alias == REPLICA_DB_ALIAS and await cache.aget(pin_cache_key(request)):
+            alias = DEFAULT_DB_ALIAS
+        if alias:
+            _read_alias.set(alias)
+        return None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias == DEFAULT_DB_ALIAS or model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return DEFAULT_DB_ALIAS
+        if alias == REPLICA_DB_ALIAS and not replica_configured():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS  # inside a write transaction, read what it wrote
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_DB_ALIAS
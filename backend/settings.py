@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 import ssl 
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -52,20 +54,39 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware', 
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.static.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.routers.ReplicaRoutingMiddleware',
 ]
 
+# Share of requests measured by backend.instrumentation (query count, SQL and
+# serializer time, N+1 detection); 0 leaves the middleware out entirely
+QUERY_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv("QUERY_INSTRUMENTATION_SAMPLE_RATE", "0"))
+if QUERY_INSTRUMENTATION_SAMPLE_RATE > 0:
+    MIDDLEWARE.insert(2, 'backend.instrumentation.QueryInstrumentationMiddleware')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -74,7 +95,7 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.KeysetPagination',
     'PAGE_SIZE': 20
 }
 
@@ -91,7 +112,18 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:9000",
 ]
 
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    # CVs and application documents, deduplicated by content (backend.storage)
+    "documents": {
+        "BACKEND": "backend.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -110,6 +142,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 IS_LOCAL_DEV = True
@@ -143,7 +176,82 @@ else:
             },
         }
     }
-    
+
+# DJANGO_DB_ENGINE=sqlite swaps PostgreSQL for a local SQLite file, so
+# `manage.py test` runs without a database server. PostgreSQL-only features
+# fall back (job.search uses icontains instead of full-text search) and the
+# replica and connection pool settings below do not apply.
+USE_SQLITE = os.getenv("DJANGO_DB_ENGINE", "postgresql").lower() in ("sqlite", "sqlite3")
+
+if USE_SQLITE:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("DJANGO_SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        }
+    }
+
+# Optional read replica (DJANGO_REPLICA_HOST). backend.routers sends reads of
+# views marked with reads_from('replica') there, except for clients that wrote
+# within the last REPLICA_PIN_SECONDS. Endpoints whose bodies are cached or
+# carry ETags read the primary. Tests mirror the replica onto the default database.
+if os.getenv("DJANGO_REPLICA_HOST") and not USE_SQLITE:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DJANGO_REPLICA_HOST"),
+        "PORT": os.getenv("DJANGO_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["backend.routers.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("DJANGO_REPLICA_PIN_SECONDS", "10"))
+
+# Database connection reuse. By default each worker thread keeps its
+# connection for DJANGO_CONN_MAX_AGE seconds, checking it is still alive before
+# reuse; this avoids a TCP + TLS handshake to PostgreSQL on every request.
+# DJANGO_DB_POOL=true switches to Django's psycopg 3 pool instead, sized per
+# worker process (keep max_size at least the number of gunicorn threads).
+# Persistent connections are never reused under ASGI, so backend.asgi defaults
+# DJANGO_CONN_MAX_AGE to 0 and the web-asgi service runs with the pool.
+# Pool and connection metrics are served at /api/db-stats/ (backend.db).
+DB_POOL = os.getenv("DJANGO_DB_POOL", "false").lower() in ("1", "true", "yes") and not USE_SQLITE
+
+for database in DATABASES.values():
+    if DB_POOL:
+        database["CONN_MAX_AGE"] = 0  # the pool owns connection lifetimes
+        database["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DJANGO_DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DJANGO_DB_POOL_MAX_SIZE", os.getenv("GUNICORN_THREADS", "4"))),
+            "timeout": float(os.getenv("DJANGO_DB_POOL_TIMEOUT", "10")),
+            "max_idle": float(os.getenv("DJANGO_DB_POOL_MAX_IDLE", "300")),
+        }
+    else:
+        database["CONN_MAX_AGE"] = int(os.getenv("DJANGO_CONN_MAX_AGE", "60"))
+        database["CONN_HEALTH_CHECKS"] = True
+
+
+# Cache: Redis in production (REDIS_URL), per-process local memory otherwise.
+# DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION select e.g. the file-based backend.
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "placement",
+            "TIMEOUT": 300,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+            "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "placement-portal"),
+            "TIMEOUT": 300,
+        }
+    }
 
 
 # Password validation
@@ -167,6 +275,7 @@ LOGIN_REDIRECT_URL = '/studentprofile/'
 # 🔑 FIX 2: Set the correct logout redirect path (assuming you want to go to the main login page)
 LOGOUT_REDIRECT_URL = "/accounts/login/"
 AUTH_USER_MODEL = "users.User"
+AUTHENTICATION_BACKENDS = ["users.backends.UsernameOrEmailBackend"]
 
 
 # Internationalization
@@ -190,6 +299,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Threads per process that render profile picture sizes (users.images); 0 renders inline
+IMAGE_RENDITION_WORKERS = int(os.getenv("IMAGE_RENDITION_WORKERS", "2"))
+
+# Processes per web worker that extract CV/document text (users.documents); 0 extracts inline
+DOCUMENT_EXTRACTION_WORKERS = int(os.getenv("DOCUMENT_EXTRACTION_WORKERS", "2"))
+
+# Per-process metric files, summed by GET /metrics (backend.metrics). Every
+# worker of one server must share the directory; tmpfs keeps it off the disk.
+METRICS_DIR = os.getenv("METRICS_DIR") or (
+    "/dev/shm/placement-metrics" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "placement-metrics")
+)
+# Bearer token for scrapers of /metrics; without it only staff sessions may read it
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:8080") 
 
 # Email settings
@@ -0,0 +1,136 @@
+"""
+Content-addressed storage for CVs and application documents.
+
+Every upload is stored under the SHA-256 of its content,
+``blobs/ab/abcdef...<ext>``, so identical files (the same CV attached to 50
+applications, a document uploaded twice) are kept once and share one name.
+Saving content that already exists writes nothing.
+
+Because a blob may be referenced by many rows, :meth:`delete` is reference
+counted: the file is only removed once no FileField using this storage
+points at it any more. Rows release their blobs with :func:`release_on_commit`
+when they are deleted or their file is replaced. ``manage.py dedupe_media``
+moves files uploaded before this storage existed into blobs.
+"""
+import hashlib
+import os
+import time
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import models, transaction
+
+BLOB_DIR = 'blobs'
+
+# A blob saved this recently is never deleted: the row of the save that found
+# or created it may not be committed yet, so counting references would miss it
+BLOB_GRACE_SECONDS = 60 * 60
+
+
+def document_storage():
+    """The ``documents`` storage from ``STORAGES``; used as ``FileField(storage=...)``."""
+    return storages['documents']
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks() if hasattr(content, 'chunks') else iter(lambda: content.read(64 * 1024), b''):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_prefix(digest):
+    """Every blob of this content starts with this name (only the extension varies)."""
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}'
+
+
+def blob_name(digest, original_name):
+    extension = os.path.splitext(original_name or '')[1].lower()[:10]
+    return blob_prefix(digest) + extension
+
+
+def is_blob(name):
+    return name.startswith(f'{BLOB_DIR}/')
+
+
+def blob_digest(name):
+    """The content hash in a blob name, or None for files stored before content addressing."""
+    if not name or not is_blob(name):
+        return None
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def release_on_commit(*names):
+    """Delete the blobs rows just stopped referencing, once that is committed."""
+    names = [name for name in names if name]
+    if not names:
+        return
+
+    def release():
+        storage = document_storage()
+        for name in names:
+            storage.delete(name)
+    transaction.on_commit(release)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = blob_name(content_hash(content), name)
+        if self.touch(name):
+            return name
+        saved = self._save(name, content).replace('\\', '/')
+        if saved != name:
+            # A concurrent save of the same content created the blob first, so
+            # FileSystemStorage picked another name; the bytes are identical
+            super().delete(saved)
+        return name
+
+    def touch(self, name):
+        """Mark an existing file as just saved; False if it does not exist."""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def saved_recently(self, name):
+        try:
+            return time.time() - os.path.getmtime(self.path(name)) < BLOB_GRACE_SECONDS
+        except FileNotFoundError:
+            return False
+
+    def referencing_fields(self):
+        """``(model, field name)`` for every FileField stored here."""
+        return [
+            (model, field.name)
+            for model in apps.get_models()
+            for field in model._meta.get_fields()
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage)
+        ]
+
+    def reference_count(self, name):
+        return sum(
+            model._default_manager.filter(**{field: name}).count()
+            for model, field in self.referencing_fields()
+        )
+
+    def delete(self, name):
+        """
+        Remove ``name`` unless a row still references it. Blobs saved in the
+        last ``BLOB_GRACE_SECONDS`` are kept too; ``dedupe_media
+        --delete-orphans`` removes them later if they stay unreferenced.
+        """
+        if not name or self.reference_count(name):
+            return
+        if is_blob(name) and self.saved_recently(name):
+            return
+        super().delete(name)
@@ -0,0 +1,35 @@
+"""Helpers shared by the test suites."""
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .instrumentation import view_query_budget
+
+
+class QueryBudgetMixin:
+    """
+    For API test cases: ``assertWithinQueryBudget`` makes a request and fails
+    when its view runs more queries than it declared with
+    ``@query_budget(n)``, or declared none. Queries are counted on every
+    database the test case may use.
+    """
+
+    def assertWithinQueryBudget(self, method, path, data=None, **extra):
+        view_func = resolve(path.split('?')[0]).func
+        budget = view_query_budget(view_func, method)
+        if budget is None:
+            self.fail(f'{method.upper()} {path} declares no query budget; decorate its view with @query_budget(n).')
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in sorted(self.databases)
+            ]
+            response = getattr(self.client, method.lower())(path, data, **extra)
+        queries = [query['sql'] for context in captured for query in context.captured_queries]
+        if len(queries) > budget:
+            self.fail(
+                f'{method.upper()} {path} ran {len(queries)} queries, over its budget of {budget}:\n'
+                + '\n'.join(f'{number}. {sql}' for number, sql in enumerate(queries, start=1))
+            )
+        return response
@@ -0,0 +1,478 @@
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from job.counters import get_job_counts
+from job.models import Application, Job
+from job.views import MyJobPostingsAPIView
+from users.models import User, Employer, Student
+from .db import connection_stats
+from .instrumentation import QueryInstrumentationMiddleware, RequestMetrics, statement_shape
+from . import metrics
+from .routers import ReplicaRoutingMiddleware, reads_from, using_database
+from .static import StaticFilesMiddleware
+
+
+# ------------------------------
+# CONNECTION REUSE
+# ------------------------------
+class ConnectionReuseTests(TransactionTestCase):
+    """
+    Requests go through the real WSGI handler, so request_started and
+    request_finished close or keep the connection exactly as in production
+    (the test client disables that).
+    """
+
+    def run_requests(self, count, conn_max_age):
+        original = connection.settings_dict['CONN_MAX_AGE']
+        self.addCleanup(connection.settings_dict.__setitem__, 'CONN_MAX_AGE', original)
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.close()
+        # Keep the reads on this connection even when a replica is configured
+        self.enterContext(mock.patch('backend.routers.replica_configured', return_value=False))
+
+        handler = WSGIHandler()
+        before = connection_stats()[connection.alias]['connects']
+        for _ in range(count):
+            cache.clear()  # make every request query the database
+            response = handler(RequestFactory().get(reverse('job-category-counts')).environ, lambda *args: None)
+            b''.join(response)
+            response.close()
+            self.assertEqual(response.status_code, 200)
+        return connection_stats()[connection.alias]['connects'] - before
+
+    def test_connection_is_reused_across_requests(self):
+        self.assertLessEqual(self.run_requests(5, conn_max_age=60), 1)
+
+    def test_connection_is_closed_after_each_request_without_max_age(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('in-memory SQLite connections are never closed')
+        self.assertEqual(self.run_requests(5, conn_max_age=0), 5)
+
+    def test_db_stats_requires_admin(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='staff', password='pass12345', is_staff=True))
+        response = client.get(reverse('db-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('connects', response.data['default'])
+        client.force_authenticate(User.objects.create_user(username='plain', password='pass12345'))
+        self.assertEqual(client.get(reverse('db-stats')).status_code, 403)
+
+
+# ------------------------------
+# READ REPLICA ROUTING
+# ------------------------------
+@mock.patch('backend.routers.replica_configured', return_value=True)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Routing decisions only; no query reaches a database."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def read_alias(self, request, view, status=200):
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            seen['alias'] = Job.objects.all().db
+            return HttpResponse(status=status)
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware(request)
+        return seen['alias']
+
+    def read_alias_async(self, request, view, status=200):
+        seen = {}
+
+        async def get_response(request):
+            await middleware.process_view(request, view, (), {})
+            seen['alias'] = Job.objects.all().db
+            return HttpResponse(status=status)
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(request)
+        return seen['alias']
+
+    def test_reads_use_primary_by_default(self, _):
+        self.assertEqual(Job.objects.all().db, 'default')
+        self.assertEqual(self.read_alias(self.factory.get('/'), lambda request: None), 'default')
+
+    def test_marked_views_read_from_replica_on_safe_requests(self, _):
+        view = reads_from('replica')(lambda request: None)
+        self.assertEqual(self.read_alias(self.factory.get('/'), view), 'replica')
+        self.assertEqual(self.read_alias(self.factory.post('/'), view), 'default')
+        self.assertEqual(Job.objects.all().db, 'default')  # reset after the request
+
+    def test_viewset_actions(self, _):
+        viewset = reads_from('replica', actions=['list'])(type('ViewSet', (), {}))
+        list_view = mock.Mock(cls=viewset, actions={'get': 'list'}, spec=['cls', 'actions'])
+        detail_view = mock.Mock(cls=viewset, actions={'get': 'retrieve'}, spec=['cls', 'actions'])
+        self.assertEqual(self.read_alias(self.factory.get('/'), list_view), 'replica')
+        self.assertEqual(self.read_alias(self.factory.get('/'), detail_view), 'default')
+
+    def test_writers_read_their_writes_from_primary(self, _):
+        view = reads_from('replica')(lambda request: None)
+        writer = {'HTTP_AUTHORIZATION': 'Token writer'}
+        self.read_alias(self.factory.post('/', **writer), view, status=400)
+        self.assertEqual(self.read_alias(self.factory.get('/', **writer), view), 'replica')
+        self.read_alias(self.factory.post('/', **writer), view, status=201)
+        self.assertEqual(self.read_alias(self.factory.get('/', **writer), view), 'default')
+        other = {'HTTP_AUTHORIZATION': 'Token other'}
+        self.assertEqual(self.read_alias(self.factory.get('/', **other), view), 'replica')
+
+    def test_async_requests_route_like_sync_ones(self, _):
+        view = reads_from('replica')(lambda request: None)
+        writer = {'HTTP_AUTHORIZATION': 'Token writer'}
+        self.assertEqual(self.read_alias_async(self.factory.get('/', **writer), view), 'replica')
+        self.assertEqual(self.read_alias_async(self.factory.post('/', **writer), view, status=201), 'default')
+        self.assertEqual(self.read_alias_async(self.factory.get('/', **writer), view), 'default')
+        self.assertEqual(self.read_alias(self.factory.get('/', **writer), view), 'default')
+        self.assertEqual(Job.objects.all().db, 'default')
+
+    @override_settings(DEBUG=True, MIDDLEWARE=['backend.routers.ReplicaRoutingMiddleware'])
+    def test_not_adapted_under_asgi(self, _):
+        # With DEBUG on, Django logs each sync/async adaptation (a thread hop per request)
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    def test_using_database_override(self, _):
+        with using_database('replica'):
+            self.assertEqual(Job.objects.all().db, 'replica')
+            self.assertEqual(Token.objects.all().db, 'default')  # tokens must be read fresh
+        self.assertEqual(Job.objects.all().db, 'default')
+
+
+HAS_REPLICA = 'replica' in settings.DATABASES
+
+
+@skipUnless(HAS_REPLICA, 'needs a replica alias (DJANGO_REPLICA_HOST)')
+class ReplicaRoutingIntegrationTests(TransactionTestCase):
+    # The test runner resolves every test's aliases, skipped or not
+    databases = {'default', 'replica'} if HAS_REPLICA else {'default'}
+
+    def test_stats_read_from_replica_until_the_client_writes(self):
+        cache.clear()
+        user = User.objects.create_user(username='acme', password='pass12345', role='employer')
+        Employer.objects.create(user=user, employer_id='EMP1', company_name='Acme', industry='Tech')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.assertEqual(client.get(reverse('job-stats')).status_code, 200)
+        self.assertTrue(replica_queries.captured_queries)
+
+        response = client.post(reverse('job-create'), {
+            'title': 'Backend developer', 'description': 'Build and run the placement API.',
+            'job_type': 'Full-Time', 'location': 'Cape Town', 'vacancies': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.assertEqual(client.get(reverse('job-stats')).status_code, 200)
+        self.assertFalse(replica_queries.captured_queries)
+
+    def test_cached_and_etagged_endpoints_read_the_primary(self):
+        cache.clear()
+        user = User.objects.create_user(username='reader', password='pass12345')
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.assertEqual(client.get(reverse('job-category-counts')).status_code, 200)
+            self.assertEqual(client.get(reverse('job-list')).status_code, 200)
+            with using_database('replica'):
+                cache.clear()
+                get_job_counts()  # the loader ignores the surrounding routing
+        self.assertFalse(replica_queries.captured_queries)
+
+
+# ------------------------------
+# QUERY INSTRUMENTATION
+# ------------------------------
+@override_settings(
+    MIDDLEWARE=['backend.instrumentation.QueryInstrumentationMiddleware', *settings.MIDDLEWARE],
+    QUERY_INSTRUMENTATION_SAMPLE_RATE=1.0,
+)
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='acme', password='pass12345', role='employer')
+        employer = Employer.objects.create(user=user, employer_id='EMP1', company_name='Acme', industry='Tech')
+        for i in range(3):
+            Job.objects.create(employer=employer, title=f'Job {i}', description='Build and run the API.')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def get_logged(self, url):
+        with self.assertLogs('backend.instrumentation', 'INFO') as logs:
+            response = self.client.get(url)
+        self.assertEqual(len(logs.records), 1)
+        return response, logs.records[0], json.loads(logs.records[0].getMessage())
+
+    def test_server_timing_header_and_log_line(self):
+        response, record, logged = self.get_logged(reverse('my-jobs'))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=')
+        self.assertEqual(record.levelname, 'INFO')
+        self.assertEqual(logged['route'], 'my-jobs')
+        self.assertEqual(logged['query_budget'], 3)
+        self.assertFalse(logged['over_budget'])
+        self.assertGreater(logged['queries'], 0)
+        self.assertLessEqual(logged['queries'], 3)
+        self.assertGreater(logged['serializer_ms'] + logged['sql_ms'], 0)
+        self.assertEqual(logged['repeated_statements'], [])
+
+    def test_over_budget_is_logged_as_warning(self):
+        with mock.patch.object(MyJobPostingsAPIView, 'query_budget', (0, ('GET',))):
+            _, record, logged = self.get_logged(reverse('my-jobs'))
+        self.assertEqual(record.levelname, 'WARNING')
+        self.assertTrue(logged['over_budget'])
+
+    @override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_measured(self):
+        with self.assertNoLogs('backend.instrumentation'):
+            response = self.client.get(reverse('my-jobs'))
+        self.assertNotIn('Server-Timing', response)
+
+    async def test_async_requests_are_measured(self):
+        async def get_response(request):
+            await Job.objects.acount()
+            return HttpResponse()
+        middleware = QueryInstrumentationMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs('backend.instrumentation', 'INFO') as logs:
+            response = await middleware(RequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertEqual(json.loads(logs.records[0].getMessage())['queries'], 1)
+
+    @override_settings(DEBUG=True, MIDDLEWARE=['backend.instrumentation.QueryInstrumentationMiddleware'])
+    def test_not_adapted_under_asgi(self):
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+
+class RequestMetricsTests(SimpleTestCase):
+    def run_queries(self, metrics, queries):
+        for sql, params in queries:
+            metrics(lambda *args: None, sql, params, False, {})
+
+    def test_repeated_statements_and_duplicates(self):
+        metrics = RequestMetrics()
+        self.run_queries(metrics, [('SELECT * FROM users_user WHERE id = %s', (pk,)) for pk in range(5)])
+        self.run_queries(metrics, [('SELECT * FROM job_job WHERE id = %s', (1,))] * 2)
+        self.assertEqual(metrics.queries, 7)
+        self.assertEqual(metrics.duplicate_queries, 1)
+        self.assertEqual(metrics.repeated_statements(), [('SELECT * FROM users_user WHERE id = %s', 5)])
+
+    def test_in_lists_of_any_length_have_one_shape(self):
+        self.assertEqual(
+            statement_shape('SELECT 1 WHERE id IN (%s, %s, %s) AND x IN (%s)'),
+            'SELECT 1 WHERE id IN (...) AND x IN (...)',
+        )
+
+
+# ------------------------------
+# METRICS
+# ------------------------------
+def sample(text, name, **labels):
+    """The value of one sample in a /metrics page, or None."""
+    pairs = ','.join(f'{label}="{value}"' for label, value in labels.items())
+    found = re.search(rf'^{re.escape(name)}{re.escape("{" + pairs + "}" if pairs else "")} (\S+)$', text, re.M)
+    return float(found.group(1)) if found else None
+
+
+def record_in_child():
+    metrics.jobs_posted.inc(3)
+    metrics.requests_in_flight.inc()
+
+
+class MetricsStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.enterContext(override_settings(METRICS_DIR=self.directory))
+
+    def test_values_are_summed_across_processes(self):
+        metrics.jobs_posted.inc(2)
+        child = multiprocessing.get_context('fork').Process(target=record_in_child)
+        child.start()
+        child.join()
+        text = metrics.render()
+        self.assertEqual(sample(text, 'jobs_posted_total'), 5)
+        self.assertIsNone(sample(text, 'http_requests_in_flight'))  # the child is gone
+
+        metrics.mark_process_dead(child.pid)
+        self.assertEqual(sample(metrics.render(), 'jobs_posted_total'), 5)
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.directory) if str(child.pid) in name), [],
+        )
+        metrics.jobs_posted.inc()
+        self.assertEqual(sample(metrics.render(), 'jobs_posted_total'), 6)
+
+    def test_folding_during_a_scrape_neither_drops_nor_doubles_counters(self):
+        process_files = metrics._process_files
+        for fold_before_listing in (True, False):
+            with self.subTest(fold_before_listing=fold_before_listing):
+                child = multiprocessing.get_context('fork').Process(target=record_in_child)
+                child.start()
+                child.join()
+                expected = metrics.collect()
+                pending = [child.pid]
+
+                def listing(directory):
+                    # gunicorn's master folds the worker while the scrape is under way
+                    if fold_before_listing and pending:
+                        metrics.mark_process_dead(pending.pop(), directory)
+                    files = process_files(directory)
+                    if pending:
+                        metrics.mark_process_dead(pending.pop(), directory)
+                    return files
+
+                with mock.patch('backend.metrics._process_files', listing):
+                    self.assertEqual(metrics.collect(), expected)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for seconds in (0.003, 0.2, 0.2, 30):
+            metrics.request_duration.observe(seconds, route='job-list', method='GET', status=200)
+        text = metrics.render()
+        labels = {'route': 'job-list', 'method': 'GET', 'status': '200'}
+        self.assertEqual(sample(text, 'http_request_duration_seconds_bucket', **labels, le='0.005'), 1)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_bucket', **labels, le='0.1'), 1)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_bucket', **labels, le='0.25'), 3)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_bucket', **labels, le='+Inf'), 4)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_count', **labels), 4)
+        self.assertAlmostEqual(sample(text, 'http_request_duration_seconds_sum', **labels), 30.403)
+
+    def test_file_grows_past_its_initial_size(self):
+        for number in range(2000):
+            metrics.cache_requests.inc(namespace=f'job:{number}', result='hit')
+        metrics.cache_requests.inc(namespace='jobs', result='miss')
+        metrics.cache_requests.inc(namespace='jobs', result='hit')
+        text = metrics.render()
+        self.assertEqual(sample(text, 'cache_requests_total', namespace='job:1999', result='hit'), 1)
+        self.assertEqual(sample(text, 'cache_hit_ratio', namespace='jobs'), 0.5)
+
+    def test_labels_must_match(self):
+        with self.assertRaises(ValueError):
+            metrics.cache_requests.inc(namespace='jobs')
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.enterContext(override_settings(METRICS_DIR=self.directory, METRICS_TOKEN='scrape-me'))
+        cache.clear()
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_requires_token_or_staff(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.client.force_login(User.objects.create_user(username='staff', password='pass12345', is_staff=True))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    def test_requests_and_business_counters(self):
+        user = User.objects.create_user(username='acme', password='pass12345', role='employer')
+        Employer.objects.create(user=user, employer_id='EMP1', company_name='Acme', industry='Tech')
+        client = APIClient()
+        self.assertEqual(client.post(reverse('users:login'), {'username': 'acme', 'password': 'nope'}).status_code, 400)
+        client.force_authenticate(user)
+        self.assertEqual(client.get(reverse('job-list')).status_code, 200)
+        self.assertEqual(client.get('/api/job/no-such-route/').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('job-create'), {
+                'title': 'Backend developer', 'description': 'Build and run the placement API.',
+                'job_type': 'Full-Time', 'location': 'Cape Town', 'vacancies': 1,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        student = User.objects.create_user(username='thandi', password='pass12345', role='student')
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(
+                job=Job.objects.get(), applicant=Student.objects.create(user=student, student_id='STU1'),
+                resume='resumes/cv.docx',
+            )
+
+        text = self.scrape()
+        self.assertEqual(sample(text, 'logins_failed_total'), 1)
+        self.assertEqual(sample(text, 'jobs_posted_total'), 1)
+        self.assertEqual(sample(text, 'applications_created_total'), 1)
+        self.assertEqual(
+            sample(text, 'http_request_duration_seconds_count', route='job-list', method='GET', status='200'), 1,
+        )
+        self.assertEqual(
+            sample(text, 'http_request_duration_seconds_count', route='unmatched', method='GET', status='404'), 1,
+        )
+        self.assertEqual(sample(text, 'http_requests_in_flight'), 1)  # the scrape itself
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+
+    def test_async_requests_are_timed(self):
+        async def get_response(request):
+            self.assertEqual(sample(metrics.render(), 'http_requests_in_flight'), 1)
+            return HttpResponse(status=204)
+        middleware = metrics.MetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertEqual(
+            sample(self.scrape(), 'http_request_duration_seconds_count', route='unmatched', method='GET', status='204'), 1,
+        )
+
+    @override_settings(DEBUG=True, MIDDLEWARE=['backend.metrics.MetricsMiddleware'])
+    def test_not_adapted_under_asgi(self):
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+
+# ------------------------------
+# STATIC FILES
+# ------------------------------
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        with open(os.path.join(self.directory, 'app.css'), 'w') as file:
+            file.write('body { margin: 0; }')
+        self.enterContext(override_settings(STATIC_ROOT=self.directory, STATIC_URL='/static/', WHITENOISE_AUTOREFRESH=False))
+
+    def test_serves_static_files_and_passes_the_rest_on_under_asgi(self):
+        async def get_response(request):
+            return HttpResponse(status=204)
+        middleware = StaticFilesMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get('/static/app.css'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response), b'body { margin: 0; }')
+        response.close()
+        self.assertEqual(async_to_sync(middleware)(RequestFactory().get('/api/job/')).status_code, 204)
+
+    def test_serves_static_files_under_wsgi(self):
+        middleware = StaticFilesMiddleware(lambda request: HttpResponse(status=204))
+        response = middleware(RequestFactory().get('/static/app.css'))
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    @override_settings(DEBUG=True)
+    def test_middleware_stack_not_adapted_under_asgi(self):
+        # With DEBUG on, Django logs each sync/async adaptation (a thread hop per request)
+        stack = ['backend.instrumentation.QueryInstrumentationMiddleware', *settings.MIDDLEWARE]
+        with override_settings(MIDDLEWARE=stack), self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
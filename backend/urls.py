@@ -3,6 +3,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
+from . import views
+from .metrics import metrics_view
 
 urlpatterns = [
     # The root URL redirects to the user API path
@@ -15,6 +17,9 @@ urlpatterns = [
     
     path("api/users/", include("users.urls")),
     path('api/job/', include('job.urls')),
+    path('api/cache-stats/', views.cache_stats_view, name='cache-stats'),
+    path('api/db-stats/', views.db_stats_view, name='db-stats'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
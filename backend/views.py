@@ -0,0 +1,23 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .cache import cache_stats
+from .db import connection_stats
+
+
+# ------------------------------
+# MONITORING
+# ------------------------------
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    """Cache hit/miss counters for this worker process, grouped by namespace."""
+    return Response(cache_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_stats_view(request):
+    """Database connection reuse and pool counters for this worker process."""
+    return Response(connection_stats())
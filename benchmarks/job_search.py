@@ -0,0 +1,94 @@
+"""
+Job search latency: PostgreSQL full-text search vs. the old ``icontains`` scan.
+
+    python -m benchmarks.job_search --rows 10000 100000 1000000
+
+Each size is seeded incrementally into a scratch database; the timed unit is
+one page of ``JobListAPIView`` results (COUNT plus the first 20 rows).
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, print_table, scratch_database, setup_django
+
+WORDS = (
+    'python django developer engineer data analyst marketing sales design '
+    'creative finance accounting intern graduate backend frontend cloud azure '
+    'docker support teacher nurse logistics legal research manager remote '
+    'junior senior lead customer service writer editor security network'
+).split()
+
+
+def fake_text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(employer, target, rng, batch_size=5000):
+    from job.models import Job
+    from job.search import update_search_vectors
+
+    existing = Job.objects.count()
+    while existing < target:
+        size = min(batch_size, target - existing)
+        Job.objects.bulk_create([
+            Job(
+                employer=employer,
+                title=fake_text(rng, 4),
+                description=fake_text(rng, 60),
+                detailed_experience=fake_text(rng, 15),
+                type=rng.choice(['Full time', 'Part time', 'Internship']),
+            )
+            for _ in range(size)
+        ])
+        existing += size
+    update_search_vectors(Job.objects.filter(search_vector__isnull=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--query', default='python developer')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db.models import Q
+    from job.models import Job
+    from job.search import full_text_search_enabled, order_by_relevance, search_jobs
+    from users.models import Employer, User
+
+    rng = random.Random(42)
+    results = []
+    with scratch_database() as connection:
+        user = User.objects.create_user(username='bench', password='bench', role='employer')
+        employer = Employer.objects.create(user=user, employer_id='EMPBENCH', company_name='Bench', industry='Tech')
+
+        def icontains_page():
+            queryset = Job.objects.filter(is_active=True).filter(
+                Q(title__icontains=args.query) |
+                Q(description__icontains=args.query) |
+                Q(detailed_experience__icontains=args.query)
+            ).order_by('-posted_on')
+            queryset.count()
+            list(queryset[:20])
+
+        def search_page():
+            queryset = order_by_relevance(search_jobs(Job.objects.filter(is_active=True), args.query))
+            queryset.count()
+            list(queryset[:20])
+
+        for rows in sorted(args.rows):
+            seed(employer, rows, rng)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE job_job')
+            for name, fn in (('icontains', icontains_page), ('full-text', search_page)):
+                results.append({'rows': rows, 'path': name, **measure(fn, repeat=args.repeat)})
+
+    if not full_text_search_enabled():
+        print('Note: not running on PostgreSQL, so "full-text" is the icontains fallback.')
+    print_table(results, ['rows', 'path', 'median_ms', 'p95_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Closed-loop HTTP load test: requests/sec and latency percentiles per target.
+
+Start the deployments first, e.g. the sync one under gunicorn and the async
+one under uvicorn (see docker-compose.yml), then run
+
+    python -m benchmarks.load_test --token <api token> --clients 500 --duration 30 \\
+        --target wsgi=http://localhost:8000/api/job/list/ \\
+        --target asgi=http://localhost:8001/api/job/async/list/
+
+Each client holds one keep-alive HTTP/1.1 connection and sends its next
+request as soon as the previous response arrives. Targets are measured one
+after another, never at the same time. The client is a single asyncio
+process using only the standard library. Raise ``ulimit -n`` above
+``--clients``. Run it from another machine if it saturates a core, otherwise
+the client becomes the bottleneck.
+"""
+import argparse
+import asyncio
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import print_table
+
+RESPONSE_TIMEOUT = 30
+
+
+class Target:
+    def __init__(self, name, url, headers=()):
+        parts = urlsplit(url)
+        self.name = name
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        lines = [f'GET {path} HTTP/1.1', f'Host: {parts.netloc}', 'Accept: application/json', *headers]
+        self.request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def read_response(reader):
+    """Read one response; returns ``(status, keep_alive)``."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed by server')
+    status = int(status_line.split()[1])
+    length, chunked, keep_alive = None, False, True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value != 'close'
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
+
+
+async def run_client(target, deadline, latencies, errors):
+    connection = None
+    while time.perf_counter() < deadline:
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(target.host, target.port, ssl=target.ssl)
+            reader, writer = connection
+            start = time.perf_counter()
+            writer.write(target.request)
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(read_response(reader), RESPONSE_TIMEOUT)
+            if status < 400:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+            if not keep_alive:
+                writer.close()
+                connection = None
+        except (OSError, ValueError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError) as exc:
+            errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+            if connection is not None:
+                connection[1].close()
+                connection = None
+            await asyncio.sleep(0.05)  # don't spin on a refused connection
+    if connection is not None:
+        connection[1].close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def load_test(target, clients=500, duration=30.0, warmup=5.0):
+    """Drive ``target`` with ``clients`` concurrent connections and summarize the result."""
+    if warmup:
+        await asyncio.gather(*(run_client(target, time.perf_counter() + warmup, [], {}) for _ in range(clients)))
+    latencies, errors = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(target, start + duration, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'target': target.name,
+        'clients': clients,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': (percentile(latencies, 0.50) or 0) * 1000,
+        'p99_ms': (percentile(latencies, 0.99) or 0) * 1000,
+        'errors': ', '.join(f'{kind}: {count}' for kind, count in sorted(errors.items(), key=str)) or None,
+    }
+
+
+def parse_targets(values, headers):
+    targets = []
+    for value in values:
+        name, sep, url = value.partition('=')
+        if not sep:
+            name, url = value, value
+        targets.append(Target(name, url, headers))
+    return targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True, metavar='NAME=URL')
+    parser.add_argument('--token', help='API token, sent as "Authorization: Token <key>"')
+    parser.add_argument('--header', action='append', default=[], metavar='"Name: value"')
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--warmup', type=float, default=5.0)
+    args = parser.parse_args()
+
+    headers = list(args.header)
+    if args.token:
+        headers.append(f'Authorization: Token {args.token}')
+    results = [
+        asyncio.run(load_test(target, args.clients, args.duration, args.warmup))
+        for target in parse_targets(args.target, headers)
+    ]
+    print_table(results, ['target', 'clients', 'requests', 'rps', 'p50_ms', 'p99_ms', 'errors'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Login throughput per worker: the old two-step email fallback vs. the
+single-query UsernameOrEmailBackend.
+
+    python -m benchmarks.login_throughput --users 100000
+
+The old flow ran ``authenticate(username=...)``. When that failed it ran
+``User.objects.get(email=...)`` against an unindexed column and called
+``authenticate`` again, so an email login hashed twice. The timed unit is the
+credential check only; token issue and serialization are excluded.
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, scratch_database, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import authenticate
+    from django.contrib.auth.backends import ModelBackend
+    from django.contrib.auth.hashers import make_password
+    from users.models import User
+
+    def legacy_login(identifier, password):
+        backend = ModelBackend()
+        user = backend.authenticate(None, username=identifier, password=password)
+        if user is None:
+            try:
+                user_obj = User.objects.get(email=identifier)
+                user = backend.authenticate(None, username=user_obj.username, password=password)
+            except User.DoesNotExist:
+                user = None
+        return user
+
+    def new_login(identifier, password):
+        return authenticate(None, username=identifier, password=password)
+
+    scenarios = [
+        ('username, right password', 'user7', 'secret-pass'),
+        ('email, right password', 'user7@example.com', 'secret-pass'),
+        ('email, wrong password', 'user7@example.com', 'wrong'),
+        ('unknown email', 'nobody@example.com', 'secret-pass'),
+    ]
+
+    results = []
+    with scratch_database():
+        password = make_password('secret-pass')
+        batch = []
+        for i in range(args.users):
+            batch.append(User(username=f'user{i}', email=f'user{i}@example.com', password=password, role='student'))
+            if len(batch) == 5000:
+                User.objects.bulk_create(batch)
+                batch = []
+        User.objects.bulk_create(batch)
+
+        for name, identifier, secret in scenarios:
+            for flow, fn in (('before', legacy_login), ('after', new_login)):
+                timing = measure(lambda: fn(identifier, secret), repeat=args.repeat)
+                results.append({
+                    'scenario': name, 'flow': flow, **timing,
+                    'logins_per_sec': 1000 / timing['median_ms'],
+                })
+
+    print_table(results, ['scenario', 'flow', 'median_ms', 'p95_ms', 'logins_per_sec'])
+
+
+if __name__ == '__main__':
+    main()
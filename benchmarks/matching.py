@@ -0,0 +1,60 @@
+"""
+Candidate matching: time to score every student against one job and pick the top k.
+
+    python -m benchmarks.matching --students 10000 100000 --top 50
+
+Synthetic profiles are vectorised and packed exactly as ``StudentVector``
+stores them, then stacked into the CSR matrix that ``job.matching`` keeps per
+process. The database is not involved. "stack" is the one-off cost of loading
+that matrix; "score + top-k" is what each request pays.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import measure, print_table, setup_django
+from benchmarks.job_search import fake_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--top', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from job.matching import dense, pack, score, stack, top_k, vectorize
+
+    rng = random.Random(42)
+    job = vectorize([(fake_text(rng, 4), 3.0), (fake_text(rng, 15), 2.0), (fake_text(rng, 60), 1.0)])
+    query = dense(*job)
+
+    blobs = []
+    results = []
+    for students in sorted(args.students):
+        while len(blobs) < students:
+            vector = vectorize([(fake_text(rng, 3), 3.0), (fake_text(rng, 80), 1.0), ('3rd year', 0.5)])
+            blobs.append((len(blobs) + 1, pack(*vector)))
+
+        start = time.perf_counter()
+        ids, indptr, indices, values = stack(blobs[:students])
+        stack_ms = (time.perf_counter() - start) * 1000
+
+        def rank():
+            top_k(ids, score(query, indptr, indices, values), args.top)
+
+        results.append({
+            'students': students,
+            'non_zeros': len(indices),
+            'matrix_mb': (indptr.nbytes + indices.nbytes + values.nbytes) / 2 ** 20,
+            'stack_ms': stack_ms,
+            **measure(rank, repeat=args.repeat),
+        })
+
+    print('score + top-k latency:')
+    print_table(results, ['students', 'non_zeros', 'matrix_mb', 'stack_ms', 'median_ms', 'p95_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Throughput of ``manage.py runserver`` vs. gunicorn with gunicorn.conf.py.
+
+    python -m benchmarks.serving_throughput --clients 100 --duration 20
+    python -m benchmarks.serving_throughput --path /api/job/list/ --token <key> \\
+        --worker-class sync --worker-class gthread
+
+Each server is started on a free local port with the configured settings and
+database, driven by benchmarks.load_test and then stopped. Only GET requests
+are sent, so the database is not modified. The default path is the public
+job counts endpoint; pass ``--token`` for authenticated endpoints.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from benchmarks.common import ROOT, print_table
+from benchmarks.load_test import Target, load_test
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server did not listen on port {port} within {timeout}s')
+
+
+@contextmanager
+def server(command, port, env=None):
+    process = subprocess.Popen(
+        command, cwd=ROOT, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port, process)
+        yield
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/job/job-counts/')
+    parser.add_argument('--token')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--worker-class', action='append', choices=['sync', 'gthread'])
+    args = parser.parse_args()
+
+    headers = [f'Authorization: Token {args.token}'] if args.token else []
+    servers = [('runserver', lambda port: [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}'], {})]
+    for worker_class in args.worker_class or ['gthread']:
+        servers.append((
+            f'gunicorn {worker_class}',
+            lambda port: [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', 'backend.wsgi'],
+            {'GUNICORN_WORKER_CLASS': worker_class, 'GUNICORN_ACCESS_LOG': ''},
+        ))
+
+    results = []
+    for name, command, env in servers:
+        port = free_port()
+        with server(command(port), port, env):
+            target = Target(name, f'http://127.0.0.1:{port}{args.path}', headers)
+            results.append(asyncio.run(load_test(target, args.clients, args.duration, args.warmup)))
+    print_table(results, ['target', 'clients', 'requests', 'rps', 'p50_ms', 'p99_ms', 'errors'])
+
+
+if __name__ == '__main__':
+    main()
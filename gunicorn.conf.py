@@ -0,0 +1,114 @@
+"""
+Gunicorn settings for the web container. ``gunicorn backend.wsgi`` reads this
+file from the working directory.
+
+Worker sizing:
+  * ``GUNICORN_WORKER_CLASS``: ``gthread`` (default) or ``sync``. Request
+    handling mostly waits on PostgreSQL and Redis, so a few threads per
+    process raise throughput without costing another copy of Django.
+  * ``GUNICORN_WORKERS``: defaults to ``2 * CPUs + 1``, capped so that every
+    worker fits into ``GUNICORN_MEMORY_BUDGET_MB``. The budget defaults to the
+    container's cgroup limit, and each worker is assumed to need
+    ``GUNICORN_WORKER_MEMORY_MB``.
+  * ``GUNICORN_THREADS``: threads per gthread worker (default 4).
+
+``preload_app`` imports Django and DRF once in the master, and the workers
+share those pages copy-on-write. ``max_requests`` (with jitter) recycles
+workers so slow leaks cannot accumulate. ``kill -HUP <master>`` replaces the
+workers gracefully and re-reads this file. With preload the application code
+itself is not re-imported on HUP. To deploy new code, use ``kill -USR2``
+(start a new master) followed by ``kill -QUIT`` on the old one, or restart the
+container.
+
+Workers write metrics to per-process files that ``/metrics`` sums
+(backend.metrics). In ``child_exit`` the master folds an exited worker's
+counters into an archive file, and on start it does the same for workers
+that died without one.
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def _memory_budget_mb():
+    """The cgroup memory limit in MB, or None when unlimited or unknown."""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as limit_file:
+                limit = limit_file.read().strip()
+        except OSError:
+            continue
+        if limit.isdigit() and int(limit) < 1 << 60:
+            return int(limit) // (1024 * 1024)
+    return None
+
+
+WORKER_CLASSES = ('sync', 'gthread')
+
+cpus = _cpu_count()
+memory_budget_mb = _env_int('GUNICORN_MEMORY_BUDGET_MB', _memory_budget_mb() or 0)
+worker_memory_mb = _env_int('GUNICORN_WORKER_MEMORY_MB', 160)
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class not in WORKER_CLASSES:
+    raise RuntimeError(f'GUNICORN_WORKER_CLASS must be one of {WORKER_CLASSES}, not {worker_class!r}')
+
+default_workers = 2 * cpus + 1
+if memory_budget_mb:
+    # Keep one worker's worth of headroom for the master and page cache
+    default_workers = min(default_workers, memory_budget_mb // worker_memory_mb - 1)
+workers = _env_int('GUNICORN_WORKERS', max(1, default_workers))
+threads = _env_int('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+preload_app = True
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None  # empty: no access log
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# The worker heartbeat file lives on tmpfs so a slow overlay filesystem
+# cannot make the master think a worker hung
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def on_starting(server):
+    # Fold in the metric files of workers that died without a child_exit
+    from backend.metrics import fold_dead_processes
+    fold_dead_processes()
+    server.log.info(
+        'Sizing: %s CPUs, memory budget %s -> %s %s worker(s) x %s thread(s)',
+        cpus, f'{memory_budget_mb} MB' if memory_budget_mb else 'unlimited', workers, worker_class, threads,
+    )
+
+
+def pre_fork(server, worker):
+    # Workers must not inherit a database socket (or pool) opened in the master during preload
+    from django.db import connections
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if connection.settings_dict['OPTIONS'].get('pool'):
+            connection.close_pool()
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters in /metrics and drop its gauges
+    from backend.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
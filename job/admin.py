@@ -5,7 +5,7 @@ from .models import Job, Application
 class JobAdmin(admin.ModelAdmin):
     list_display = ('title', 'employer', 'location', 'is_active', 'posted_on')
     search_fields = ('title', 'description', 'employer__user__username')
-    list_filter = ('is_active', 'type', 'experience', 'location')
+    list_filter = ('is_active', 'type_key', 'experience_key', 'location_key')
 
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
@@ -0,0 +1,69 @@
+"""
+Async versions of the read-heavy job endpoints, for ASGI deployments
+(``uvicorn backend.asgi:application``).
+
+They return the same JSON as JobListAPIView, JobDetailAPIView and job_counts
+but run on Django's async ORM (``aiterator``/``acount``) and the async cache
+API, so a worker does not block on the database while other requests wait.
+DRF views are sync-only, so these are plain Django views. They accept token
+authentication only, and they skip the conditional-GET validators used by
+the sync views.
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from users.authentication import authenticate_token_async
+from .cache import aget_cached_has_applied, aget_cached_job
+from .counters import aget_job_counts
+from .models import requesting_student
+from .pagination import JobPagination
+from .search import browse_jobs
+from .serializers import JobSerializer
+
+
+def _not_authenticated():
+    response = JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+def _drf_request(request, user):
+    # The paginator and serializers expect DRF's request API (query_params etc.)
+    drf_request = Request(request)
+    drf_request.user = user
+    return drf_request
+
+
+@require_safe
+async def job_list(request):
+    user = await authenticate_token_async(request)
+    if user is None:
+        return _not_authenticated()
+    drf_request = _drf_request(request, user)
+    paginator = JobPagination()
+    try:
+        page = await paginator.apaginate_queryset(browse_jobs(user, request.GET), drf_request)
+    except NotFound as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=404)
+    data = JobSerializer(page, many=True, context={'request': drf_request}).data
+    return JsonResponse(paginator.get_paginated_data(data))
+
+
+@require_safe
+async def job_detail(request, pk):
+    user = await authenticate_token_async(request)
+    if user is None:
+        return _not_authenticated()
+    job = await aget_cached_job(pk)
+    if job is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    student = requesting_student(user)
+    job.user_has_applied = await aget_cached_has_applied(job.pk, student) if student else False
+    return JsonResponse(JobSerializer(job, context={'request': _drf_request(request, user)}).data)
+
+
+@require_safe
+async def job_counts(request):
+    return JsonResponse(await aget_job_counts())
@@ -0,0 +1,135 @@
+"""
+Bulk job import for large recruiters.
+
+Rows arrive as a JSON array, CSV (header row of ``JobCreateSerializer`` field
+names) or NDJSON. CSV and NDJSON bodies are read lazily from the request
+stream. Rows are validated in batches by a single ``JobCreateSerializer``
+instance and inserted with ``bulk_create`` inside a single transaction.
+bulk_create skips ``save()`` and the model signals, so the derived state
+(facet keys, search and match vectors, category counters, caches) is updated here.
+"""
+import codecs
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from backend.metrics import jobs_posted
+from .cache import invalidate_jobs
+from .counters import adjust_job_count
+from .matching import save_job_vectors
+from .models import Job
+from .search import update_search_vectors
+from .serializers import JobCreateSerializer
+
+BATCH_SIZE = 500
+MAX_ROWS = 10000
+MAX_REPORTED_ERRORS = 1000
+
+
+class BulkImportError(Exception):
+    """The body could not be read as rows at all (as opposed to invalid rows)."""
+
+
+def parse_rows(request):
+    content_type = (request.content_type or '').split(';')[0].strip().lower()
+    if content_type == 'text/csv':
+        return _csv_rows(_body_stream(request))
+    if content_type in ('application/x-ndjson', 'application/jsonl'):
+        return _ndjson_rows(_body_stream(request))
+    rows = request.data
+    if isinstance(rows, dict):
+        rows = rows.get('jobs')
+    if not isinstance(rows, list):
+        raise BulkImportError('Expected a JSON array of jobs, or a CSV/NDJSON body.')
+    return iter(rows)
+
+
+def _body_stream(request):
+    # The raw body, read line by line without a DRF parser; None when the body is empty
+    return request.stream or ()
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    try:
+        for row in reader:
+            # Blank cells mean "not provided" so optional fields fall back to defaults
+            yield {k: v for k, v in row.items() if v not in ('', None)}
+    except UnicodeDecodeError:
+        raise BulkImportError(f'Line {reader.line_num + 1} is not valid UTF-8.')
+    except csv.Error as exc:
+        raise BulkImportError(f'Line {reader.line_num + 1} is not valid CSV: {exc}.')
+
+
+def _ndjson_rows(stream):
+    number = 0
+    try:
+        for number, line in enumerate(codecs.iterdecode(stream, 'utf-8'), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise BulkImportError(f'Line {number} is not valid JSON.')
+    except UnicodeDecodeError:
+        raise BulkImportError(f'Line {number + 1} is not valid UTF-8.')
+
+
+def jobs_bulk_created(jobs):
+    """Bring derived state up to date for jobs inserted with bulk_create."""
+    pks = [job.pk for job in jobs]
+    update_search_vectors(Job.objects.filter(pk__in=pks))
+    save_job_vectors(jobs)
+    for job_type, count in Counter(job.type for job in jobs if job.is_active).items():
+        adjust_job_count(job_type, count)
+    invalidate_jobs(*pks)
+    transaction.on_commit(lambda: jobs_posted.inc(len(pks)))
+
+
+def import_jobs(rows, request, skip_invalid=False):
+    """
+    Validate and insert ``rows``; returns ``(created_count, errors)``.
+
+    Unless ``skip_invalid`` is set, any invalid row rolls the whole import back.
+    """
+    employer = request.user.employer_profile
+    # One serializer instance validates every row, as ListSerializer would,
+    # but keeps the valid rows' data when other rows fail
+    validator = JobCreateSerializer(context={'request': request})
+    created, errors, seen = 0, [], 0
+
+    with transaction.atomic():
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            seen += len(batch)
+            if seen > MAX_ROWS:
+                raise BulkImportError(f'A bulk import is limited to {MAX_ROWS} rows.')
+
+            jobs = []
+            for offset, row in enumerate(batch):
+                try:
+                    data = validator.run_validation(row)
+                except ValidationError as exc:
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({'row': seen - len(batch) + offset + 1, 'errors': exc.detail})
+                    continue
+                job = Job(employer=employer, **data)
+                job.refresh_facet_keys()
+                jobs.append(job)
+            if errors and not skip_invalid:
+                continue  # keep validating for the report; nothing will be kept
+            Job.objects.bulk_create(jobs)
+            jobs_bulk_created(jobs)
+            created += len(jobs)
+
+        if errors and not skip_invalid:
+            transaction.set_rollback(True)
+            created = 0
+    return created, errors
@@ -0,0 +1,48 @@
+"""
+Cached reads for the job app (see backend.cache for the versioning scheme).
+
+``jobs`` covers everything list-shaped; ``job:<pk>`` covers one posting and
+the per-student "already applied" flags for it. Both are bumped from
+job.signals whenever a job, its applications or its employer change.
+"""
+from backend.cache import aget_or_set, bump_namespace, get_or_set
+from .models import Job, Application
+
+JOB_LIST_NAMESPACE = 'jobs'
+
+
+def job_namespace(pk):
+    return f'job:{pk}'
+
+
+def get_cached_job(pk):
+    """The listing representation of a job shared by all requesters, or None."""
+    return get_or_set(
+        job_namespace(pk), ('detail',),
+        lambda: Job.objects.for_listing().filter(pk=pk).first(),
+    )
+
+
+def get_cached_has_applied(job_pk, student):
+    return get_or_set(
+        job_namespace(job_pk), ('applied', student.pk),
+        lambda: Application.objects.filter(job_id=job_pk, applicant=student).exists(),
+    )
+
+
+async def aget_cached_job(pk):
+    return await aget_or_set(
+        job_namespace(pk), ('detail',),
+        lambda: Job.objects.for_listing().filter(pk=pk).afirst(),
+    )
+
+
+async def aget_cached_has_applied(job_pk, student):
+    return await aget_or_set(
+        job_namespace(job_pk), ('applied', student.pk),
+        lambda: Application.objects.filter(job_id=job_pk, applicant=student).aexists(),
+    )
+
+
+def invalidate_jobs(*pks):
+    bump_namespace(JOB_LIST_NAMESPACE, *(job_namespace(pk) for pk in pks))
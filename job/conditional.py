@@ -0,0 +1,45 @@
+"""
+ETag / Last-Modified validators for the job read endpoints.
+
+They are computed from the cache version stamps in job.cache (and, for a
+single job, its ``updated_at``), never from the serialized body. A matching
+``If-None-Match`` is therefore answered with 304 before the serializer runs.
+Job lists include the requesting user in the ETag because ``user_has_applied``
+differs per student.
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from backend.cache import namespace_version
+from .cache import JOB_LIST_NAMESPACE, get_cached_job, job_namespace
+
+
+def _stamp_to_datetime(stamp):
+    return datetime.fromtimestamp(stamp / 1_000_000, tz=timezone.utc)
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def job_list_etag(request, *args, **kwargs):
+    return _etag('jobs', namespace_version(JOB_LIST_NAMESPACE), request.user.pk)
+
+
+def job_list_last_modified(request, *args, **kwargs):
+    return _stamp_to_datetime(namespace_version(JOB_LIST_NAMESPACE))
+
+
+def job_detail_etag(request, pk, *args, **kwargs):
+    job = get_cached_job(pk)
+    if job is None:
+        return None
+    return _etag('job', pk, job.updated_at.timestamp(), namespace_version(job_namespace(pk)), request.user.pk)
+
+
+def job_detail_last_modified(request, pk, *args, **kwargs):
+    job = get_cached_job(pk)
+    if job is None:
+        return None
+    # Application changes bump the namespace without touching updated_at
+    return max(job.updated_at, _stamp_to_datetime(namespace_version(job_namespace(pk))))
@@ -0,0 +1,71 @@
+"""
+Active job counts per category for the public ``job_counts`` endpoint.
+
+Counts live in ``JobTypeCount`` and are adjusted by signal handlers whenever a
+job is created, deleted, re-typed or (de)activated. Reads go through the
+cache, so the hot path never touches ``Job``. ``manage.py rebuild_job_counts``
+recomputes the table from scratch if anything bypassed the signals.
+
+The loaders always read the primary: what they return is cached under the
+version stamp of the write that invalidated it, so a lagging replica would
+keep serving the old counts until the next change.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from backend.cache import aget_or_set, bump_namespace, get_or_set
+from backend.routers import using_database
+from .models import Job, JobTypeCount
+
+JOB_COUNTS_NAMESPACE = 'job-counts'
+
+
+def get_job_counts():
+    @using_database('default')
+    def load():
+        return dict(JobTypeCount.objects.filter(count__gt=0).values_list('type', 'count'))
+    return get_or_set(JOB_COUNTS_NAMESPACE, ('by-type',), load)
+
+
+async def aget_job_counts():
+    async def load():
+        with using_database('default'):
+            return {job_type: count async for job_type, count in
+                    JobTypeCount.objects.filter(count__gt=0).values_list('type', 'count')}
+    return await aget_or_set(JOB_COUNTS_NAMESPACE, ('by-type',), load)
+
+
+def invalidate_job_counts():
+    bump_namespace(JOB_COUNTS_NAMESPACE)
+
+
+def adjust_job_count(job_type, delta):
+    if not delta:
+        return
+    updated = JobTypeCount.objects.filter(type=job_type).update(count=F('count') + delta)
+    if not updated:
+        JobTypeCount.objects.get_or_create(type=job_type)
+        JobTypeCount.objects.filter(type=job_type).update(count=F('count') + delta)
+    invalidate_job_counts()
+
+
+def count_active_jobs():
+    """The ground truth the counters should match, straight from ``Job``."""
+    rows = Job.objects.filter(is_active=True).order_by().values('type').annotate(total=Count('pk'))
+    return {row['type']: row['total'] for row in rows}
+
+
+@transaction.atomic
+def rebuild_job_counts():
+    """Recompute every counter; returns ``{type: (stored, actual)}`` for counters that had drifted."""
+    actual = count_active_jobs()
+    stored = dict(JobTypeCount.objects.select_for_update().values_list('type', 'count'))
+    drift = {
+        job_type: (stored.get(job_type, 0), actual.get(job_type, 0))
+        for job_type in set(stored) | set(actual)
+        if stored.get(job_type, 0) != actual.get(job_type, 0)
+    }
+    JobTypeCount.objects.all().delete()
+    JobTypeCount.objects.bulk_create(JobTypeCount(type=t, count=n) for t, n in actual.items())
+    invalidate_job_counts()
+    return drift
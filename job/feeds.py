@@ -0,0 +1,242 @@
+"""
+Precomputed "recommended for you" job feeds.
+
+``manage.py build_job_feeds`` ranks the active jobs for every student and
+stores the best ``FEED_SIZE`` as ``RecommendedJob`` rows. A job's fit is
+the sum of three parts:
+
+* text similarity of the job and the student's profile and CV (job.matching);
+* ``CITY_BOOST`` / ``PROVINCE_BOOST`` when the job's location names the
+  student's city or province;
+* ``TYPE_WEIGHT`` times the share of the student's past applications that
+  went to jobs of the same type (internship, full time ...).
+
+A full build runs on a schedule. Between full builds, ``--interval`` runs an
+incremental refresh that scores only the jobs posted since the previous run,
+merges those that beat an entry in a student's feed and drops the entries
+they push out, so a feed never holds more than ``FEED_SIZE``. Students with
+no feed yet are scored against every active job instead. Reading a feed is
+one indexed query (:func:`feed_queryset`). Applied-to jobs are dropped in
+that query with NOT EXISTS, never row by row. The rendered page is cached per
+student until their feed is rebuilt or any job or application changes.
+"""
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Min, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from backend.cache import bump_namespace, get_or_set, namespace_version
+from users.models import Student
+from .cache import JOB_LIST_NAMESPACE
+from .filters import canonical_value
+from .matching import stack, unpack
+from .models import Application, FeedBuild, Job, JobVector, RecommendedJob
+
+FEED_SIZE = 100
+CITY_BOOST = 0.3
+PROVINCE_BOOST = 0.15
+TYPE_WEIGHT = 0.3
+STUDENT_CHUNK = 1000
+
+
+def feed_namespace(student_pk):
+    return f'feed:{student_pk}'
+
+
+class JobCandidates:
+    """
+    Jobs as arrays for scoring many students in turn. The vectors are kept
+    as posting lists (bucket -> jobs), so a student costs only the postings
+    of its own few buckets rather than a pass over every job's vector.
+    """
+
+    def __init__(self, jobs):
+        rows = list(jobs.values_list('job_id', 'vector', 'job__location_key', 'job__type_key'))
+        self.ids, indptr, indices, values = stack((pk, blob) for pk, blob, _, _ in rows)
+        order = np.argsort(indices, kind='stable')
+        self.buckets = indices[order]
+        self.rows = np.repeat(np.arange(len(self.ids)), np.diff(indptr))[order]
+        self.weights = values[order].astype(np.float32)
+        self.locations = [location for _, _, location, _ in rows]
+        self.types = np.array([job_type for _, _, _, job_type in rows], dtype=object)
+        self.positions = {pk: position for position, pk in enumerate(self.ids.tolist())}
+        self._location_masks = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def text_scores(self, indices, values):
+        start = np.searchsorted(self.buckets, indices, 'left')
+        lengths = np.searchsorted(self.buckets, indices, 'right') - start
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(len(self), np.float32)
+        # Concatenated postings of every bucket the student has
+        postings = np.repeat(start - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+        weights = self.weights[postings] * np.repeat(values.astype(np.float32), lengths)
+        return np.bincount(self.rows[postings], weights, minlength=len(self)).astype(np.float32)
+
+    def location_mask(self, place):
+        if place not in self._location_masks:
+            self._location_masks[place] = np.fromiter(
+                (place in location for location in self.locations), bool, len(self)
+            )
+        return self._location_masks[place]
+
+    def scores(self, student):
+        """Fit of every job for one student dict (see :func:`load_students`); applied jobs are -inf."""
+        scores = self.text_scores(*student['vector'])
+        for place, boost in ((student['city'], CITY_BOOST), (student['province'], PROVINCE_BOOST)):
+            if place:
+                scores += boost * self.location_mask(place)
+        applied_types = student['applied_types']
+        if applied_types:
+            total = sum(applied_types.values())
+            for job_type, count in applied_types.items():
+                scores += (TYPE_WEIGHT * count / total) * (self.types == job_type)
+        for pk in student['applied']:
+            if pk in self.positions:
+                scores[self.positions[pk]] = -np.inf
+        return scores
+
+    def best(self, student, k=FEED_SIZE):
+        """The ``k`` best ``(job_pk, score)`` with a positive score, best first."""
+        scores = self.scores(student)
+        candidates = np.argpartition(-scores, k)[:k] if k < len(scores) else np.arange(len(scores))
+        candidates = candidates[scores[candidates] > 0]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return list(zip(self.ids[order].tolist(), scores[order].astype(float).tolist()))
+
+
+def active_candidates(posted_since=None):
+    jobs = JobVector.objects.filter(job__is_active=True)
+    if posted_since is not None:
+        jobs = jobs.filter(job__posted_on__gte=posted_since)
+    return JobCandidates(jobs)
+
+
+def load_students(pks):
+    """What scoring needs about each student in ``pks``, in three queries."""
+    students = {
+        pk: {
+            'city': canonical_value(city), 'province': canonical_value(province),
+            'vector': (np.empty(0, np.uint32), np.empty(0, np.float32)),
+            'applied': set(), 'applied_types': Counter(),
+        }
+        for pk, city, province in Student.objects.filter(pk__in=pks).values_list('pk', 'city', 'province')
+    }
+    vectors = Student.objects.filter(pk__in=pks, match_vector__isnull=False).values_list('pk', 'match_vector__vector')
+    for pk, blob in vectors:
+        students[pk]['vector'] = unpack(blob)
+    applications = Application.objects.filter(applicant__in=pks).values_list('applicant', 'job', 'job__type_key')
+    for pk, job_pk, job_type in applications:
+        students[pk]['applied'].add(job_pk)
+        students[pk]['applied_types'][job_type] += 1
+    return students
+
+
+def student_chunks():
+    pks = list(Student.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), STUDENT_CHUNK):
+        yield pks[start:start + STUDENT_CHUNK]
+
+
+def build_feeds():
+    """Recompute the whole feed of every student; returns the FeedBuild recorded."""
+    started_at = timezone.now()
+    candidates = active_candidates()
+    students = entries = 0
+    for chunk in student_chunks():
+        rows = [
+            RecommendedJob(student_id=pk, job_id=job_pk, score=score)
+            for pk, student in load_students(chunk).items()
+            for job_pk, score in candidates.best(student)
+        ]
+        with transaction.atomic():
+            RecommendedJob.objects.filter(student__in=chunk).delete()
+            RecommendedJob.objects.bulk_create(rows, batch_size=5000)
+            bump_namespace(*(feed_namespace(pk) for pk in chunk))
+        students += len(chunk)
+        entries += len(rows)
+    return FeedBuild.objects.create(full=True, started_at=started_at, students=students, entries=entries)
+
+
+def refresh_feeds():
+    """
+    Merge the jobs posted since the last build into every feed where they rank
+    among the best ``FEED_SIZE``, and build the whole feed of students who have
+    none yet; returns a FeedBuild (a full build if none ran yet).
+    """
+    if not FeedBuild.objects.filter(full=True).exists():
+        return build_feeds()
+    started_at = timezone.now()
+    candidates = active_candidates(posted_since=FeedBuild.objects.latest().started_at)
+    every_job = None  # loaded on first need
+    students = entries = 0
+    for chunk in student_chunks():
+        floors = {
+            row['student']: row['lowest'] if row['size'] >= FEED_SIZE else 0.0
+            for row in RecommendedJob.objects.filter(student__in=chunk)
+            .values('student').annotate(lowest=Min('score'), size=Count('pk'))
+        }
+        if not len(candidates) and len(floors) == len(chunk):
+            continue
+        rows = []
+        for pk, student in load_students(chunk).items():
+            if pk in floors:
+                rows += [
+                    RecommendedJob(student_id=pk, job_id=job_pk, score=score)
+                    for job_pk, score in candidates.best(student) if score > floors[pk]
+                ]
+            else:
+                # No feed yet (e.g. a new student): new jobs alone would make a thin one
+                if every_job is None:
+                    every_job = active_candidates()
+                rows += [
+                    RecommendedJob(student_id=pk, job_id=job_pk, score=score)
+                    for job_pk, score in every_job.best(student)
+                ]
+        if not rows:
+            continue
+        with transaction.atomic():
+            RecommendedJob.objects.bulk_create(
+                rows, batch_size=5000,
+                update_conflicts=True, unique_fields=['student', 'job'], update_fields=['score'],
+            )
+            touched = {row.student_id for row in rows}
+            trim_feeds(touched)
+            bump_namespace(*(feed_namespace(pk) for pk in touched))
+        students += len(touched)
+        entries += len(rows)
+    return FeedBuild.objects.create(full=False, started_at=started_at, students=students, entries=entries)
+
+
+def trim_feeds(student_pks):
+    """Delete the entries that no longer rank among each student's best ``FEED_SIZE``."""
+    ranked = RecommendedJob.objects.filter(student__in=student_pks).annotate(
+        rank=Window(RowNumber(), partition_by=F('student'), order_by=(F('score').desc(), F('job').desc())),
+    )
+    overflow = list(ranked.filter(rank__gt=FEED_SIZE).values_list('pk', flat=True))
+    if overflow:
+        RecommendedJob.objects.filter(pk__in=overflow).delete()
+
+
+def feed_queryset(student, user):
+    """The student's feed, best first: one query on recommendedjob_feed_idx, applied jobs excluded."""
+    return (
+        Job.objects.for_listing(user)
+        .filter(recommendations__student=student, is_active=True, user_has_applied=False)
+        .annotate(feed_score=F('recommendations__score'))
+        .order_by('-feed_score', '-recommendations__job')  # the index order
+    )
+
+
+def get_feed(student, user, limit):
+    """The first ``limit`` feed entries, cached until the feed, a job or an application changes."""
+    return get_or_set(
+        feed_namespace(student.pk), (namespace_version(JOB_LIST_NAMESPACE), limit),
+        lambda: list(feed_queryset(student, user)[:limit]),
+    )
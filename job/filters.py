@@ -0,0 +1,37 @@
+"""
+Faceted filters for the job list.
+
+``location``, ``type`` and ``experience`` are matched exactly against a
+canonical form stored next to each column (``type_key`` etc.), which a plain
+B-tree index can serve. ``?fuzzy=true`` switches back to substring matching on
+the raw columns. On PostgreSQL that compiles to ``UPPER(col::text) LIKE``,
+which pg_trgm GIN indexes on the same ``UPPER`` expression serve.
+"""
+import re
+
+# query parameter -> Job column
+FACET_FIELDS = {
+    'location': 'location',
+    'type': 'type',
+    'experience': 'experience',
+}
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def canonical_value(value):
+    """'Full-Time ', 'full time' and 'FULL_TIME' all become 'full time'."""
+    return _SEPARATORS.sub(' ', value or '').strip().lower()
+
+
+def filter_jobs(queryset, params):
+    fuzzy = str(params.get('fuzzy', '')).lower() in ('1', 'true', 'yes')
+    for param, field in FACET_FIELDS.items():
+        value = params.get(param)
+        if not value:
+            continue
+        if fuzzy:
+            queryset = queryset.filter(**{f'{field}__icontains': value})
+        else:
+            queryset = queryset.filter(**{f'{field}_key': canonical_value(value)})
+    return queryset
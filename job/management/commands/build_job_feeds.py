@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from job.feeds import build_feeds, refresh_feeds
+from job.models import FeedBuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild every student's recommended-jobs feed, or merge in only the jobs posted since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--incremental", action="store_true", help="Only score jobs posted since the last run.")
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running, refreshing incrementally every INTERVAL seconds (default: run once and exit).",
+        )
+        parser.add_argument(
+            "--full-every", type=float, default=24 * 3600,
+            help="With --interval, rebuild everything once the last full build is this many seconds old.",
+        )
+
+    def handle(self, *args, **options):
+        incremental = options["incremental"] or options["interval"]
+        while True:
+            last_full = FeedBuild.objects.filter(full=True).order_by("-started_at").first()
+            stale = last_full is None or (timezone.now() - last_full.started_at).total_seconds() > options["full_every"]
+            run = refresh_feeds if incremental and not stale else build_feeds
+            started = time.monotonic()
+            build = run()
+            self.stdout.write(
+                f"{'Full' if build.full else 'Incremental'} build: {build.entries} entries for "
+                f"{build.students} students in {time.monotonic() - started:.1f}s."
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,93 @@
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from backend.storage import BLOB_DIR, blob_name, content_hash, document_storage, is_blob
+
+
+class Command(BaseCommand):
+    help = (
+        "Move CVs and application documents stored before content addressing into "
+        "deduplicated blobs, repoint every row, and report the space reclaimed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without touching files or rows.")
+        parser.add_argument(
+            "--delete-orphans", action="store_true",
+            help="Also delete files in the document folders that no row references.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        storage = document_storage()
+        fields = storage.referencing_fields()
+
+        legacy = set()
+        referenced = set()
+        for model, field in fields:
+            names = model._default_manager.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+            for name in names.values_list(field, flat=True).distinct():
+                (referenced if is_blob(name) else legacy).add(name)
+
+        moved = duplicates = missing = reclaimed = 0
+        for name in sorted(legacy):
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Missing file for {name}")
+                continue
+            size = storage.size(name)
+            with storage.open(name) as source:
+                target = blob_name(content_hash(File(source)), name)
+                duplicate = target in referenced or storage.exists(target)
+                if not dry_run and not duplicate:
+                    storage._save(target, File(source))
+            referenced.add(target)
+            if duplicate:
+                duplicates += 1
+                reclaimed += size
+            else:
+                moved += 1
+            if dry_run:
+                continue
+            with transaction.atomic():
+                for model, field in fields:
+                    model._default_manager.filter(**{field: name}).update(**{field: target})
+            storage.delete(name)  # no row references it any more
+
+        orphans, orphan_bytes = self.find_orphans(storage, fields, referenced | legacy)
+        if options["delete_orphans"] and not dry_run:
+            for name in orphans:
+                FileSystemStorage.delete(storage, name)
+
+        prefix = "Would reclaim" if dry_run else "Reclaimed"
+        self.stdout.write(
+            f"{len(legacy)} referenced legacy files: {moved} moved into blobs, {duplicates} duplicates"
+            f"{', ' + str(missing) + ' missing' if missing else ''}. {prefix} {reclaimed} bytes."
+        )
+        if orphans:
+            removed = options["delete_orphans"] and not dry_run
+            self.stdout.write(
+                f"{len(orphans)} unreferenced files ({orphan_bytes} bytes)"
+                f"{' deleted' if removed else '; rerun with --delete-orphans to remove them'}."
+            )
+
+    def find_orphans(self, storage, fields, referenced):
+        folders = {BLOB_DIR}
+        for model, field in fields:
+            upload_to = model._meta.get_field(field).upload_to
+            if isinstance(upload_to, str) and upload_to:
+                folders.add(upload_to.strip("/").split("/")[0])
+        orphans, total = [], 0
+        for folder in sorted(folders):
+            for root, _dirs, files in os.walk(storage.path(folder)):
+                for filename in files:
+                    name = os.path.relpath(os.path.join(root, filename), storage.location).replace(os.sep, "/")
+                    # Recent blobs may belong to rows not committed yet
+                    if name not in referenced and not (is_blob(name) and storage.saved_recently(name)):
+                        orphans.append(name)
+                        total += os.path.getsize(os.path.join(root, filename))
+        return orphans, total
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from job.counters import rebuild_job_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-category active job counters from the Job table."
+
+    def handle(self, *args, **options):
+        drift = rebuild_job_counts()
+        for job_type, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{job_type or '(blank)'}: {stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f"Job counters rebuilt ({len(drift)} corrected)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from job.matching import save_job_vectors, save_student_vectors
+from job.models import Job
+from users.models import Student
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored matching vector of every job and student (run once after deploying matching)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for label, queryset, save in (
+            ("jobs", Job.objects.order_by("pk"), save_job_vectors),
+            ("students", Student.objects.order_by("pk"), save_student_vectors),
+        ):
+            total = 0
+            batch = []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) == batch_size:
+                    save(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                save(batch)
+                total += len(batch)
+            self.stdout.write(f"{total} {label} vectorised.")
@@ -0,0 +1,302 @@
+"""
+Candidate–job matching.
+
+Jobs and student profiles (including the text extracted from the CV) are
+turned into hashed bag-of-words vectors: every
+token and adjacent token pair of each field is hashed (CRC32) into
+``DIMENSIONS`` buckets, weighted by field and by ``1 + log(count)``, cut to the
+``MAX_FEATURES`` heaviest buckets and L2-normalised. The match score of a
+job and a student is the dot product of their vectors (cosine similarity,
+0..1). Nothing is fitted, so a vector depends only on its own text. A single
+save can then update one row without touching the rest of the corpus.
+
+Vectors live in ``JobVector`` / ``StudentVector`` as packed NumPy arrays
+(``uint32`` bucket indices followed by ``float16`` weights, ~600 bytes each)
+and are rewritten by job.signals whenever the underlying text changes;
+``manage.py rebuild_match_vectors`` recomputes them all.
+
+Scoring every student against a job uses :class:`VectorMatrix`, a per-process
+CSR matrix of all student vectors. It is built once, then kept current by
+reading only the rows whose ``updated_at`` moved, and rebuilt every
+``MATCH_MATRIX_REBUILD_SECONDS``. Scoring is a gather, a multiply and
+``np.add.reduceat`` over the non-zeros, followed by ``np.argpartition``
+for the top k: about 100 ms for 100k students on one core
+(``python -m benchmarks.matching``).
+"""
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max
+
+from users.documents import document_texts
+from .models import Job, JobVector, StudentVector
+
+DIMENSIONS = 1 << 18
+MAX_FEATURES = 96
+
+# Field -> weight; a word in the title says more than one in the description
+JOB_FIELDS = {
+    'title': 3.0,
+    'detailed_experience': 2.0,
+    'education': 1.5,
+    'description': 1.0,
+}
+STUDENT_FIELDS = {
+    'degree': 3.0,
+    'bio': 1.0,
+    'year_of_study': 0.5,
+}
+# Extracted CV text (users.documents); only the start is read, the rest adds little
+CV_WEIGHT = 1.0
+CV_TEXT_CHARS = 20_000
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*')
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have in is it its of on or our '
+    'the their this to was we were will with you your'.split()
+)
+
+# Rows changed this close to the last refresh are read again, so a transaction
+# that committed late (its updated_at is older than its commit) is not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+# ------------------------------
+# VECTORS
+# ------------------------------
+def tokens(text):
+    words = [word for word in TOKEN_RE.findall((text or '').lower()) if word not in STOP_WORDS]
+    return words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+
+
+def bucket(token):
+    return zlib.crc32(token.encode()) & (DIMENSIONS - 1)
+
+
+def vectorize(weighted_texts):
+    """``[(text, weight), ...]`` -> ``(indices, values)``, sorted by index and L2-normalised."""
+    features = Counter()
+    for text, weight in weighted_texts:
+        for token, count in Counter(tokens(text)).items():
+            features[bucket(token)] += weight * (1 + math.log(count))
+    if not features:
+        return np.empty(0, np.uint32), np.empty(0, np.float32)
+    top = sorted(features.items(), key=lambda item: -item[1])[:MAX_FEATURES]
+    top.sort()
+    indices = np.fromiter((index for index, _ in top), np.uint32, len(top))
+    values = np.fromiter((value for _, value in top), np.float32, len(top))
+    return indices, values / np.linalg.norm(values)
+
+
+def pack(indices, values):
+    return indices.astype('<u4').tobytes() + values.astype('<f2').tobytes()
+
+
+def unpack(blob):
+    blob = bytes(blob)
+    size = len(blob) // 6
+    return np.frombuffer(blob, '<u4', size), np.frombuffer(blob, '<f2', size, offset=size * 4)
+
+
+def job_vector(job):
+    return vectorize((getattr(job, field), weight) for field, weight in JOB_FIELDS.items())
+
+
+def student_vector(student, cv_text=None):
+    """``cv_text`` defaults to the extracted text of ``student.cv``, if any."""
+    if cv_text is None:
+        cv_text = document_texts([student.cv.name]).get(student.cv.name, '') if student.cv else ''
+    weighted = [(getattr(student, field), weight) for field, weight in STUDENT_FIELDS.items()]
+    return vectorize(weighted + [(cv_text[:CV_TEXT_CHARS], CV_WEIGHT)])
+
+
+def save_job_vectors(jobs):
+    """Write (insert or overwrite) the stored vector of every job in ``jobs``."""
+    JobVector.objects.bulk_create(
+        [JobVector(job=job, vector=pack(*job_vector(job))) for job in jobs],
+        update_conflicts=True, unique_fields=['job'], update_fields=['vector', 'updated_at'],
+    )
+
+
+def save_student_vectors(students):
+    """Write (insert or overwrite) the stored vector of every student in ``students``."""
+    students = list(students)
+    cv_texts = document_texts([student.cv.name for student in students if student.cv])
+    StudentVector.objects.bulk_create(
+        [
+            StudentVector(student=student, vector=pack(*student_vector(student, cv_texts.get(student.cv.name, ''))))
+            for student in students
+        ],
+        update_conflicts=True, unique_fields=['student'], update_fields=['vector', 'updated_at'],
+    )
+
+
+def dense(indices, values):
+    query = np.zeros(DIMENSIONS, np.float32)
+    query[indices] = values
+    return query
+
+
+# ------------------------------
+# SCORING
+# ------------------------------
+def stack(rows):
+    """``[(pk, blob), ...]`` -> CSR arrays ``(ids, indptr, indices, values)``."""
+    ids, parts_indices, parts_values, lengths = [], [], [], []
+    for pk, blob in rows:
+        indices, values = unpack(blob)
+        ids.append(pk)
+        parts_indices.append(indices)
+        parts_values.append(values)
+        lengths.append(len(indices))
+    indptr = np.zeros(len(ids) + 1, np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    return (
+        np.array(ids, np.int64),
+        indptr,
+        np.concatenate(parts_indices) if ids else np.empty(0, np.uint32),
+        np.concatenate(parts_values) if ids else np.empty(0, np.float16),
+    )
+
+
+def score(query, indptr, indices, values):
+    """Dot product of the dense ``query`` with every CSR row."""
+    if len(indptr) < 2:
+        return np.empty(0, np.float32)
+    products = np.append(query[indices] * values, np.float32(0))
+    starts = indptr[:-1]
+    totals = np.add.reduceat(products, starts)
+    totals[starts == indptr[1:]] = 0  # reduceat yields products[start] for empty rows
+    return totals
+
+
+def top_k(ids, scores, k):
+    """The ``k`` best ``(pk, score)`` pairs with a positive score, best first."""
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    candidates = candidates[scores[candidates] > 0]
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return list(zip(ids[order].tolist(), scores[order].astype(float).tolist()))
+
+
+class VectorMatrix:
+    """Every row of a vector model as one in-memory CSR matrix, refreshed incrementally."""
+
+    def __init__(self, model):
+        self.model = model
+        self.pk_name = model._meta.pk.attname
+        self.lock = threading.Lock()
+        self.built_at = None
+
+    def clear(self):
+        """Drop the matrix; the next query rebuilds it."""
+        self.built_at = None
+
+    def build(self):
+        queryset = self.model.objects.order_by()
+        self.watermark = queryset.aggregate(latest=Max('updated_at'))['latest']
+        rows = queryset.values_list(self.pk_name, 'vector').iterator(chunk_size=5000)
+        self.ids, self.indptr, self.indices, self.values = stack(rows)
+        self.overlay = {}
+        self.built_at = time.monotonic()
+
+    def refresh(self):
+        rebuild_after = getattr(settings, 'MATCH_MATRIX_REBUILD_SECONDS', 900)
+        if (
+            self.built_at is None
+            or time.monotonic() - self.built_at > rebuild_after
+            or len(self.overlay) > 1000 + len(self.ids) // 20
+        ):
+            self.build()
+            return
+        if self.watermark is None:
+            changed = self.model.objects.all()
+        else:
+            changed = self.model.objects.filter(updated_at__gte=self.watermark - REFRESH_OVERLAP)
+        for pk, blob, updated_at in changed.values_list(self.pk_name, 'vector', 'updated_at'):
+            self.overlay[pk] = blob
+            self.watermark = max(self.watermark or updated_at, updated_at)
+
+    def scores(self, query):
+        """``(ids, scores)`` of every row against the dense ``query`` vector."""
+        with self.lock:
+            self.refresh()
+            ids, indptr, indices, values = self.ids, self.indptr, self.indices, self.values
+            overlay = list(self.overlay.items())
+        scores = score(query, indptr, indices, values)
+        if overlay:
+            # Rows rewritten since the build are scored from their new vector instead
+            scores[np.isin(ids, [pk for pk, _ in overlay])] = 0
+            extra_ids, extra_indptr, extra_indices, extra_values = stack(overlay)
+            ids = np.concatenate([ids, extra_ids])
+            scores = np.concatenate([scores, score(query, extra_indptr, extra_indices, extra_values)])
+        return ids, scores
+
+
+student_matrix = VectorMatrix(StudentVector)
+job_matrix = VectorMatrix(JobVector)
+
+
+# ------------------------------
+# RANKING
+# ------------------------------
+def stored_vector(model, pk):
+    blob = model.objects.filter(pk=pk).values_list('vector', flat=True).first()
+    return unpack(blob) if blob is not None else None
+
+
+def rank_applicants(job, limit=None):
+    """``(application, score)`` for every application to ``job``, best match first."""
+    vector = stored_vector(JobVector, job.pk)
+    applications = list(
+        job.applications.select_related('applicant__user', 'applicant__match_vector').order_by('-applied_date', '-id')
+    )
+    rows = [
+        (position, app.applicant.match_vector.vector)
+        for position, app in enumerate(applications)
+        if hasattr(app.applicant, 'match_vector')
+    ]
+    scores = np.zeros(len(applications), np.float32)
+    if vector is not None and rows:
+        positions, indptr, indices, values = stack(rows)
+        scores[positions] = score(dense(*vector), indptr, indices, values)
+    order = np.argsort(-scores, kind='stable')[:limit]
+    return [(applications[i], float(scores[i])) for i in order]
+
+
+def match_students(job, limit):
+    """The ``limit`` best ``(student_pk, score)`` pairs among the students who have not applied to ``job``."""
+    vector = stored_vector(JobVector, job.pk)
+    if vector is None:
+        return []
+    ids, scores = student_matrix.scores(dense(*vector))
+    applicants = list(job.applications.values_list('applicant', flat=True))
+    if applicants:
+        scores[np.isin(ids, applicants)] = 0  # top_k keeps positive scores only
+    return top_k(ids, scores, limit)
+
+
+def match_jobs(student, limit):
+    """The ``limit`` best ``(job_pk, score)`` pairs among active jobs for ``student``."""
+    vector = stored_vector(StudentVector, student.pk)
+    if vector is None:
+        return []
+    ids, scores = job_matrix.scores(dense(*vector))
+    # Deactivated and deleted jobs are dropped afterwards; ask for more until enough survive
+    wanted = limit
+    while True:
+        ranked = top_k(ids, scores, wanted)
+        active = set(Job.objects.filter(pk__in=[pk for pk, _ in ranked], is_active=True).values_list('pk', flat=True))
+        matches = [(pk, value) for pk, value in ranked if pk in active][:limit]
+        if len(matches) == limit or len(ranked) < wanted:
+            return matches
+        wanted *= 4
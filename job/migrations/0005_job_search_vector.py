@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:32
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def build_search_index(apps, schema_editor):
+    # GIN indexes and tsvector are PostgreSQL-only; other backends use the LIKE fallback
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS job_job_search_vector_gin ON job_job USING gin (search_vector)'
+    )
+    Job = apps.get_model('job', 'Job')
+    Job.objects.update(search_vector=(
+        SearchVector('title', weight='A', config='english')
+        + SearchVector('detailed_experience', weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+    ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS job_job_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0004_job_vacancies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
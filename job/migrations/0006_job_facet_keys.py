@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:33
+
+import re
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+FACETS = ('type', 'experience', 'location')
+
+
+def backfill_facet_keys(apps, schema_editor):
+    separators = re.compile(r'[\W_]+')
+    Job = apps.get_model('job', 'Job')
+    batch = []
+    for job in Job.objects.only('pk', *FACETS).iterator(chunk_size=2000):
+        for field in FACETS:
+            setattr(job, f'{field}_key', separators.sub(' ', getattr(job, field) or '').strip().lower())
+        batch.append(job)
+        if len(batch) >= 2000:
+            Job.objects.bulk_update(batch, [f'{field}_key' for field in FACETS])
+            batch = []
+    if batch:
+        Job.objects.bulk_update(batch, [f'{field}_key' for field in FACETS])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Serves ?fuzzy=true (icontains) lookups; PostgreSQL only
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in FACETS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS job_job_{field}_trgm ON job_job USING gin ("{field}" gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in FACETS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS job_job_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0005_job_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='experience_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200, verbose_name='experience'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='location_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100, verbose_name='location'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='type_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200, verbose_name='type'),
+        ),
+        migrations.RunPython(backfill_facet_keys, migrations.RunPython.noop),
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_job_counts(apps, schema_editor):
+    Job = apps.get_model('job', 'Job')
+    JobTypeCount = apps.get_model('job', 'JobTypeCount')
+    rows = Job.objects.filter(is_active=True).order_by().values('type').annotate(total=Count('pk'))
+    JobTypeCount.objects.bulk_create(JobTypeCount(type=row['type'], count=row['total']) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobTypeCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=200, unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_job_counts, migrations.RunPython.noop),
+    ]
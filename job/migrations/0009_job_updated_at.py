@@ -0,0 +1,23 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_posted_on(apps, schema_editor):
+    Job = apps.get_model('job', 'Job')
+    Job.objects.update(updated_at=F('posted_on'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0008_jobtypecount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_posted_on, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:10
+
+import backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0009_job_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='additional_documents',
+            field=models.FileField(blank=True, null=True, storage=backend.storage.document_storage, upload_to='documents/'),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cover_letter',
+            field=models.FileField(blank=True, null=True, storage=backend.storage.document_storage, upload_to='cover_letters/'),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(storage=backend.storage.document_storage, upload_to='resumes/'),
+        ),
+    ]
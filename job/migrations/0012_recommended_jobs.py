@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0011_match_vectors'),
+        ('users', '0009_documenttext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full', models.BooleanField()),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+                ('students', models.PositiveIntegerField(default=0)),
+                ('entries', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'get_latest_by': 'started_at',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='job.job')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_jobs', to='users.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', '-score', '-job'], name='recommendedjob_feed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'job'), name='recommendedjob_student_job_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+FACETS = ('type', 'experience', 'location')
+
+
+def index_upper_columns(apps, schema_editor):
+    # icontains compiles to UPPER("col"::text) LIKE UPPER(%s) on PostgreSQL;
+    # only an index on that same expression can serve it
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in FACETS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS job_job_{field}_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS job_job_{field}_upper_trgm '
+            f'ON job_job USING gin ((UPPER("{field}"::text)) gin_trgm_ops)'
+        )
+
+
+def index_raw_columns(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in FACETS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS job_job_{field}_upper_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS job_job_{field}_trgm ON job_job USING gin ("{field}" gin_trgm_ops)'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0012_recommended_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_upper_columns, index_raw_columns),
+    ]
@@ -1,12 +1,49 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+from backend.storage import document_storage
 from users.models import Employer, Student
+from .filters import FACET_FIELDS, canonical_value
+
+
+def requesting_student(user):
+    """The student profile behind ``user``, without a query for non-students."""
+    if getattr(user, 'role', None) == 'student':
+        return getattr(user, 'student_profile', None)
+    return None
+
+
+class JobQuerySet(models.QuerySet):
+    def for_listing(self, user=None):
+        """
+        Everything JobSerializer renders, fetched in one query: the employer and
+        its user are joined, the application count is a correlated subquery and
+        the "already applied" flag is an EXISTS subquery for the requesting student.
+        """
+        applications = (
+            Application.objects.filter(job=OuterRef('pk'))
+            .order_by()
+            .values('job')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        queryset = self.select_related('employer__user').annotate(
+            applications_count=Coalesce(Subquery(applications), 0),
+        )
+        student = requesting_student(user)
+        if student is not None:
+            applied = Application.objects.filter(job=OuterRef('pk'), applicant=student)
+            return queryset.annotate(user_has_applied=Exists(applied))
+        return queryset.annotate(user_has_applied=Value(False))
 
 
 class Job(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     posted_on = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     type = models.CharField(max_length=200, default="")  # full time, part time
     experience = models.CharField(max_length=200, default="")
     detailed_experience = models.TextField(default="")
@@ -20,11 +57,63 @@ class Job(models.Model):
     salary_range = models.CharField(max_length=50, blank=True)
     is_active = models.BooleanField(default=True)
     vacancies = models.PositiveIntegerField(default=1)
-    
+    # Weighted title/skills/description document, maintained by job.signals (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Canonical copies of the facet columns for exact, indexed filtering (see job.filters)
+    type_key = models.CharField("type", max_length=200, default="", editable=False, db_index=True)
+    experience_key = models.CharField("experience", max_length=200, default="", editable=False, db_index=True)
+    location_key = models.CharField("location", max_length=100, default="", editable=False, db_index=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination: newest active jobs, and an employer's own postings
+            models.Index(fields=["is_active", "-posted_on", "-id"], name="job_active_posted_idx"),
+            models.Index(fields=["employer", "-posted_on", "-id"], name="job_employer_posted_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def refresh_facet_keys(self):
+        for field in FACET_FIELDS.values():
+            setattr(self, f"{field}_key", canonical_value(getattr(self, field)))
+
+    def save(self, *args, **kwargs):
+        self.refresh_facet_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            keys = {f"{field}_key" for field in FACET_FIELDS.values() if field in update_fields}
+            kwargs["update_fields"] = set(update_fields) | keys
+        super().save(*args, **kwargs)
+
+
+class JobTypeCount(models.Model):
+    """Active jobs per ``Job.type``, maintained by job.signals and served by job_counts."""
+    type = models.CharField(max_length=200, unique=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.type}: {self.count}"
+
+
+class ApplicationQuerySet(models.QuerySet):
+    def for_listing(self, user=None):
+        """
+        Everything ApplicationSerializer renders in two queries: the applicant
+        and its user are joined, and the jobs come from one prefetch of
+        ``Job.objects.for_listing(user)``.
+        """
+        return self.select_related('applicant__user').prefetch_related(
+            Prefetch('job', queryset=Job.objects.for_listing(user))
+        )
+
+
+# Application files whose text is extracted and searchable (users.documents)
+APPLICATION_DOCUMENT_FIELDS = ("resume", "cover_letter", "additional_documents")
+
 
 class Application(models.Model):
     STATUS_CHOICES = [
@@ -41,15 +130,65 @@ class Application(models.Model):
         on_delete=models.CASCADE,
         related_name="applications"
     )
-    cover_letter = models.FileField(upload_to="cover_letters/", blank=True, null=True)
-    resume = models.FileField(upload_to="resumes/")
-    additional_documents = models.FileField(upload_to="documents/", blank=True, null=True)
+    # Stored once per distinct content (backend.storage); the CV blob is shared, not copied
+    cover_letter = models.FileField(upload_to="cover_letters/", storage=document_storage, blank=True, null=True)
+    resume = models.FileField(upload_to="resumes/", storage=document_storage)
+    additional_documents = models.FileField(upload_to="documents/", storage=document_storage, blank=True, null=True)
     applied_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     notes = models.TextField(blank=True)
 
+    objects = ApplicationQuerySet.as_manager()
+
     class Meta:
         unique_together = ('job', 'applicant')  # Prevent duplicate applications
+        indexes = [
+            # Keyset pagination of a student's and a job's applications
+            models.Index(fields=["applicant", "-applied_date", "-id"], name="application_applicant_idx"),
+            models.Index(fields=["job", "-applied_date", "-id"], name="application_job_idx"),
+        ]
 
     def __str__(self):
         return f"{self.applicant.student_id} - {self.job.title}"
+
+
+class JobVector(models.Model):
+    """Hashed term vector of a job for candidate matching, maintained by job.signals (see job.matching)."""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name="match_vector")
+    vector = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class StudentVector(models.Model):
+    """Hashed term vector of a student profile (degree, bio, year, CV) for candidate matching."""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name="match_vector")
+    vector = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class RecommendedJob(models.Model):
+    """One entry of a student's precomputed "recommended for you" feed (see job.feeds)."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="recommended_jobs")
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="recommendations")
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "job"], name="recommendedjob_student_job_unique"),
+        ]
+        indexes = [
+            # The feed read: one student's entries, best first
+            models.Index(fields=["student", "-score", "-job"], name="recommendedjob_feed_idx"),
+        ]
+
+
+class FeedBuild(models.Model):
+    """A run of ``manage.py build_job_feeds``; the last start time is the next incremental watermark."""
+    full = models.BooleanField()
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+    students = models.PositiveIntegerField(default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        get_latest_by = "started_at"
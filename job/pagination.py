@@ -0,0 +1,16 @@
+from backend.pagination import KeysetPagination
+
+
+class JobPagination(KeysetPagination):
+    """Newest jobs first; ``?ordering=relevance`` pages through search results by rank."""
+    ordering = ('-posted_on', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('ordering') == 'relevance' and 'search_rank' in queryset.query.annotations:
+            return ('-search_rank', '-posted_on', '-id')
+        return super().get_ordering(request, queryset, view)
+
+
+class ApplicationPagination(KeysetPagination):
+    """Most recent applications first."""
+    ordering = ('-applied_date', '-id')
@@ -0,0 +1,72 @@
+"""
+Full-text search over job postings.
+
+On PostgreSQL every job carries a precomputed, weighted ``search_vector``
+(title > skills > description) backed by a GIN index, and queries are parsed
+with ``websearch_to_tsquery`` so the frontend search box can pass quoted
+phrases, ``or`` and ``-exclusions`` straight through. Other databases (the
+SQLite setup selected with ``DJANGO_DB_ENGINE=sqlite``) fall back to the old
+``icontains`` scan.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+
+from .filters import filter_jobs
+from .models import Job
+
+SEARCH_CONFIG = 'english'
+
+JOB_SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('detailed_experience', weight='B', config=SEARCH_CONFIG)
+    + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+)
+
+
+def full_text_search_enabled(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def search_jobs(queryset, text):
+    """Filter ``queryset`` to jobs matching ``text``, annotating ``search_rank`` when available."""
+    if full_text_search_enabled(queryset.db):
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            # ts_rank is a real; as double precision it survives the round trip
+            # through a pagination cursor exactly, so seeking past a rank is exact
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+    return queryset.filter(
+        Q(title__icontains=text) |
+        Q(description__icontains=text) |
+        Q(detailed_experience__icontains=text)
+    )
+
+
+def order_by_relevance(queryset):
+    """Best matches first; newest first when there is no rank to sort on."""
+    if 'search_rank' in queryset.query.annotations:
+        return queryset.order_by('-search_rank', '-posted_on')
+    return queryset.order_by('-posted_on')
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored search vector for every job in ``queryset``."""
+    if full_text_search_enabled(queryset.db):
+        queryset.update(search_vector=JOB_SEARCH_VECTOR)
+
+
+def browse_jobs(user, params):
+    """The active-job listing behind the job list endpoints (sync and async)."""
+    queryset = Job.objects.for_listing(user).filter(is_active=True)
+    search = params.get('search')
+
+    if search:
+        queryset = search_jobs(queryset, search)
+    queryset = filter_jobs(queryset, params)
+
+    if params.get('ordering') == 'relevance':
+        return order_by_relevance(queryset)
+    return queryset.order_by('-posted_on')
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Job, Application
+from .models import APPLICATION_DOCUMENT_FIELDS, Job, Application
+from users.documents import schedule_extraction
+from users.models import Student
 from users.serializers import StudentSerializer, EmployerSerializer
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,6 +16,9 @@ class JobSerializer(serializers.ModelSerializer):
     user_has_applied = serializers.SerializerMethodField() 
     
     def get_user_has_applied(self, obj):
+        # Annotated by Job.objects.for_listing(); fall back to a query otherwise
+        if hasattr(obj, 'user_has_applied'):
+            return obj.user_has_applied
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             student = getattr(request.user, 'student_profile', None)
@@ -31,6 +36,8 @@ class JobSerializer(serializers.ModelSerializer):
         read_only_fields = ['posted_on']
     
     def get_applications_count(self, obj):
+        if hasattr(obj, 'applications_count'):
+            return obj.applications_count
         return obj.applications.count()
 
 
@@ -74,6 +81,7 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
             resume=student_profile.cv,  # automatically use student's CV
             additional_documents=validated_data.get('additional_documents')
         )
+        schedule_extraction(*(getattr(application, field).name for field in APPLICATION_DOCUMENT_FIELDS))
         return application
 
 
@@ -88,6 +96,59 @@ class ApplicationStatusUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Status must be one of: {valid_statuses}")
         return value
 
+class ApplicationFilterSerializer(serializers.Serializer):
+    job = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Application.STATUS_CHOICES, required=False)
+
+
+class ApplicationBulkStatusUpdateSerializer(serializers.Serializer):
+    """Target applications by ``ids`` or by a ``filter`` (job, optionally current status)."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=5000
+    )
+    filter = ApplicationFilterSerializer(required=False)
+    status = serializers.ChoiceField(choices=Application.STATUS_CHOICES)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide either 'ids' or 'filter'.")
+        return data
+
+
+class MatchLimitSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=200, default=20)
+
+
+class RankedApplicationSerializer(serializers.ModelSerializer):
+    """An application to the employer's own job with its match score (set by the view)."""
+    applicant = StudentSerializer(read_only=True)
+    score = serializers.FloatField(source='match_score', read_only=True)
+
+    class Meta:
+        model = Application
+        fields = ['id', 'applicant', 'cover_letter', 'resume', 'applied_date', 'status', 'score']
+
+
+class MatchedStudentSerializer(serializers.ModelSerializer):
+    """Public profile of a student who has not applied; no contact details."""
+    username = serializers.CharField(source='user.username', read_only=True)
+    first_name = serializers.CharField(source='user.first_name', read_only=True)
+    last_name = serializers.CharField(source='user.last_name', read_only=True)
+    score = serializers.FloatField(source='match_score', read_only=True)
+
+    class Meta:
+        model = Student
+        fields = ['id', 'username', 'first_name', 'last_name', 'degree', 'year_of_study', 'city', 'province', 'score']
+
+
+class MatchedJobSerializer(JobSerializer):
+    score = serializers.FloatField(source='match_score', read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['score']
+
+
 class JobCreateSerializer(serializers.ModelSerializer):
     job_type = serializers.CharField(source='type') 
     skills_required = serializers.CharField(source='detailed_experience', required=False) 
@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from backend.metrics import applications_created, jobs_posted
+from backend.storage import blob_prefix, release_on_commit
+from users.models import DocumentText, Employer, Student, User
+from .cache import invalidate_jobs
+from .counters import adjust_job_count
+from .matching import JOB_FIELDS, STUDENT_FIELDS, save_job_vectors, save_student_vectors
+from .models import Job, Application
+from .search import update_search_vectors
+
+
+@receiver(post_save, sender=Job)
+def refresh_job_search_vector(sender, instance, update_fields=None, **kwargs):
+    # Skip saves that cannot have touched the indexed text
+    if update_fields is not None and not {'title', 'description', 'detailed_experience'} & set(update_fields):
+        return
+    update_search_vectors(Job.objects.filter(pk=instance.pk))
+
+
+# ------------------------------
+# MATCH VECTORS
+# ------------------------------
+@receiver(post_save, sender=Job)
+def refresh_job_match_vector(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not JOB_FIELDS.keys() & set(update_fields)):
+        return
+    save_job_vectors([instance])
+
+
+@receiver(post_save, sender=Student)
+def refresh_student_match_vector(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not (STUDENT_FIELDS.keys() | {'cv'}) & set(update_fields)):
+        return
+    save_student_vectors([instance])
+
+
+@receiver(post_save, sender=DocumentText)
+def refresh_match_vectors_for_cv(sender, instance, raw=False, **kwargs):
+    # CV text is extracted after the upload was saved; fold it in once it arrives
+    if raw:
+        return
+    students = Student.objects.filter(cv__startswith=blob_prefix(instance.sha256))
+    save_student_vectors(students)
+
+
+# ------------------------------
+# CATEGORY COUNTERS
+# ------------------------------
+@receiver(pre_save, sender=Job)
+def remember_counted_state(sender, instance, raw=False, **kwargs):
+    instance._counted_before = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._counted_before = Job.objects.filter(pk=instance.pk).values_list('type', 'is_active').first()
+
+
+@receiver(post_save, sender=Job)
+def update_job_counts_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_counted_before', None)
+    after = (instance.type, instance.is_active)
+    if before == after:
+        return
+    if before and before[1]:
+        adjust_job_count(before[0], -1)
+    if instance.is_active:
+        adjust_job_count(instance.type, 1)
+
+
+@receiver(post_delete, sender=Job)
+def update_job_counts_on_delete(sender, instance, **kwargs):
+    if instance.is_active:
+        adjust_job_count(instance.type, -1)
+
+
+# ------------------------------
+# CACHE INVALIDATION
+# ------------------------------
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_cache(sender, instance, **kwargs):
+    invalidate_jobs(instance.pk)
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def invalidate_application_job_cache(sender, instance, **kwargs):
+    # Cached jobs carry applications_count and the per-student applied flag
+    invalidate_jobs(instance.job_id)
+
+
+@receiver(post_save, sender=Employer)
+@receiver(post_save, sender=User)
+def invalidate_employer_job_cache(sender, instance, raw=False, **kwargs):
+    # Cached jobs embed the employer (and its user) via EmployerSerializer
+    if raw or (sender is User and not instance.is_employer()):
+        return
+    employer_filter = {'employer': instance} if sender is Employer else {'employer__user': instance}
+    pks = list(Job.objects.filter(**employer_filter).values_list('pk', flat=True))
+    if pks:
+        invalidate_jobs(*pks)
+
+
+# ------------------------------
+# METRICS
+# ------------------------------
+@receiver(post_save, sender=Job)
+def count_posted_job(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(jobs_posted.inc)
+
+
+@receiver(post_save, sender=Application)
+def count_created_application(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(applications_created.inc)
+
+
+# ------------------------------
+# DOCUMENT BLOBS
+# ------------------------------
+@receiver(post_delete, sender=Application)
+def release_application_documents(sender, instance, **kwargs):
+    release_on_commit(*(
+        document.name for document in (instance.resume, instance.cover_letter, instance.additional_documents)
+        if document
+    ))
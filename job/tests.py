@@ -1,3 +1,1002 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from backend.storage import BLOB_GRACE_SECONDS, document_storage
+from backend.testing import QueryBudgetMixin
+from users.models import DocumentText, User, Student, Employer
+from .feeds import build_feeds, refresh_feeds
+from .matching import (
+    dense, job_matrix, job_vector, pack, score, stack, student_matrix, student_vector, top_k, unpack, vectorize,
+)
+from .models import Job, JobVector, Application, RecommendedJob, StudentVector
+from .views import MyJobPostingsAPIView
+
+
+class JobTestDataMixin:
+    """Small fixture factory shared by the job API tests."""
+
+    @classmethod
+    def make_employer(cls, username="acme"):
+        user = User.objects.create_user(username=username, password="pass12345", role="employer")
+        return Employer.objects.create(
+            user=user, employer_id=f"EMP{user.id}", company_name="Acme", industry="Tech"
+        )
+
+    @classmethod
+    def make_student(cls, username="student"):
+        user = User.objects.create_user(username=username, password="pass12345", role="student")
+        return Student.objects.create(user=user, student_id=f"STU{user.id}")
+
+    @classmethod
+    def make_jobs(cls, employer, count, **fields):
+        return [
+            Job.objects.create(
+                employer=employer,
+                title=f"Job number {i}",
+                description="A job description that is long enough.",
+                **fields,
+            )
+            for i in range(count)
+        ]
+
+
+# ------------------------------
+# QUERY COUNT REGRESSIONS
+# ------------------------------
+class JobListingQueryCountTests(JobTestDataMixin, APITestCase):
+    """
+    Job listings must cost a fixed number of queries however many rows are on
+    the page: the serializer reads annotations, never per-row relations.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.employer = self.make_employer()
+        self.student = self.make_student()
+        # Re-fetch so the cached reverse one-to-one lookups start cold
+        self.student_user = User.objects.get(pk=self.student.user.pk)
+        self.employer_user = User.objects.get(pk=self.employer.user.pk)
+
+    def apply_to(self, jobs):
+        for job in jobs:
+            Application.objects.create(job=job, applicant=self.student, resume="resumes/cv.docx")
+
+    def assert_constant_queries(self, user, url, num, grow):
+        for _ in range(2):
+            self.client.force_authenticate(user=User.objects.get(pk=user.pk))
+            with self.assertNumQueries(num):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            with self.captureOnCommitCallbacks(execute=True):
+                grow()
+
+    def test_job_list(self):
+        def grow():
+            self.apply_to(self.make_jobs(self.employer, 15))
+
+        grow()
+        # student profile, count, page
+        self.assert_constant_queries(self.student_user, reverse("job-list"), 3, grow)
+
+    def test_my_job_postings(self):
+        def grow():
+            self.apply_to(self.make_jobs(self.employer, 15))
+
+        grow()
+        # employer profile, count, page
+        self.assert_constant_queries(self.employer_user, reverse("my-jobs"), 3, grow)
+
+    def test_job_detail(self):
+        job = self.make_jobs(self.employer, 1)[0]
+        url = reverse("job-detail", kwargs={"pk": job.pk})
+
+        def grow():
+            for i in range(5):
+                student = self.make_student(username=f"applicant{Student.objects.count()}")
+                Application.objects.create(job=job, applicant=student, resume="resumes/cv.docx")
+
+        grow()
+        # student profile, job, applied flag (each write invalidates the cached job)
+        self.assert_constant_queries(self.student_user, url, 3, grow)
+
+    def test_job_detail_warm_cache(self):
+        job = self.make_jobs(self.employer, 1)[0]
+        url = reverse("job-detail", kwargs={"pk": job.pk})
+        self.client.force_authenticate(user=self.student_user)
+        self.client.get(url)
+        self.client.force_authenticate(user=User.objects.get(pk=self.student_user.pk))
+        with self.assertNumQueries(1):  # student profile only
+            self.assertFalse(self.client.get(url).data["user_has_applied"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apply_to([job])
+        data = self.client.get(url).data
+        self.assertTrue(data["user_has_applied"])
+        self.assertEqual(data["applications_count"], 1)
+
+    def test_annotations_match_serialized_values(self):
+        jobs = self.make_jobs(self.employer, 2)
+        self.apply_to(jobs[:1])
+        self.client.force_authenticate(user=self.student_user)
+        results = {row["id"]: row for row in self.client.get(reverse("job-list")).data["results"]}
+        self.assertEqual(results[jobs[0].pk]["applications_count"], 1)
+        self.assertTrue(results[jobs[0].pk]["user_has_applied"])
+        self.assertEqual(results[jobs[1].pk]["applications_count"], 0)
+        self.assertFalse(results[jobs[1].pk]["user_has_applied"])
+        self.assertEqual(results[jobs[0].pk]["employer"]["username"], "acme")
+
+
+# ------------------------------
+# FILTERS
+# ------------------------------
+class JobFilterTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        employer = self.make_employer()
+        self.full_time = self.make_jobs(employer, 1, type="Full-Time", location="Cape Town")[0]
+        self.part_time = self.make_jobs(employer, 1, type="Part time", location="Cape Town CBD")[0]
+        self.client.force_authenticate(user=self.make_student().user)
+
+    def ids(self, **params):
+        response = self.client.get(reverse("job-list"), params)
+        return {row["id"] for row in response.data["results"]}
+
+    def test_exact_filters_ignore_case_and_punctuation(self):
+        self.assertEqual(self.ids(type="full time"), {self.full_time.pk})
+        self.assertEqual(self.ids(location="cape town"), {self.full_time.pk})
+
+    def test_fuzzy_filters_match_substrings(self):
+        self.assertEqual(self.ids(location="cape", fuzzy="true"), {self.full_time.pk, self.part_time.pk})
+
+    def test_keys_follow_updates(self):
+        self.part_time.type = "FULL_TIME"
+        self.part_time.save(update_fields=["type"])
+        self.assertEqual(self.ids(type="Full Time"), {self.full_time.pk, self.part_time.pk})
+
+
+# ------------------------------
+# PAGINATION
+# ------------------------------
+class KeysetPaginationTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        self.employer = self.make_employer()
+        self.jobs = self.make_jobs(self.employer, 7)
+        # Force ties on posted_on so the id tiebreaker is exercised
+        Job.objects.filter(pk__in=[job.pk for job in self.jobs[2:5]]).update(posted_on=self.jobs[2].posted_on)
+        self.client.force_authenticate(user=self.make_student().user)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def expected_ids(self):
+        return list(Job.objects.order_by("-posted_on", "-id").values_list("id", flat=True))
+
+    def test_pages_cover_every_job_once_in_order(self):
+        self.assertEqual(self.walk(reverse("job-list") + "?page_size=2"), self.expected_ids())
+
+    def test_relevance_pages_cover_every_match_once(self):
+        for i in range(5):
+            Job.objects.create(employer=self.employer, title=f"Python developer {i}", description="python " * (i + 1))
+        ids = self.walk(reverse("job-list") + "?search=python&ordering=relevance&page_size=2")
+        self.assertCountEqual(ids, Job.objects.filter(title__startswith="Python").values_list("id", flat=True))
+
+    def test_new_jobs_do_not_shift_later_pages(self):
+        first = self.client.get(reverse("job-list"), {"page_size": 3}).data
+        self.make_jobs(self.employer, 2)
+        second = self.client.get(first["next"]).data
+        self.assertEqual([row["id"] for row in second["results"]], self.expected_ids()[5:8])
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get(reverse("job-list"), {"page_size": 3}).data
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertEqual([row["id"] for row in back["results"]], [row["id"] for row in first["results"]])
+
+    def test_count_is_opt_out(self):
+        response = self.client.get(reverse("job-list"), {"count": "false"})
+        self.assertNotIn("count", response.data)
+        self.assertEqual(self.client.get(reverse("job-list")).data["count"], 7)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(reverse("job-list"), {"cursor": "bogus"}).status_code, 404)
+
+    def test_tampered_cursor_values(self):
+        for position in (["not-a-date", 1], [{"a": 1}, 1], ["2024-01-01T00:00:00+00:00", "x"], [None, 1], [1]):
+            with self.subTest(position=position):
+                payload = json.dumps({"p": position, "r": 0}).encode()
+                cursor = base64.urlsafe_b64encode(payload).decode()
+                self.assertEqual(self.client.get(reverse("job-list"), {"cursor": cursor}).status_code, 404)
+
+
+# ------------------------------
+# CATEGORY COUNTERS
+# ------------------------------
+class JobCountsTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = self.make_employer()
+
+    def counts(self):
+        return self.client.get(reverse("job-category-counts")).data
+
+    def test_counters_follow_job_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            design, dev = self.make_jobs(self.employer, 2, type="Design")
+            self.make_jobs(self.employer, 1, type="Development")
+        self.assertEqual(self.counts(), {"Design": 2, "Development": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            design.is_active = False
+            design.save()
+            dev.type = "Development"
+            dev.save()
+        self.assertEqual(self.counts(), {"Development": 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            design.is_active = True
+            design.save()
+            dev.delete()
+        self.assertEqual(self.counts(), {"Design": 1, "Development": 1})
+
+    def test_warm_cache_skips_the_database(self):
+        self.make_jobs(self.employer, 3, type="Design")
+        self.counts()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.counts(), {"Design": 3})
+
+    def test_rebuild_repairs_drift(self):
+        self.make_jobs(self.employer, 2, type="Design")
+        Job.objects.update(is_active=False)  # bypasses the signals
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_job_counts", stdout=StringIO())
+        self.assertEqual(self.counts(), {})
+
+
+# ------------------------------
+# EMPLOYER DASHBOARD
+# ------------------------------
+class JobStatsTests(JobTestDataMixin, APITestCase):
+    def test_stats_break_down_applications_by_status(self):
+        employer = self.make_employer()
+        first, second, inactive = self.make_jobs(employer, 3)
+        inactive.is_active = False
+        inactive.save()
+        for i, status in enumerate(["pending", "pending", "shortlisted"]):
+            student = self.make_student(username=f"s{i}")
+            Application.objects.create(job=first, applicant=student, resume="resumes/cv.docx", status=status)
+        Application.objects.create(job=second, applicant=student, resume="resumes/cv.docx", status="rejected")
+
+        self.client.force_authenticate(user=User.objects.get(pk=employer.user.pk))
+        with self.assertNumQueries(3):
+            data = self.client.get(reverse("job-stats")).data
+
+        self.assertEqual((data["total_jobs"], data["active_jobs"], data["total_applications"]), (3, 2, 4))
+        self.assertEqual(data["applications_by_status"]["pending"], 2)
+        jobs = {job["id"]: job for job in data["jobs"]}
+        self.assertEqual(jobs[first.pk]["applications_count"], 3)
+        self.assertEqual(jobs[first.pk]["by_status"]["shortlisted"], 1)
+        self.assertEqual(jobs[second.pk]["by_status"]["rejected"], 1)
+        self.assertEqual(sum(day["count"] for day in data["applications_per_day"]), 4)
+
+
+# ------------------------------
+# CONDITIONAL GET
+# ------------------------------
+class ConditionalGetTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = self.make_employer()
+        self.job = self.make_jobs(self.employer, 1)[0]
+        self.student = self.make_student()
+        self.client.force_authenticate(user=self.student.user)
+
+    def assert_revalidates(self, url, change):
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_job_list(self):
+        self.assert_revalidates(reverse("job-list"), lambda: self.make_jobs(self.employer, 1))
+
+    def test_job_detail(self):
+        def change():
+            self.job.title = "A better title"
+            self.job.save()
+        self.assert_revalidates(reverse("job-detail", kwargs={"pk": self.job.pk}), change)
+
+    def test_job_detail_changes_when_student_applies(self):
+        def change():
+            Application.objects.create(job=self.job, applicant=self.student, resume="resumes/cv.docx")
+        self.assert_revalidates(reverse("job-detail", kwargs={"pk": self.job.pk}), change)
+
+    def test_my_job_postings(self):
+        self.client.force_authenticate(user=self.employer.user)
+        self.assert_revalidates(reverse("my-jobs"), lambda: self.make_jobs(self.employer, 1))
+
+    def test_etag_differs_per_user(self):
+        url = reverse("job-list")
+        etag = self.client.get(url)["ETag"]
+        self.client.force_authenticate(user=self.make_student(username="other").user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+# ------------------------------
+# TOKEN AUTHENTICATION
+# ------------------------------
+class CachedTokenAuthenticationTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = self.make_student()
+        self.make_jobs(self.make_employer(), 3)
+        response = self.client.post(reverse("users:login"), {"username": "student", "password": "pass12345"})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+
+    def test_warm_cache_needs_no_auth_queries(self):
+        self.client.get(reverse("job-list"))
+        with self.assertNumQueries(2):  # count, page
+            self.assertEqual(self.client.get(reverse("job-list")).status_code, 200)
+
+    def test_logout_revokes_cached_token(self):
+        self.client.get(reverse("job-list"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("users:logout"))
+        self.assertEqual(self.client.get(reverse("job-list")).status_code, 401)
+
+    def test_user_updates_refresh_the_cached_user(self):
+        self.client.get(reverse("users:current-user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("users:current-user"), {"first_name": "Thandi"})
+        self.assertEqual(self.client.get(reverse("users:current-user")).data["first_name"], "Thandi")
+
+    def test_activity_keeps_password_reset_links_valid(self):
+        user = User.objects.get(pk=self.student.user_id)
+        reset_token = default_token_generator.make_token(user)
+        self.assertEqual(self.client.get(reverse("job-list")).status_code, 200)
+        user.refresh_from_db()
+        self.assertIsNotNone(user.last_seen)
+        self.assertTrue(default_token_generator.check_token(user, reset_token))
+
+
+# ------------------------------
+# BULK IMPORT / EXPORT
+# ------------------------------
+class JobBulkImportExportTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = self.make_employer()
+        self.client.force_authenticate(user=self.employer.user)
+
+    def row(self, i, **overrides):
+        return {
+            "title": f"Bulk job {i}",
+            "description": "A bulk imported job description.",
+            "job_type": "Full-Time",
+            "location": "Durban",
+            **overrides,
+        }
+
+    def test_json_import(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("job-bulk-import"), [self.row(i) for i in range(3)], format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(set(Job.objects.values_list("type_key", flat=True)), {"full time"})
+        self.assertEqual(self.client.get(reverse("job-category-counts")).data, {"Full-Time": 3})
+
+    def test_invalid_rows_reject_the_import(self):
+        rows = [self.row(1), self.row(2, title="Bad"), self.row(3, description="short")]
+        response = self.client.post(reverse("job-bulk-import"), rows, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3])
+        self.assertFalse(Job.objects.exists())
+
+    def test_skip_invalid_keeps_valid_rows(self):
+        rows = [self.row(1), self.row(2, title="Bad")]
+        response = self.client.post(reverse("job-bulk-import") + "?skip_invalid=true", rows, format="json")
+        self.assertEqual((response.status_code, response.data["created"]), (201, 1))
+
+    def test_csv_and_ndjson_import(self):
+        csv_body = "title,description,job_type,vacancies\nCSV job one,A bulk imported job description.,Part time,2\n"
+        response = self.client.generic("POST", reverse("job-bulk-import"), csv_body, content_type="text/csv")
+        self.assertEqual(response.data["created"], 1)
+        ndjson_body = "\n".join(json.dumps(self.row(i)) for i in range(2)) + "\n"
+        response = self.client.generic("POST", reverse("job-bulk-import"), ndjson_body, content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(Job.objects.get(title="CSV job one").vacancies, 2)
+
+    @mock.patch("job.bulk.BATCH_SIZE", 1)  # the first row is inserted before the bad line is read
+    def test_unreadable_bodies_are_rejected_and_rolled_back(self):
+        header = b"title,description,job_type,vacancies\n"
+        first = b"CSV job one,A bulk imported job description.,Part time,2\n"
+        cases = [
+            ("text/csv", header + first + b"Caf\xe9 job,Latin-1 bytes,Part time,1\n", "Line 3 is not valid UTF-8."),
+            ("text/csv", header + first + b'"' + b"x" * (csv.field_size_limit() + 1) + b'",,,\n', "Line 3 is not valid CSV"),
+            ("application/x-ndjson", json.dumps(self.row(0)).encode() + b'\n{"title": "Caf\xe9"}\n', "Line 2 is not valid UTF-8."),
+        ]
+        for content_type, body, message in cases:
+            with self.subTest(message):
+                response = self.client.generic("POST", reverse("job-bulk-import"), body, content_type=content_type)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(str(response.data["detail"]).startswith(message))
+                self.assertFalse(Job.objects.exists())
+
+    def test_export_round_trips(self):
+        self.make_jobs(self.employer, 2, type="Internship")
+        response = self.client.get(reverse("my-jobs-export"))
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.strip().splitlines()), 3)
+        Job.objects.all().delete()
+        response = self.client.generic("POST", reverse("job-bulk-import"), body, content_type="text/csv")
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(set(Job.objects.values_list("type", flat=True)), {"Internship"})
+
+    def test_ndjson_export(self):
+        self.make_jobs(self.employer, 1)
+        response = self.client.get(reverse("my-jobs-export"), {"output": "ndjson"})
+        row = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(row["applications_count"], 0)
+
+
+class EmployerApplicationsExportTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        self.employer = self.make_employer()
+        self.job = self.make_jobs(self.employer, 1)[0]
+        for i, status in enumerate(["pending", "shortlisted", "pending"]):
+            student = self.make_student(username=f"applicant{i}")
+            Application.objects.create(job=self.job, applicant=student, resume="resumes/cv.docx", status=status)
+        self.url = reverse("employer-applications-export", kwargs={"job_id": self.job.pk})
+        self.client.force_authenticate(user=self.employer.user)
+
+    def rows(self, **params):
+        response = self.client.get(self.url, {"output": "ndjson", **params})
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_flat_rows_with_filters(self):
+        rows = self.rows()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["resume"], "http://testserver/media/resumes/cv.docx")
+        self.assertEqual([row["username"] for row in self.rows(status="shortlisted")], ["applicant1"])
+        self.assertEqual(self.rows(applied_after="2999-01-01"), [])
+        self.assertEqual(self.client.get(self.url, {"applied_before": "soon"}).status_code, 400)
+
+    def test_other_employers_cannot_export(self):
+        self.client.force_authenticate(user=self.make_employer(username="rival").user)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+# ------------------------------
+# APPLICATION STATUS UPDATES
+# ------------------------------
+class ApplicationStatusUpdateTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = self.make_employer()
+        self.job = self.make_jobs(self.employer, 1)[0]
+        self.applications = [
+            Application.objects.create(
+                job=self.job, applicant=self.make_student(username=f"s{i}"), resume="resumes/cv.docx"
+            )
+            for i in range(4)
+        ]
+        rival = self.make_employer(username="rival")
+        self.foreign = Application.objects.create(
+            job=self.make_jobs(rival, 1)[0], applicant=self.applications[0].applicant, resume="resumes/cv.docx"
+        )
+        self.client.force_authenticate(user=User.objects.get(pk=self.employer.user.pk))
+
+    def bulk(self, payload):
+        return self.client.post(reverse("application-bulk-update-status"), payload, format="json")
+
+    def test_bulk_update_by_ids(self):
+        ids = [self.applications[0].pk, self.applications[1].pk, self.foreign.pk, 999999]
+        # employer profile, authorize, update (+ the savepoint pair TestCase adds)
+        with self.assertNumQueries(5):
+            response = self.bulk({"ids": ids, "status": "shortlisted", "notes": "Call back"})
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(
+            [row["result"] for row in response.data["results"]], ["updated", "updated", "not_found", "not_found"]
+        )
+        self.assertEqual(Application.objects.filter(status="shortlisted", notes="Call back").count(), 2)
+        self.assertEqual(Application.objects.get(pk=self.foreign.pk).status, "pending")
+
+    def test_bulk_update_by_filter(self):
+        Application.objects.filter(pk=self.applications[0].pk).update(status="accepted")
+        response = self.bulk({"filter": {"job": self.job.pk, "status": "pending"}, "status": "rejected"})
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(Application.objects.get(pk=self.applications[0].pk).status, "accepted")
+
+    def test_bulk_update_validation(self):
+        self.assertEqual(self.bulk({"status": "rejected"}).status_code, 400)
+        self.assertEqual(self.bulk({"ids": [1], "status": "hired"}).status_code, 400)
+
+    def test_single_update_fetches_once(self):
+        url = reverse("application-update-status", kwargs={"application_id": self.applications[0].pk})
+        with self.assertNumQueries(3):  # application+job, employer profile, update
+            response = self.client.patch(url, {"status": "reviewed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+
+# ------------------------------
+# ASYNC READ PATH
+# ------------------------------
+class AsyncJobViewsTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = self.make_student()
+        self.jobs = self.make_jobs(self.make_employer(), 3, type="Full-Time")
+        Application.objects.create(job=self.jobs[0], applicant=self.student, resume="resumes/cv.docx")
+        response = self.client.post(reverse("users:login"), {"username": "student", "password": "pass12345"})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+
+    def test_list_matches_sync_view(self):
+        params = {"page_size": 2, "type": "full time"}
+        sync_page = self.client.get(reverse("job-list"), params).json()
+        async_page = self.client.get(reverse("async-job-list"), params).json()
+        self.assertEqual(async_page["results"], sync_page["results"])
+        self.assertEqual(async_page["count"], 3)
+        next_page = self.client.get(async_page["next"]).json()
+        self.assertEqual([job["id"] for job in next_page["results"]], [self.jobs[0].pk])
+        self.assertTrue(next_page["results"][0]["user_has_applied"])
+
+    def test_detail_matches_sync_view(self):
+        url_kwargs = {"pk": self.jobs[0].pk}
+        self.assertEqual(
+            self.client.get(reverse("async-job-detail", kwargs=url_kwargs)).json(),
+            self.client.get(reverse("job-detail", kwargs=url_kwargs)).json(),
+        )
+        self.assertEqual(self.client.get(reverse("async-job-detail", kwargs={"pk": 999999})).status_code, 404)
+
+    def test_counts_and_authentication(self):
+        self.assertEqual(
+            self.client.get(reverse("async-job-category-counts")).json(),
+            self.client.get(reverse("job-category-counts")).json(),
+        )
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse("async-job-list")).status_code, 401)
+        self.assertEqual(self.client.post(reverse("async-job-category-counts")).status_code, 405)
+
+
+# ------------------------------
+# CONTENT-ADDRESSED DOCUMENTS
+# ------------------------------
+@override_settings(DOCUMENT_EXTRACTION_WORKERS=0)
+class DocumentStorageTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.storage = document_storage()
+        self.job = self.make_jobs(self.make_employer(), 1)[0]
+
+    def write_legacy(self, name, content):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as legacy:
+            legacy.write(content)
+        return name
+
+    def age(self, name):
+        # Past the grace period that protects blobs of uncommitted rows
+        saved = time.time() - BLOB_GRACE_SECONDS - 1
+        os.utime(self.storage.path(name), (saved, saved))
+
+    def blobs(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, filename), self.media).replace(os.sep, "/")
+            for root, _dirs, files in os.walk(os.path.join(self.media, "blobs"))
+            for filename in files
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.storage.save("cvs/cv.docx", ContentFile(b"same cv", name="cv.docx"))
+        second = self.storage.save("resumes/copy.DOCX", ContentFile(b"same cv", name="copy.DOCX"))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r"^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.docx$")
+        self.assertNotEqual(first, self.storage.save("cvs/other.docx", ContentFile(b"other cv")))
+
+    def test_delete_waits_for_the_last_reference(self):
+        name = self.storage.save("cv.pdf", ContentFile(b"%PDF shared"))
+        applications = [
+            Application.objects.create(job=self.job, applicant=self.make_student(username=f"s{i}"), resume=name)
+            for i in range(2)
+        ]
+        self.age(name)
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        applications[0].delete()
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        applications[1].delete()
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+
+    def test_recently_saved_blobs_survive_delete(self):
+        # A concurrent save found the blob but has not committed its row yet
+        name = self.storage.save("cv.pdf", ContentFile(b"%PDF shared"))
+        self.age(name)
+        self.assertEqual(self.storage.save("copy.pdf", ContentFile(b"%PDF shared")), name)
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_concurrent_saves_of_the_same_content_share_the_name(self):
+        name = self.storage.save("cv.pdf", ContentFile(b"%PDF shared"))
+        with mock.patch.object(self.storage, "touch", return_value=False):  # lost the race to the other save
+            self.assertEqual(self.storage.save("copy.pdf", ContentFile(b"%PDF shared")), name)
+        self.assertEqual(self.blobs(), [name])
+
+    def test_deleted_rows_release_their_blobs(self):
+        student = self.make_student()
+        resume = self.storage.save("cv.pdf", ContentFile(b"%PDF resume"))
+        letter = self.storage.save("letter.pdf", ContentFile(b"%PDF letter"))
+        Student.objects.filter(pk=student.pk).update(cv=resume)
+        Application.objects.create(job=self.job, applicant=student, resume=resume, cover_letter=letter)
+        for name in (resume, letter):
+            self.age(name)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        self.assertEqual(self.blobs(), [resume])  # the student's CV still points at it
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.get(pk=student.pk).delete()
+        self.assertEqual(self.blobs(), [])
+
+    def test_replacing_a_cv_releases_the_old_blob(self):
+        student = self.make_student()
+        self.client.force_authenticate(user=student.user)
+        names = []
+        for content in (b"first cv", b"second cv"):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse("users:upload_cv"), {"cv": SimpleUploadedFile("cv.txt", content)})
+            self.assertEqual(response.status_code, 200)
+            names.append(Student.objects.get(pk=student.pk).cv.name)
+            self.age(names[-1])
+        self.assertEqual(self.blobs(), [names[1]])
+
+    def test_dedupe_media(self):
+        cv = self.write_legacy("cvs/cvForA.docx", b"cv for A")
+        copy = self.write_legacy("cvs/cvForA_lyWblgQ.docx", b"cv for A")
+        deck = self.write_legacy("documents/221_PP.pptx", b"slides")
+        self.write_legacy("resumes/unreferenced.pdf", b"orphan")
+        student = self.make_student()
+        Student.objects.filter(pk=student.pk).update(cv=cv)
+        Application.objects.create(job=self.job, applicant=student, resume=copy, additional_documents=deck)
+
+        out = StringIO()
+        call_command("dedupe_media", "--dry-run", stdout=out)
+        self.assertIn("1 duplicates. Would reclaim 8 bytes.", out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.media, copy)))
+
+        out = StringIO()
+        call_command("dedupe_media", stdout=out)
+        self.assertIn("2 moved into blobs, 1 duplicates. Reclaimed 8 bytes.", out.getvalue())
+        self.assertIn("1 unreferenced files (6 bytes)", out.getvalue())
+        application = Application.objects.get()
+        self.assertEqual(Student.objects.get(pk=student.pk).cv.name, application.resume.name)
+        self.assertTrue(application.resume.name.startswith("blobs/"))
+        self.assertEqual(application.additional_documents.read(), b"slides")
+        for legacy in (cv, copy, deck):
+            self.assertFalse(os.path.exists(os.path.join(self.media, legacy)))
+
+
+# ------------------------------
+# CANDIDATE MATCHING
+# ------------------------------
+class MatchingTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        student_matrix.clear()
+        job_matrix.clear()
+        self.employer = self.make_employer()
+        self.job = Job.objects.create(
+            employer=self.employer, title="Python Django developer",
+            description="Build REST APIs with Django and PostgreSQL.",
+            detailed_experience="Python, Django REST framework, SQL",
+        )
+        self.students = {}
+        for name, degree, bio in (
+            ("dev", "BSc Computer Science", "Python and Django developer building REST APIs"),
+            ("data", "BSc Statistics", "SQL and Python for data analysis"),
+            ("nurse", "Nursing", "Clinical placements in paediatrics"),
+        ):
+            student = self.make_student(username=name)
+            student.degree, student.bio = degree, bio
+            student.save()
+            self.students[name] = student
+
+    def test_vectors_follow_saves(self):
+        vector = StudentVector.objects.get(pk=self.students["nurse"].pk)
+        self.assertEqual(len(unpack(vector.vector)[0]), len(student_vector(self.students["nurse"])[0]))
+        self.students["nurse"].bio = "Python Django developer"
+        self.students["nurse"].save(update_fields=["bio"])
+        self.assertNotEqual(bytes(StudentVector.objects.get(pk=self.students["nurse"].pk).vector), bytes(vector.vector))
+        self.assertTrue(JobVector.objects.filter(pk=self.job.pk).exists())
+
+    def test_scores_match_dense_dot_product(self):
+        indices, values = job_vector(self.job)
+        self.assertAlmostEqual(float(np.linalg.norm(values)), 1.0, places=5)
+        rows = [(pk, StudentVector.objects.get(pk=pk).vector) for pk in (s.pk for s in self.students.values())]
+        rows.append((0, pack(*vectorize([]))))  # a profile with no text
+        ids, indptr, row_indices, row_values = stack(rows)
+        scores = score(dense(indices, values), indptr, row_indices, row_values)
+        expected = [float(dense(*unpack(blob)) @ dense(indices, values)) for _, blob in rows]
+        np.testing.assert_allclose(scores, expected, rtol=1e-3, atol=1e-6)
+        self.assertEqual([pk for pk, _ in top_k(ids, scores, 2)], [self.students["dev"].pk, self.students["data"].pk])
+
+    def test_ranked_applicants(self):
+        for student in self.students.values():
+            Application.objects.create(job=self.job, applicant=student, resume="resumes/cv.docx")
+        self.client.force_authenticate(user=self.employer.user)
+        response = self.client.get(reverse("job-ranked-applicants", kwargs={"pk": self.job.pk}))
+        usernames = [row["applicant"]["username"] for row in response.data["results"]]
+        self.assertEqual(usernames, ["dev", "data", "nurse"])
+        self.client.force_authenticate(user=self.make_employer(username="rival").user)
+        self.assertEqual(self.client.get(reverse("job-ranked-applicants", kwargs={"pk": self.job.pk})).status_code, 404)
+
+    def test_matched_students_see_later_saves(self):
+        self.client.force_authenticate(user=self.employer.user)
+        url = reverse("job-matched-students", kwargs={"pk": self.job.pk})
+        self.assertEqual(self.client.get(url, {"limit": 1}).data["results"][0]["username"], "dev")
+        # Picked up from updated_at without rebuilding the matrix
+        self.students["nurse"].bio = "Python Django developer building REST APIs with Django REST framework"
+        self.students["nurse"].degree = "Python Django"
+        self.students["nurse"].save()
+        self.assertEqual(self.client.get(url, {"limit": 1}).data["results"][0]["username"], "nurse")
+        self.assertNotIn("email", self.client.get(url).data["results"][0])
+        self.assertEqual(self.client.get(url, {"limit": 0}).status_code, 400)
+
+    def test_matched_students_leave_out_applicants(self):
+        Application.objects.create(job=self.job, applicant=self.students["dev"], resume="resumes/cv.docx")
+        self.client.force_authenticate(user=self.employer.user)
+        results = self.client.get(reverse("job-matched-students", kwargs={"pk": self.job.pk})).data["results"]
+        self.assertEqual(results[0]["username"], "data")
+        self.assertNotIn("dev", [row["username"] for row in results])
+
+    def test_matched_jobs_skip_inactive(self):
+        Job.objects.create(employer=self.employer, title="Paediatric nurse", description="Clinical ward work.")
+        closed = Job.objects.create(
+            employer=self.employer, title="Python Django developer", description="Django APIs", is_active=False
+        )
+        self.client.force_authenticate(user=self.students["dev"].user)
+        results = self.client.get(reverse("matched-jobs")).data["results"]
+        self.assertEqual(results[0]["id"], self.job.pk)
+        self.assertNotIn(closed.pk, [job["id"] for job in results])
+        self.assertGreater(results[0]["score"], 0)
+        self.client.force_authenticate(user=self.employer.user)
+        self.assertEqual(self.client.get(reverse("matched-jobs")).status_code, 403)
+
+
+@override_settings(DOCUMENT_EXTRACTION_WORKERS=0)
+class ApplicationDocumentTextTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        student_matrix.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.employer = self.make_employer()
+        self.job = self.make_jobs(self.employer, 1, detailed_experience="Kubernetes, Terraform")[0]
+
+    def apply(self, username, cv_text, cover_letter_text):
+        student = self.make_student(username=username)
+        self.client.force_authenticate(user=student.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("users:upload_cv"), {"cv": SimpleUploadedFile("cv.txt", cv_text.encode())})
+        self.client.force_authenticate(user=User.objects.get(pk=student.user.pk))  # sees the new CV
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("application-create"), {
+                "job": self.job.pk, "cover_letter": SimpleUploadedFile("letter.txt", cover_letter_text.encode()),
+                "resume": SimpleUploadedFile("ignored.txt", b"replaced by the CV on file"),
+            })
+        self.assertEqual(response.status_code, 201, response.data)
+        return student
+
+    def test_search_applications_by_document_text(self):
+        self.apply("ops", "Platform engineer: Kubernetes and Terraform", "I enjoy infrastructure work")
+        self.apply("web", "Frontend developer: React", "Keen to learn Kubernetes")
+        self.apply("data", "Data analyst: SQL", "Numbers person")
+        self.assertEqual(DocumentText.objects.count(), 6)
+
+        self.client.force_authenticate(user=self.employer.user)
+        url = reverse("employer-applications", kwargs={"job_id": self.job.pk})
+        usernames = lambda params: sorted(row["applicant"]["username"] for row in self.client.get(url, params).data["results"])
+        self.assertEqual(usernames({"search": "kubernetes"}), ["ops", "web"])
+        self.assertEqual(usernames({"search": "SQL"}), ["data"])
+        self.assertEqual(usernames({}), ["data", "ops", "web"])
+
+    def test_cv_text_joins_the_match_vector(self):
+        student = self.make_student()
+        empty = bytes(StudentVector.objects.get(pk=student.pk).vector)
+        self.client.force_authenticate(user=student.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("users:upload_cv"), {"cv": SimpleUploadedFile("cv.txt", b"Kubernetes Terraform")})
+        self.assertNotEqual(bytes(StudentVector.objects.get(pk=student.pk).vector), empty)
+        self.client.force_authenticate(user=self.employer.user)
+        results = self.client.get(reverse("job-matched-students", kwargs={"pk": self.job.pk})).data["results"]
+        self.assertEqual([row["username"] for row in results], ["student"])
+
+
+# ------------------------------
+# RECOMMENDED JOBS FEED
+# ------------------------------
+class RecommendedJobsTests(JobTestDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = self.make_employer()
+        self.python_job = self.post_job("Python developer intern", "Cape Town, Western Cape", "Internship")
+        self.analyst_job = self.post_job("SQL data analyst", "Johannesburg", "Full time")
+        self.nurse_job = self.post_job("Paediatric nurse", "Durban", "Full time")
+        self.student = self.make_student()
+        self.student.degree, self.student.bio, self.student.city = "Computer Science", "Python and SQL", "Cape Town"
+        self.student.save()
+        self.user = User.objects.get(pk=self.student.user.pk)
+        self.client.force_authenticate(user=self.user)
+
+    def post_job(self, title, location, job_type):
+        return Job.objects.create(
+            employer=self.employer, title=title, description=title, location=location, type=job_type,
+        )
+
+    def feed(self):
+        response = self.client.get(reverse("recommended-jobs"))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_newest_jobs_until_the_first_build(self):
+        data = self.feed()
+        self.assertFalse(data["personalized"])
+        self.assertEqual(len(data["results"]), 3)
+
+    def test_feed_ranks_by_fit_and_drops_applied_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            out = StringIO()
+            call_command("build_job_feeds", stdout=out)
+        self.assertIn("Full build: 2 entries for 1 students", out.getvalue())
+
+        # student profile, then the feed itself: one query
+        with self.assertNumQueries(2):
+            data = self.feed()
+        self.assertTrue(data["personalized"])
+        self.assertEqual([job["id"] for job in data["results"]], [self.python_job.pk, self.analyst_job.pk])
+        with self.assertNumQueries(0):
+            self.feed()  # served from the cache
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(job=self.python_job, applicant=self.student, resume="resumes/cv.docx")
+        self.assertEqual([job["id"] for job in self.feed()["results"]], [self.analyst_job.pk])
+
+    def test_incremental_refresh_merges_new_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            build_feeds()
+        self.feed()
+        new_job = self.post_job("Senior Python developer", "Cape Town", "Full time")
+        self.post_job("Theatre nurse", "Durban", "Full time")
+        with self.captureOnCommitCallbacks(execute=True):
+            build = refresh_feeds()
+        self.assertFalse(build.full)
+        self.assertEqual((build.students, build.entries), (1, 1))
+        self.assertEqual(self.feed()["results"][0]["id"], new_job.pk)
+        self.assertEqual(RecommendedJob.objects.filter(student=self.student).count(), 3)
+
+    @mock.patch("job.feeds.FEED_SIZE", 2)
+    def test_incremental_refresh_keeps_feeds_at_feed_size(self):
+        build_feeds()
+        self.assertEqual(RecommendedJob.objects.filter(student=self.student).count(), 2)
+        new_job = self.post_job("Senior Python developer", "Cape Town", "Full time")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(refresh_feeds().entries, 1)
+        feed = RecommendedJob.objects.filter(student=self.student).values_list("job", flat=True)
+        self.assertCountEqual(feed, [new_job.pk, self.python_job.pk])  # the analyst job was pushed out
+
+    def test_incremental_refresh_builds_new_students_in_full(self):
+        build_feeds()
+        newcomer = self.make_student(username="newcomer")
+        newcomer.bio, newcomer.city = "SQL and Python", "Johannesburg"
+        newcomer.save()
+        new_job = self.post_job("Senior Python developer", "Cape Town", "Full time")
+        build = refresh_feeds()
+        self.assertEqual(build.students, 2)
+        feed = RecommendedJob.objects.filter(student=newcomer).values_list("job", flat=True)
+        self.assertCountEqual(feed, [self.analyst_job.pk, self.python_job.pk, new_job.pk])
+
+        # Nothing new since: the existing feeds are left alone
+        build = refresh_feeds()
+        self.assertEqual((build.students, build.entries), (0, 0))
+
+    def test_past_application_types_count(self):
+        other = self.make_student(username="other")
+        Application.objects.create(job=self.nurse_job, applicant=other, resume="resumes/cv.docx")
+        ward_job = self.post_job("Ward assistant", "Pretoria", "Full time")
+        build_feeds()
+        feed = list(RecommendedJob.objects.filter(student=other).order_by("-score").values_list("job", flat=True))
+        self.assertNotIn(self.nurse_job.pk, feed)  # already applied
+        self.assertEqual(set(feed), {self.analyst_job.pk, ward_job.pk})
+
+
+# ------------------------------
+# QUERY BUDGETS
+# ------------------------------
+class JobQueryBudgetTests(QueryBudgetMixin, JobTestDataMixin, APITestCase):
+    """Every budgeted endpoint stays within its declared queries with several rows per page."""
+
+    def setUp(self):
+        cache.clear()
+        student_matrix.clear()
+        job_matrix.clear()
+        self.employer = self.make_employer()
+        self.jobs = self.make_jobs(self.employer, 5, type="Internship")
+        self.job = self.jobs[0]
+        self.students = [self.make_student(username=f"s{i}") for i in range(5)]
+        self.applications = [
+            Application.objects.create(job=self.job, applicant=student, resume="resumes/cv.docx")
+            for student in self.students
+        ]
+        for job in self.jobs[1:3]:
+            for student in self.students[:2]:
+                Application.objects.create(job=job, applicant=student, resume="resumes/cv.docx")
+        build_feeds()
+
+    def login(self, profile):
+        self.client.force_authenticate(user=User.objects.get(pk=profile.user_id))
+
+    def test_student_endpoints(self):
+        for name, kwargs in (
+            ("job-list", {}), ("job-detail", {"pk": self.job.pk}), ("job-category-counts", {}),
+            ("my-applications", {}), ("application-detail", {"application_id": self.applications[1].pk}),
+            ("matched-jobs", {}), ("recommended-jobs", {}),
+        ):
+            self.login(self.students[1])  # a fresh user, so the profile lookup is counted
+            with self.subTest(name):
+                response = self.assertWithinQueryBudget("GET", reverse(name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 200)
+
+    def test_employer_endpoints(self):
+        for name, kwargs in (
+            ("my-jobs", {}), ("job-stats", {}), ("employer-applications", {"job_id": self.job.pk}),
+            ("job-ranked-applicants", {"pk": self.job.pk}), ("job-matched-students", {"pk": self.job.pk}),
+        ):
+            self.login(self.employer)
+            with self.subTest(name):
+                response = self.assertWithinQueryBudget("GET", reverse(name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 200)
+
+        self.login(self.employer)
+        url = reverse("application-update-status", kwargs={"application_id": self.applications[0].pk})
+        self.assertWithinQueryBudget("PATCH", url, {"status": "reviewed"}, format="json")
+        self.assertWithinQueryBudget(
+            "POST", reverse("application-bulk-update-status"),
+            {"filter": {"job": self.job.pk}, "status": "shortlisted"}, format="json",
+        )
+
+    def test_over_budget_fails(self):
+        self.login(self.employer)
+        with mock.patch.object(MyJobPostingsAPIView, "query_budget", (1, ("GET",))):
+            with self.assertRaisesMessage(AssertionError, "ran 3 queries, over its budget of 1"):
+                self.assertWithinQueryBudget("GET", reverse("my-jobs"))
+        with self.assertRaisesMessage(AssertionError, "declares no query budget"):
+            self.assertWithinQueryBudget("GET", reverse("my-jobs-export"))
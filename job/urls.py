@@ -1,11 +1,14 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 from .views import (
     JobListAPIView, JobCreateAPIView, JobDetailAPIView,
     MyJobPostingsAPIView, JobStatsAPIView,
+    JobBulkImportAPIView, MyJobPostingsExportAPIView,
     ApplicationCreateAPIView, MyApplicationsAPIView,
-    EmployerApplicationsAPIView, ApplicationStatusUpdateAPIView,
+    EmployerApplicationsAPIView, EmployerApplicationsExportAPIView,
+    ApplicationStatusUpdateAPIView, ApplicationBulkStatusUpdateAPIView,
     ApplicationDetailAPIView,
+    RankedApplicantsAPIView, MatchedStudentsAPIView, MatchedJobsAPIView, RecommendedJobsAPIView,
 )
 
 urlpatterns = [
@@ -27,14 +30,33 @@ urlpatterns = [
     path('create/', JobCreateAPIView.as_view(), name='job-create'), 
     path('<int:pk>/', JobDetailAPIView.as_view(), name='job-detail'), 
     path('my/', MyJobPostingsAPIView.as_view(), name='my-jobs'), 
+    path('my/export/', MyJobPostingsExportAPIView.as_view(), name='my-jobs-export'),
+    path('bulk/', JobBulkImportAPIView.as_view(), name='job-bulk-import'),
     path('stats/', JobStatsAPIView.as_view(), name='job-stats'), 
 
+    # -------------------
+    # Async read path (same responses; served without blocking under ASGI)
+    # -------------------
+    path('async/list/', async_views.job_list, name='async-job-list'),
+    path('async/<int:pk>/', async_views.job_detail, name='async-job-detail'),
+    path('async/job-counts/', async_views.job_counts, name='async-job-category-counts'),
+
+    # -------------------
+    # Candidate Matching
+    # -------------------
+    path('<int:pk>/matches/applicants/', RankedApplicantsAPIView.as_view(), name='job-ranked-applicants'),
+    path('<int:pk>/matches/students/', MatchedStudentsAPIView.as_view(), name='job-matched-students'),
+    path('matches/', MatchedJobsAPIView.as_view(), name='matched-jobs'),
+    path('recommended/', RecommendedJobsAPIView.as_view(), name='recommended-jobs'),
+
     # -------------------
     # Application Endpoints
     # -------------------
     path('applications/create/', ApplicationCreateAPIView.as_view(), name='application-create'),
     path('applications/my/', MyApplicationsAPIView.as_view(), name='my-applications'),
     path('applications/job/<int:job_id>/', EmployerApplicationsAPIView.as_view(), name='employer-applications'),
+    path('applications/job/<int:job_id>/export/', EmployerApplicationsExportAPIView.as_view(), name='employer-applications-export'),
+    path('applications/bulk-update-status/', ApplicationBulkStatusUpdateAPIView.as_view(), name='application-bulk-update-status'),
     path('applications/<int:application_id>/update-status/', ApplicationStatusUpdateAPIView.as_view(), name='application-update-status'),
     path('applications/<int:application_id>/', ApplicationDetailAPIView.as_view(), name='application-detail'),
 ]
\ No newline at end of file
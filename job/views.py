@@ -3,18 +3,46 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.exceptions import PermissionDenied, ValidationError 
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.db.models import Q, Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import timedelta
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.parsers import JSONParser
+from rest_framework import serializers
 from rest_framework.reverse import reverse 
 #from django.http import JsonResponse 
 
-from .models import Job, Application
+from backend.instrumentation import query_budget
+from backend.routers import reads_from
+from .models import APPLICATION_DOCUMENT_FIELDS, Job, Application, RecommendedJob, requesting_student
+from users.documents import filter_by_document_text
+from users.models import Student
+from .cache import get_cached_job, get_cached_has_applied, invalidate_jobs
+from .conditional import (
+    job_list_etag, job_list_last_modified,
+    job_detail_etag, job_detail_last_modified,
+)
+from .search import browse_jobs
+from .pagination import JobPagination, ApplicationPagination
+from .counters import get_job_counts
+from .bulk import BulkImportError, import_jobs, parse_rows
+from .export import EXPORT_FORMATS, streaming_export
 from .serializers import (
     JobSerializer, JobCreateSerializer,
     ApplicationSerializer, ApplicationCreateSerializer,
-    ApplicationStatusUpdateSerializer
+    ApplicationStatusUpdateSerializer, ApplicationBulkStatusUpdateSerializer,
+    MatchLimitSerializer, RankedApplicationSerializer, MatchedStudentSerializer, MatchedJobSerializer,
 )
+from .matching import match_jobs, match_students, rank_applicants
+from .feeds import get_feed
 
+@query_budget(1)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def job_counts(request):
@@ -22,46 +50,31 @@ def job_counts(request):
     Returns a JSON object of active job counts grouped by category.
     The format is required by the frontend JavaScript: {"Design-Creative": 52, ...}
     """
-    # Filter for active jobs only (optional, but usually desired for display)
-    counts = Job.objects.filter(is_active=True).values('type').annotate(count=Count('type'))
-    
-    # Convert the QuerySet (list of dicts) into the simple dictionary format: {'CategoryName': Count}
-    job_counts = {item['type']: item['count'] for item in counts}
-    
-    # Return the dictionary as a JSON response
-    return Response(job_counts)
+    # Served from the maintained counters (cached), never from a GROUP BY over Job
+    return Response(get_job_counts())
     #return Response({"Success-Test": 100, "If-This-Works": 50})
 
 # ------------------------------
 # JOB VIEWS
 # ------------------------------
+# Not routed to the replica: its ETag comes from cache stamps bumped when the
+# primary commits, and a lagging replica would pair a new ETag with an old body
+@query_budget(3)
+@method_decorator(condition(etag_func=job_list_etag, last_modified_func=job_list_last_modified), name='get')
 class JobListAPIView(generics.ListAPIView):
 # ... (rest of the existing JobListAPIView) ...
-    """List all active jobs with optional filtering"""
+    """
+    List all active jobs with optional filtering.
+    ``?search=`` accepts web-search syntax; add ``?ordering=relevance`` to rank matches.
+    ``?location=``, ``?type=`` and ``?experience=`` match exactly (case and punctuation
+    insensitive); add ``?fuzzy=true`` for substring matching.
+    """
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = JobPagination
 
     def get_queryset(self):
-        queryset = Job.objects.filter(is_active=True)
-        search = self.request.query_params.get('search')
-        location = self.request.query_params.get('location')
-        job_type = self.request.query_params.get('type')
-        experience = self.request.query_params.get('experience')
-
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(detailed_experience__icontains=search)
-            )
-        if location:
-            queryset = queryset.filter(location__icontains=location)
-        if job_type:
-            queryset = queryset.filter(type__icontains=job_type)
-        if experience:
-            queryset = queryset.filter(experience__icontains=experience)
-
-        return queryset.order_by('-posted_on')
+        return browse_jobs(self.request.user, self.request.query_params)
 
 
 class JobCreateAPIView(generics.CreateAPIView):
@@ -81,13 +94,29 @@ class JobCreateAPIView(generics.CreateAPIView):
         serializer.save(employer=user.employer_profile)
 
 
+@query_budget(3)
+@method_decorator(condition(etag_func=job_detail_etag, last_modified_func=job_detail_last_modified), name='get')
 class JobDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
 # ... (rest of the existing JobDetailAPIView) ...
     """Retrieve, update or delete a job (employer only for updates/deletes)"""
-    queryset = Job.objects.all()
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return Job.objects.for_listing(self.request.user)
+
+    def get_object(self):
+        # Reads are served from the shared cached job plus a cached per-student flag
+        if self.request.method not in ('GET', 'HEAD'):
+            return super().get_object()
+        job = get_cached_job(self.kwargs['pk'])
+        if job is None:
+            raise Http404
+        self.check_object_permissions(self.request, job)
+        student = requesting_student(self.request.user)
+        job.user_has_applied = get_cached_has_applied(job.pk, student) if student else False
+        return job
+
     def update(self, request, *args, **kwargs):
         job = self.get_object()
         if not hasattr(request.user, 'employer_profile') or job.employer != request.user.employer_profile:
@@ -101,17 +130,81 @@ class JobDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         return super().destroy(request, *args, **kwargs)
 
 
+@query_budget(3)
+@method_decorator(condition(etag_func=job_list_etag, last_modified_func=job_list_last_modified), name='get')
 class MyJobPostingsAPIView(generics.ListAPIView):
 # ... (rest of the existing MyJobPostingsAPIView) ...
     """List all jobs posted by the logged-in employer"""
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = JobPagination
 
     def get_queryset(self):
         user = self.request.user
         if not hasattr(user, 'employer_profile'):
             raise PermissionDenied("Only employers can view their job postings.")
-        return Job.objects.filter(employer=user.employer_profile).order_by('-posted_on')
+        return Job.objects.for_listing(user).filter(employer=user.employer_profile).order_by('-posted_on')
+
+
+# ------------------------------
+# BULK IMPORT / EXPORT
+# ------------------------------
+class JobBulkImportAPIView(generics.GenericAPIView):
+    """
+    Create many jobs in one request (employer only). The body is a JSON array,
+    a CSV file with a header row, or NDJSON, using the JobCreateSerializer field
+    names. Any invalid row rejects the whole import with per-row errors, unless
+    ``?skip_invalid=true`` is given, in which case the valid rows are kept.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser]  # CSV/NDJSON bodies are streamed by job.bulk
+
+    def post(self, request, *args, **kwargs):
+        if not hasattr(request.user, 'employer_profile'):
+            raise PermissionDenied("Only employers can create jobs.")
+        skip_invalid = request.query_params.get('skip_invalid', '').lower() in ('1', 'true', 'yes')
+        try:
+            created, errors = import_jobs(parse_rows(request), request, skip_invalid=skip_invalid)
+        except BulkImportError as exc:
+            raise ValidationError({'detail': str(exc)})
+        response_status = status.HTTP_201_CREATED if created or not errors else status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'errors': errors}, status=response_status)
+
+
+class MyJobPostingsExportAPIView(generics.GenericAPIView):
+    """Stream the logged-in employer's jobs as ``?output=csv`` (default) or ``ndjson``."""
+    permission_classes = [IsAuthenticated]
+    # Column name -> Job field; names match JobCreateSerializer so exports re-import
+    columns = {
+        'id': 'id',
+        'title': 'title',
+        'description': 'description',
+        'job_type': 'type',
+        'skills_required': 'detailed_experience',
+        'education_experience': 'education',
+        'location': 'location',
+        'salary_range': 'salary_range',
+        'vacancies': 'vacancies',
+        'is_active': 'is_active',
+        'posted_on': 'posted_on',
+        'applications_count': 'applications_count',
+    }
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        if not hasattr(user, 'employer_profile'):
+            raise PermissionDenied("Only employers can export their job postings.")
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Must be one of: {list(EXPORT_FORMATS)}"})
+        rows = (
+            Job.objects.for_listing()
+            .filter(employer=user.employer_profile)
+            .order_by('-posted_on', '-id')
+            .values_list(*self.columns.values())
+            .iterator(chunk_size=2000)
+        )
+        return streaming_export(list(self.columns), rows, output, 'my-jobs')
 
 
 # ------------------------------
@@ -130,24 +223,31 @@ class ApplicationCreateAPIView(generics.CreateAPIView):
         serializer.save()
 
 
+@query_budget(4)
 class MyApplicationsAPIView(generics.ListAPIView):
 # ... (rest of the existing MyApplicationsAPIView) ...
     """List all applications submitted by the logged-in student"""
     serializer_class = ApplicationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ApplicationPagination
 
     def get_queryset(self):
         user = self.request.user
         if not hasattr(user, 'student_profile'):
             raise PermissionDenied("Only students can view their applications.")
-        return Application.objects.filter(applicant=user.student_profile).order_by('-applied_date')
+        return Application.objects.for_listing(user).filter(applicant=user.student_profile).order_by('-applied_date')
 
 
+@query_budget(5)
 class EmployerApplicationsAPIView(generics.ListAPIView):
 # ... (rest of the existing EmployerApplicationsAPIView) ...
-    """List all applications for a specific job (employer only)"""
+    """
+    List all applications for a specific job (employer only).
+    ``?search=`` keeps applications whose resume, cover letter or extra document mentions it.
+    """
     serializer_class = ApplicationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ApplicationPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -155,33 +255,156 @@ class EmployerApplicationsAPIView(generics.ListAPIView):
             raise PermissionDenied("Only employers can view job applications.")
         job_id = self.kwargs['job_id']
         job = get_object_or_404(Job, id=job_id, employer=user.employer_profile)
-        return Application.objects.filter(job=job).order_by('-applied_date')
+        queryset = Application.objects.for_listing(user).filter(job=job).order_by('-applied_date')
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = filter_by_document_text(queryset, APPLICATION_DOCUMENT_FIELDS, search)
+        return queryset
 
 
+class EmployerApplicationsExportAPIView(generics.GenericAPIView):
+    """
+    Stream every application for one of the employer's jobs as flat rows
+    (``?output=csv`` by default, or ``ndjson``). Optional filters: ``?status=``,
+    ``?applied_after=`` and ``?applied_before=`` (ISO date or datetime).
+    """
+    permission_classes = [IsAuthenticated]
+    # Column name -> Application field path
+    columns = {
+        'application_id': 'id',
+        'applied_date': 'applied_date',
+        'status': 'status',
+        'student_id': 'applicant__student_id',
+        'username': 'applicant__user__username',
+        'first_name': 'applicant__user__first_name',
+        'last_name': 'applicant__user__last_name',
+        'email': 'applicant__user__email',
+        'phone_number': 'applicant__user__phone_number',
+        'degree': 'applicant__degree',
+        'year_of_study': 'applicant__year_of_study',
+        'resume': 'resume',
+        'cover_letter': 'cover_letter',
+        'additional_documents': 'additional_documents',
+        'notes': 'notes',
+    }
+    file_columns = ('resume', 'cover_letter', 'additional_documents')
+    date_field = serializers.DateTimeField(input_formats=['iso-8601', '%Y-%m-%d'])
+
+    def get(self, request, job_id, *args, **kwargs):
+        user = request.user
+        if not hasattr(user, 'employer_profile'):
+            raise PermissionDenied("Only employers can export job applications.")
+        job = get_object_or_404(Job.objects.only('id'), id=job_id, employer=user.employer_profile)
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Must be one of: {list(EXPORT_FORMATS)}"})
+
+        applications = Application.objects.filter(job=job)
+        params = request.query_params
+        if params.get('status'):
+            applications = applications.filter(status=params['status'])
+        for param, lookup in (('applied_after', 'applied_date__gte'), ('applied_before', 'applied_date__lt')):
+            if params.get(param):
+                try:
+                    applications = applications.filter(**{lookup: self.date_field.run_validation(params[param])})
+                except serializers.ValidationError as exc:
+                    raise ValidationError({param: exc.detail})
+
+        rows = (
+            applications.order_by('-applied_date', '-id')
+            .values_list(*self.columns.values())
+            .iterator(chunk_size=2000)
+        )
+        return streaming_export(list(self.columns), self.with_file_urls(rows), output, f'job-{job.id}-applications')
+
+    def with_file_urls(self, rows):
+        media_url = self.request.build_absolute_uri(settings.MEDIA_URL)
+        file_positions = [list(self.columns).index(column) for column in self.file_columns]
+        for row in rows:
+            row = list(row)
+            for position in file_positions:
+                row[position] = f'{media_url}{row[position]}' if row[position] else ''
+            yield row
+
+
+@query_budget(3, methods=['PATCH', 'PUT'])
 class ApplicationStatusUpdateAPIView(generics.UpdateAPIView):
 # ... (rest of the existing ApplicationStatusUpdateAPIView) ...
     """Employers update the status or notes of an application"""
     serializer_class = ApplicationStatusUpdateSerializer
     permission_classes = [IsAuthenticated]
-    queryset = Application.objects.all()
+    queryset = Application.objects.select_related('job')
     lookup_url_kwarg = 'application_id'
 
     def perform_update(self, serializer):
-        application = self.get_object()
+        application = serializer.instance  # already fetched by UpdateAPIView.update()
         user = self.request.user
-        if not hasattr(user, 'employer_profile') or application.job.employer != user.employer_profile:
+        if not hasattr(user, 'employer_profile') or application.job.employer_id != user.employer_profile.id:
             raise PermissionDenied("You can only update applications for your own job postings.")
         serializer.save()
 
 
+@query_budget(5, methods=['POST'])
+class ApplicationBulkStatusUpdateAPIView(generics.GenericAPIView):
+    """
+    Move many applications to one status (employer only). Target them with
+    ``{"ids": [...]}`` or ``{"filter": {"job": 3, "status": "pending"}}``, plus
+    ``"status"`` and optional ``"notes"``. Authorization is one query joined to
+    the job's employer, the change is one UPDATE, and ids reports each
+    requested id as ``updated`` or ``not_found`` (missing or not yours).
+    """
+    serializer_class = ApplicationBulkStatusUpdateSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        user = request.user
+        if not hasattr(user, 'employer_profile'):
+            raise PermissionDenied("Only employers can update applications.")
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        applications = Application.objects.filter(job__employer=user.employer_profile)
+        if 'ids' in data:
+            applications = applications.filter(id__in=data['ids'])
+        else:
+            applications = applications.filter(job_id=data['filter']['job'])
+            if 'status' in data['filter']:
+                applications = applications.filter(status=data['filter']['status'])
+
+        changes = {'status': data['status']}
+        if 'notes' in data:
+            changes['notes'] = data['notes']
+        with transaction.atomic():
+            rows = list(applications.select_for_update().values_list('id', 'job_id'))
+            updated_ids = [row[0] for row in rows]
+            if updated_ids:
+                Application.objects.filter(id__in=updated_ids).update(**changes)
+                # queryset.update() skips the signals that keep cached jobs fresh
+                invalidate_jobs(*{row[1] for row in rows})
+
+        updated = set(updated_ids)
+        requested = data['ids'] if 'ids' in data else updated_ids
+        return Response({
+            'updated': len(updated),
+            'results': [
+                {'id': pk, 'result': 'updated' if pk in updated else 'not_found'}
+                for pk in dict.fromkeys(requested)
+            ],
+        })
+
+
+@query_budget(3)
 class ApplicationDetailAPIView(generics.RetrieveAPIView):
 # ... (rest of the existing ApplicationDetailAPIView) ...
     """Retrieve an application (student or employer)"""
     serializer_class = ApplicationSerializer
     permission_classes = [IsAuthenticated]
-    queryset = Application.objects.all()
     lookup_url_kwarg = 'application_id'
 
+    def get_queryset(self):
+        return Application.objects.for_listing(self.request.user)
+
     def get_object(self):
         application = super().get_object()
         user = self.request.user
@@ -193,26 +416,156 @@ class ApplicationDetailAPIView(generics.RetrieveAPIView):
         raise PermissionDenied("You do not have permission to view this application.")
 
 
+# ------------------------------
+# CANDIDATE MATCHING (see job.matching)
+# ------------------------------
+def match_limit(request):
+    serializer = MatchLimitSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data['limit']
+
+
+def with_scores(objects, matches):
+    """``objects`` (keyed by pk) in the order of ``matches``, each carrying ``match_score``."""
+    by_pk = {obj.pk: obj for obj in objects}
+    ranked = []
+    for pk, score in matches:
+        if pk in by_pk:  # deleted since its vector was loaded
+            by_pk[pk].match_score = score
+            ranked.append(by_pk[pk])
+    return ranked
+
+
+@query_budget(4)
+class RankedApplicantsAPIView(generics.GenericAPIView):
+    """The applications to one of the employer's jobs, best matching applicant first (``?limit=``)."""
+    serializer_class = RankedApplicationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        if not hasattr(request.user, 'employer_profile'):
+            raise PermissionDenied("Only employers can rank applicants.")
+        job = get_object_or_404(Job, pk=pk, employer=request.user.employer_profile)
+        ranked = []
+        for application, score in rank_applicants(job, match_limit(request)):
+            application.match_score = score
+            ranked.append(application)
+        return Response({'job': job.pk, 'results': self.get_serializer(ranked, many=True).data})
+
+
+@query_budget(6)
+class MatchedStudentsAPIView(generics.GenericAPIView):
+    """
+    The students across the platform whose profiles best match one of the
+    employer's jobs, other than those who applied (see RankedApplicantsAPIView).
+    """
+    serializer_class = MatchedStudentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        if not hasattr(request.user, 'employer_profile'):
+            raise PermissionDenied("Only employers can search for candidates.")
+        job = get_object_or_404(Job, pk=pk, employer=request.user.employer_profile)
+        matches = match_students(job, match_limit(request))
+        students = Student.objects.select_related('user').filter(pk__in=[pk for pk, _ in matches])
+        return Response({'job': job.pk, 'results': self.get_serializer(with_scores(students, matches), many=True).data})
+
+
+@query_budget(5)
+class MatchedJobsAPIView(generics.GenericAPIView):
+    """The active jobs that best match the logged-in student's profile."""
+    serializer_class = MatchedJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        student = requesting_student(request.user)
+        if student is None:
+            raise PermissionDenied("Only students can see matched jobs.")
+        matches = match_jobs(student, match_limit(request))
+        jobs = Job.objects.for_listing(request.user).filter(pk__in=[pk for pk, _ in matches])
+        return Response({'results': self.get_serializer(with_scores(jobs, matches), many=True).data})
+
+
+@query_budget(2)
+class RecommendedJobsAPIView(generics.GenericAPIView):
+    """
+    The logged-in student's precomputed feed (job.feeds), best fit first, without
+    jobs they applied to. Until their first feed is built, the newest jobs instead.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        student = requesting_student(request.user)
+        if student is None:
+            raise PermissionDenied("Only students have recommended jobs.")
+        limit = match_limit(request)
+        jobs = get_feed(student, request.user, limit)
+        personalized = bool(jobs) or RecommendedJob.objects.filter(student=student).exists()
+        if not personalized:
+            jobs = browse_jobs(request.user, {}).filter(user_has_applied=False)[:limit]
+        return Response({'personalized': personalized, 'results': self.get_serializer(jobs, many=True).data})
+
+
 # ------------------------------
 # EMPLOYER DASHBOARD STATS
 # ------------------------------
+@query_budget(3)
+@reads_from('replica')
 class JobStatsAPIView(generics.GenericAPIView):
 # ... (rest of the existing JobStatsAPIView) ...
-    """Return stats for an employer's jobs"""
+    """
+    Return stats for an employer's jobs: totals, per-job application counts
+    broken down by status, and applications per day over the last ``?days=``
+    (default 30). Two grouped queries regardless of how many jobs there are.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
         user = request.user
         if not hasattr(user, 'employer_profile'):
             raise PermissionDenied("Only employers can view job stats.")
-        jobs = Job.objects.filter(employer=user.employer_profile)
-        total_jobs = jobs.count()
-        active_jobs = jobs.filter(is_active=True).count()
-        total_applications = Application.objects.filter(job__in=jobs).count()
+        employer = user.employer_profile
+        statuses = [choice[0] for choice in Application.STATUS_CHOICES]
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            raise ValidationError({'days': 'Must be a whole number of days.'})
+
+        per_status = {
+            f'status_{status}': Count('applications', filter=Q(applications__status=status))
+            for status in statuses
+        }
+        rows = (
+            Job.objects.filter(employer=employer)
+            .order_by('-posted_on', '-id')
+            .values('id', 'title', 'is_active')
+            .annotate(applications_count=Count('applications'), **per_status)
+        )
+        jobs = []
+        by_status = dict.fromkeys(statuses, 0)
+        for row in rows:
+            job_statuses = {status: row.pop(f'status_{status}') for status in statuses}
+            for status, count in job_statuses.items():
+                by_status[status] += count
+            jobs.append({**row, 'by_status': job_statuses})
+
+        since = timezone.now() - timedelta(days=days)
+        per_day = (
+            Application.objects.filter(job__employer=employer, applied_date__gte=since)
+            .annotate(day=TruncDate('applied_date'))
+            .values('day')
+            .annotate(count=Count('id'))
+            .order_by('day')
+        )
+
         return Response({
-            'total_jobs': total_jobs,
-            'active_jobs': active_jobs,
-            'total_applications': total_applications,
+            'total_jobs': len(jobs),
+            'active_jobs': sum(1 for job in jobs if job['is_active']),
+            'total_applications': sum(job['applications_count'] for job in jobs),
+            'applications_by_status': by_status,
+            'jobs': jobs,
+            'applications_per_day': [{'date': row['day'], 'count': row['count']} for row in per_day],
         })
 
 
@@ -226,8 +579,12 @@ def job_api_root(request, format=None):
     return Response({
         'list_jobs': reverse('job-list', request=request, format=format),
         'create_job': reverse('job-create', request=request, format=format),
+        'bulk_import_jobs': reverse('job-bulk-import', request=request, format=format),
         'my_jobs': reverse('my-jobs', request=request, format=format),
+        'export_my_jobs': reverse('my-jobs-export', request=request, format=format),
         'job_stats': reverse('job-stats', request=request, format=format),
         'create_application': reverse('application-create', request=request, format=format),
         'my_applications': reverse('my-applications', request=request, format=format),
+        'matched_jobs': reverse('matched-jobs', request=request, format=format),
+        'recommended_jobs': reverse('recommended-jobs', request=request, format=format),
     })
\ No newline at end of file
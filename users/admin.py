@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Student, Employer
+from .models import User, Student, Employer, EmailOutbox
 
 # -------------------------
 # Inline for Student (optional, keep for editing via User)
@@ -66,3 +66,12 @@ class EmployerAdmin(admin.ModelAdmin):
     list_display = ("user", "employer_id", "company_name", "industry")
     list_filter = ("industry",)
     search_fields = ("user__username", "user__email", "company_name", "employer_id")
+
+# -------------------------
+# Outgoing Mail Queue
+# -------------------------
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject",)
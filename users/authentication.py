@@ -0,0 +1,141 @@
+"""
+Token authentication with the token -> user lookup served from the cache.
+
+DRF's TokenAuthentication joins ``authtoken_token`` to ``users_user`` on every
+request, and views then hit the database again for ``student_profile`` /
+``employer_profile``. Here the user is cached together with both profiles
+(loaded with select_related, so a missing profile is cached as well). A warm
+request needs no authentication queries at all. Cached entries are dropped
+by users.signals when the token is deleted or the user or a profile is saved.
+
+``User.last_seen`` is written at most once per ``AUTH_LAST_SEEN_INTERVAL``
+seconds per user, instead of on every request. ``last_login`` is left to
+real logins: password reset tokens hash it, so touching it on API activity
+would void every outstanding reset link.
+
+``authenticate_token_async`` does the same for the async views in
+job.async_views, which DRF's authentication classes cannot serve.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+TOKEN_CACHE_TIMEOUT = getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 60 * 15)
+LAST_SEEN_INTERVAL = getattr(settings, 'AUTH_LAST_SEEN_INTERVAL', 60 * 5)
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def user_token_cache_key(user_pk):
+    return f'auth:user-token:{user_pk}'
+
+
+def load_token_user(key):
+    """Resolve ``key`` to its user with both profiles attached, or None."""
+    user = cache.get(token_cache_key(key))
+    if user is None:
+        token = (
+            Token.objects.select_related('user__student_profile', 'user__employer_profile')
+            .filter(key=key)
+            .first()
+        )
+        if token is None:
+            return None
+        user = token.user
+        cache.set_many({
+            token_cache_key(key): user,
+            user_token_cache_key(user.pk): key,
+        }, TOKEN_CACHE_TIMEOUT)
+    return user
+
+
+def record_last_seen(user):
+    # cache.add only succeeds once per interval, which throttles the write
+    if cache.add(f'auth:seen:{user.pk}', 1, LAST_SEEN_INTERVAL):
+        User.objects.filter(pk=user.pk).update(last_seen=timezone.now())
+
+
+async def aload_token_user(key):
+    user = await cache.aget(token_cache_key(key))
+    if user is None:
+        token = await (
+            Token.objects.select_related('user__student_profile', 'user__employer_profile')
+            .filter(key=key)
+            .afirst()
+        )
+        if token is None:
+            return None
+        user = token.user
+        await cache.aset_many({
+            token_cache_key(key): user,
+            user_token_cache_key(user.pk): key,
+        }, TOKEN_CACHE_TIMEOUT)
+    return user
+
+
+async def arecord_last_seen(user):
+    if await cache.aadd(f'auth:seen:{user.pk}', 1, LAST_SEEN_INTERVAL):
+        await User.objects.filter(pk=user.pk).aupdate(last_seen=timezone.now())
+
+
+async def authenticate_token_async(request):
+    """The active user for an ``Authorization: Token <key>`` header, or None."""
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'token':
+        return None
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        return None
+    user = await aload_token_user(key)
+    if user is None or not user.is_active:
+        return None
+    await arecord_last_seen(user)
+    return user
+
+
+def issue_token(user, created=False):
+    """
+    Return the user's API token key, creating it if needed.
+
+    A freshly registered user cannot have a token yet, so ``created=True``
+    inserts directly instead of going through get_or_create's SELECT.
+    """
+    if created:
+        key = Token.objects.create(user=user).key
+    else:
+        key = cache.get(user_token_cache_key(user.pk))
+        if key is None:
+            key = Token.objects.get_or_create(user=user)[0].key
+    cache.set(user_token_cache_key(user.pk), key, TOKEN_CACHE_TIMEOUT)
+    return key
+
+
+def forget_user_tokens(user_pk, keys=None):
+    """Drop cached auth state for ``user_pk`` once the current transaction commits."""
+    if keys is None:
+        keys = list(Token.objects.filter(user_id=user_pk).values_list('key', flat=True))
+
+    def forget():
+        cache.delete_many([user_token_cache_key(user_pk), *(token_cache_key(key) for key in keys)])
+    transaction.on_commit(forget)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = load_token_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        record_last_seen(user)
+        return (user, Token(key=key, user=user))
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+UserModel = get_user_model()
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """
+    Authenticate with either a username or an email address.
+
+    The identifier is resolved in one query, served by the unique username
+    index and the case-insensitive unique email index. The password is hashed
+    exactly once whether or not the user exists, so a failed login costs the
+    same as a successful one and does not reveal which accounts exist.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        # ~Q(email='') repeats the partial index's condition; without it
+        # PostgreSQL cannot use the index and scans the whole table
+        email = Q(email__iexact=username) & ~Q(email='')
+        candidates = list(UserModel._default_manager.filter(Q(username=username) | email)[:2])
+        # A username match wins over somebody else's email address
+        user = next((c for c in candidates if c.username == username), candidates[0] if candidates else None)
+        if user is None:
+            # Run the hasher once anyway so timing doesn't leak unknown accounts
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,18 @@
+"""Cached profile reads for the users app (see backend.cache)."""
+from backend.cache import bump_namespace, get_or_set
+from .models import Employer
+
+
+def employer_namespace(pk):
+    return f'employer:{pk}'
+
+
+def get_cached_employer(pk):
+    return get_or_set(
+        employer_namespace(pk), ('profile',),
+        lambda: Employer.objects.select_related('user').filter(pk=pk).first(),
+    )
+
+
+def invalidate_employers(*pks):
+    bump_namespace(*(employer_namespace(pk) for pk in pks))
@@ -0,0 +1,158 @@
+"""
+Searchable text of CVs and application documents.
+
+Once the upload's transaction commits (``upload_cv``, a new application), its
+text is extracted by users.extraction in a pool of worker processes. Parsing
+zipped XML and PDFs is CPU-bound, so threads would queue on the GIL. The
+request never waits. The normalized text is stored in ``DocumentText`` once
+per distinct content, keyed by the SHA-256 that backend.storage already
+puts in blob names. A CV attached to fifty applications is read once.
+
+On PostgreSQL every row carries a GIN-indexed ``search_vector`` and
+:func:`filter_by_document_text` takes web-search syntax; other databases fall
+back to ``icontains``. ``DOCUMENT_EXTRACTION_WORKERS = 0`` extracts inline,
+as the tests do, and ``manage.py extract_documents`` backfills stored files.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.core.files import File
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Substr
+
+from backend.storage import BLOB_DIR, blob_digest, content_hash, document_storage
+from .extraction import extract_file
+from .models import DocumentText
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+
+_process_pool = None
+_dispatcher = None
+
+
+def extraction_workers():
+    return getattr(settings, 'DOCUMENT_EXTRACTION_WORKERS', 2)
+
+
+def new_process_pool(workers):
+    # spawn, not fork: request threads may hold locks a forked child would inherit
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), max_tasks_per_child=100,
+    )
+
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = new_process_pool(extraction_workers())
+    return _process_pool
+
+
+def _get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = ThreadPoolExecutor(max_workers=extraction_workers(), thread_name_prefix='documents')
+    return _dispatcher
+
+
+def document_digest(name, storage):
+    """SHA-256 of a stored document: read from a blob name, else hashed from the file."""
+    digest = blob_digest(name)
+    if digest is None:
+        with storage.open(name) as handle:
+            digest = content_hash(File(handle))
+    return digest
+
+
+def stored_digest(field):
+    """SQL expression for the content hash inside a blob name held in ``field``."""
+    return Substr(field, len(BLOB_DIR) + 5, 64)  # blobs/ab/<digest>.ext
+
+
+def store_text(digest, status, text):
+    DocumentText.objects.update_or_create(sha256=digest, defaults={'status': status, 'text': text})
+    if connections[DocumentText.objects.db].vendor == 'postgresql':
+        DocumentText.objects.filter(sha256=digest).update(search_vector=SearchVector('text', config=SEARCH_CONFIG))
+
+
+def extract_documents(names, executor=None):
+    """
+    Extract and store every document in ``names`` whose content has no
+    ``DocumentText`` yet, in ``executor`` if given; returns how many were stored.
+    """
+    storage = document_storage()
+    pending = {}
+    for name in names:
+        if not name:
+            continue
+        try:
+            pending.setdefault(document_digest(name, storage), name)
+        except OSError:
+            logger.warning('Document %s is missing; not extracted', name)
+    done = set(DocumentText.objects.filter(sha256__in=list(pending)).values_list('sha256', flat=True))
+    pending = {digest: name for digest, name in pending.items() if digest not in done}
+
+    paths = [storage.path(name) for name in pending.values()]
+    results = executor.map(extract_file, paths) if executor else map(extract_file, paths)
+    for digest, (status, text) in zip(pending, results):
+        store_text(digest, status, text)
+    return len(pending)
+
+
+def _extract_in_background(names):
+    global _process_pool
+    try:
+        extract_documents(names, _get_process_pool())
+    except BrokenProcessPool:
+        logger.exception('Document extraction worker died; restarting the pool')
+        _process_pool = None
+    except Exception:
+        logger.exception('Could not extract %s', names)
+    finally:
+        connections.close_all()  # this thread's connections; the dispatcher thread lives on
+
+
+def schedule_extraction(*names):
+    """Extract the text of the stored documents ``names`` once the transaction commits."""
+    names = [name for name in names if name]
+    if not names:
+        return
+
+    def submit():
+        if extraction_workers():
+            _get_dispatcher().submit(_extract_in_background, names)
+        else:
+            extract_documents(names)
+    transaction.on_commit(submit)
+
+
+def document_texts(names):
+    """``{name: text}`` for the blob names in ``names`` whose text has been extracted."""
+    digests = {name: blob_digest(name) for name in names if blob_digest(name)}
+    texts = dict(
+        DocumentText.objects.filter(sha256__in=set(digests.values()), status='extracted').values_list('sha256', 'text')
+    )
+    return {name: texts[digest] for name, digest in digests.items() if digest in texts}
+
+
+def search_documents(text, using='default'):
+    if connections[using].vendor == 'postgresql':
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        return DocumentText.objects.filter(search_vector=query)
+    return DocumentText.objects.filter(text__icontains=text)
+
+
+def filter_by_document_text(queryset, fields, text):
+    """Rows of ``queryset`` where the document in any of ``fields`` matches ``text``."""
+    matching = search_documents(text, queryset.db).values('sha256')
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}_digest__in': matching})
+    return queryset.alias(**{f'{field}_digest': stored_digest(field) for field in fields}).filter(condition)
@@ -0,0 +1,44 @@
+"""
+Accounts that share an email address, ignoring case.
+
+Migration 0006 adds the case-insensitive unique constraint on ``User.email``
+and refuses to run while such accounts exist. ``manage.py dedupe_user_emails``
+lists them and blanks the address on all but one account of each group.
+Grouping uses the database's own ``UPPER``, exactly as the constraint does.
+"""
+from django.db.models import Count, F
+from django.db.models.functions import Upper
+
+
+def duplicate_emails(users):
+    """
+    ``{normalized email: [accounts]}`` for every address used by more than one
+    account. Each account is a dict of ``pk``, ``username``, ``email`` and
+    ``last_login``, the one to keep first: the latest to log in, then the oldest.
+    ``users`` may be a historical model's manager, as in a migration.
+    """
+    shared = (
+        users.exclude(email='').annotate(key=Upper('email'))
+        .order_by().values('key').annotate(accounts=Count('pk')).filter(accounts__gt=1)
+        .values_list('key', flat=True)
+    )
+    rows = (
+        users.exclude(email='').annotate(key=Upper('email')).filter(key__in=list(shared))
+        .order_by('key', F('last_login').desc(nulls_last=True), 'pk')
+        .values('key', 'pk', 'username', 'email', 'last_login')
+    )
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.pop('key'), []).append(row)
+    return groups
+
+
+def describe(groups, limit=20):
+    """One line per group, for error messages and command output."""
+    lines = [
+        f"{accounts[0]['email']}: " + ', '.join(f"#{user['pk']} {user['username']}" for user in accounts)
+        for accounts in list(groups.values())[:limit]
+    ]
+    if len(groups) > limit:
+        lines.append(f'... and {len(groups) - limit} more addresses')
+    return lines
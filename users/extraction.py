@@ -0,0 +1,138 @@
+"""
+Plain text out of uploaded documents: DOCX, PPTX, PDF and plain text files.
+
+This module is deliberately free of Django imports so it can run in
+``spawn``-ed worker processes (see users.documents). :func:`extract_file` is
+the only entry point; it never raises, it returns ``(status, text)`` with
+status ``extracted``, ``unsupported`` or ``failed``. Errors nobody expected
+(an encrypted zip member, a PDF that trips up pypdf) are logged and reported
+as ``failed``, so one bad file never aborts a batch.
+
+DOCX and PPTX are zip archives of XML; their text runs are read with the
+standard library. PDF needs the optional ``pypdf`` package and is reported as
+``unsupported`` without it.
+"""
+import logging
+import os
+import re
+import unicodedata
+import zipfile
+from xml.etree import ElementTree
+
+MAX_TEXT_CHARS = 200_000
+# Refuse archives that inflate beyond this (zip bombs)
+MAX_UNCOMPRESSED_BYTES = 50 * 1024 * 1024
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DRAWING_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+TEXT_EXTENSIONS = {'.txt', '.md', '.csv'}
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentError(Exception):
+    """The file claims a supported format but cannot be read."""
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKC', text).replace('\x00', '')
+    lines = (re.sub(r'[^\S\n]+', ' ', line).strip() for line in text.splitlines())
+    text = re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+    return text[:MAX_TEXT_CHARS]
+
+
+def _open_archive(path):
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as exc:
+        raise DocumentError(str(exc))
+    if sum(info.file_size for info in archive.infolist()) > MAX_UNCOMPRESSED_BYTES:
+        archive.close()
+        raise DocumentError('archive expands beyond the size limit')
+    return archive
+
+
+def _xml_text(archive, member, text_tag, paragraph_tag, breaks=()):
+    parts = []
+    with archive.open(member) as xml:
+        for event, element in ElementTree.iterparse(xml, events=('end',)):
+            if element.tag == text_tag and element.text:
+                parts.append(element.text)
+            elif element.tag in breaks:
+                parts.append(' ' if element.tag.endswith('tab') else '\n')
+            elif element.tag == paragraph_tag:
+                parts.append('\n')
+                element.clear()
+    return ''.join(parts)
+
+
+def docx_text(path):
+    with _open_archive(path) as archive:
+        members = set(archive.namelist())
+        if 'word/document.xml' not in members:
+            raise DocumentError('not a Word document')
+        return _xml_text(
+            archive, 'word/document.xml', f'{WORD_NS}t', f'{WORD_NS}p',
+            breaks={f'{WORD_NS}tab', f'{WORD_NS}br', f'{WORD_NS}cr'},
+        )
+
+
+def pptx_text(path):
+    with _open_archive(path) as archive:
+        slides = [name for name in archive.namelist() if re.fullmatch(r'ppt/slides/slide\d+\.xml', name)]
+        if not slides:
+            raise DocumentError('not a PowerPoint presentation')
+        slides.sort(key=lambda name: int(re.search(r'\d+', name).group()))
+        return '\n\n'.join(
+            _xml_text(archive, name, f'{DRAWING_NS}t', f'{DRAWING_NS}p', breaks={f'{DRAWING_NS}br'})
+            for name in slides
+        )
+
+
+def pdf_text(path):
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+    try:
+        reader = PdfReader(path)
+        parts, size = [], 0
+        for page in reader.pages:
+            parts.append(page.extract_text() or '')
+            size += len(parts[-1])
+            if size > MAX_TEXT_CHARS:
+                break
+    except PdfReadError as exc:
+        raise DocumentError(str(exc))
+    return '\n\n'.join(parts)
+
+
+def plain_text(path):
+    with open(path, 'rb') as handle:
+        data = handle.read(MAX_TEXT_CHARS * 4)
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+EXTRACTORS = {
+    '.docx': docx_text,
+    '.pptx': pptx_text,
+    '.pdf': pdf_text,
+    **{extension: plain_text for extension in TEXT_EXTENSIONS},
+}
+
+
+def extract_file(path):
+    """``(status, normalized text)`` for the document at ``path``, chosen by its extension."""
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return 'unsupported', ''
+    try:
+        return 'extracted', normalize(extractor(path))
+    except ImportError:  # pypdf is not installed
+        return 'unsupported', ''
+    except (DocumentError, OSError, ElementTree.ParseError, ValueError, KeyError):
+        return 'failed', ''
+    except Exception:
+        logger.exception('Could not extract text from %s', path)
+        return 'failed', ''
@@ -0,0 +1,147 @@
+"""
+Resized renditions of student profile pictures.
+
+Uploads are stored as sent and the request returns straight away. Once the
+transaction commits, a small thread pool opens the original and writes each
+size in ``RENDITIONS`` as WebP plus a JPEG fallback. Pillow releases the GIL
+while decoding, resizing and encoding, so threads are enough. The paths
+are then recorded in ``Student.profile_picture_renditions``:
+
+    {"source": "profile_pics/me.jpg",
+     "avatar": {"webp": "...", "jpeg": "...", "width": 96, "height": 96}, ...}
+
+A job whose source picture was replaced in the meantime throws its output
+away. ``IMAGE_RENDITION_WORKERS = 0`` renders inline instead, as the tests do.
+"""
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Student
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height, crop to exactly that size)
+RENDITIONS = {
+    'avatar': (96, 96, True),
+    'card': (320, 320, False),
+    'full': (1280, 1280, False),
+}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+RENDITION_DIR = 'profile_pics/renditions'
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'IMAGE_RENDITION_WORKERS', 2)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='renditions')
+    return _executor
+
+
+def render(image):
+    """Yield ``(name, format, bytes, size)`` for every rendition of a PIL image."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    for name, (width, height, crop) in RENDITIONS.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+        webp = io.BytesIO()
+        resized.save(webp, 'WEBP', quality=WEBP_QUALITY, method=4)
+        yield name, 'webp', webp.getvalue(), resized.size
+
+        jpeg = io.BytesIO()
+        flat = resized
+        if resized.mode == 'RGBA':
+            flat = Image.new('RGB', resized.size, 'white')
+            flat.paste(resized, mask=resized.getchannel('A'))
+        flat.save(jpeg, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        yield name, 'jpeg', jpeg.getvalue(), resized.size
+
+
+def rendition_paths(renditions):
+    return [
+        path
+        for name, entry in (renditions or {}).items() if name in RENDITIONS
+        for key, path in entry.items() if key in ('webp', 'jpeg')
+    ]
+
+
+def delete_renditions(renditions):
+    for path in rendition_paths(renditions):
+        default_storage.delete(path)
+
+
+def generate_renditions(student_pk, source_name):
+    """Render ``source_name`` and record the result, unless the picture changed meanwhile."""
+    current = Student.objects.filter(pk=student_pk, profile_picture=source_name)
+    if not current.exists():
+        return None
+    stem = os.path.splitext(os.path.basename(source_name))[0][:40]
+    prefix = f'{RENDITION_DIR}/{student_pk}/{stem}-{uuid.uuid4().hex[:8]}'
+    renditions = {'source': source_name}
+    try:
+        with default_storage.open(source_name) as source, Image.open(source) as image:
+            for name, fmt, data, (width, height) in render(image):
+                path = default_storage.save(f'{prefix}-{name}.{"jpg" if fmt == "jpeg" else fmt}', ContentFile(data))
+                renditions.setdefault(name, {'width': width, 'height': height})[fmt] = path
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.exception('Could not render profile picture %s', source_name)
+        delete_renditions(renditions)
+        return None
+
+    if not current.update(profile_picture_renditions=renditions):  # replaced while rendering
+        delete_renditions(renditions)
+        return None
+    return renditions
+
+
+def _generate_in_worker(student_pk, source_name):
+    try:
+        generate_renditions(student_pk, source_name)
+    finally:
+        connections.close_all()  # this thread's connections; the pool thread lives on
+
+
+def schedule_renditions(student):
+    """Render ``student.profile_picture`` off the request path once the transaction commits."""
+    pk, source_name = student.pk, student.profile_picture.name
+
+    def submit():
+        if getattr(settings, 'IMAGE_RENDITION_WORKERS', 2):
+            _get_executor().submit(_generate_in_worker, pk, source_name)
+        else:
+            generate_renditions(pk, source_name)
+    transaction.on_commit(submit)
+
+
+def replace_profile_picture(student, upload):
+    """Store a new upload, drop the old picture and renditions, and queue new renditions."""
+    old_picture = student.profile_picture.name if student.profile_picture else None
+    old_renditions = student.profile_picture_renditions
+    student.profile_picture = upload
+    student.profile_picture_renditions = {}
+    student.save(update_fields=['profile_picture', 'profile_picture_renditions'])
+
+    def cleanup():
+        if old_picture and old_picture != student.profile_picture.name:
+            default_storage.delete(old_picture)
+        delete_renditions(old_renditions)
+    transaction.on_commit(cleanup)
+    schedule_renditions(student)
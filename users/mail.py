@@ -0,0 +1,110 @@
+"""
+Outbound mail queue.
+
+Request handlers call ``enqueue_email`` which only writes an ``EmailOutbox``
+row. ``deliver_pending`` (run by ``manage.py send_queued_emails``) claims a
+batch of due messages in a short transaction. After the commit it sends them
+over one SMTP connection, so no row lock is held during network I/O. A failed
+message is retried with exponential backoff until ``max_attempts`` is
+reached, and is then marked failed. A connection that cannot be opened
+counts as a failed attempt for every message in the batch.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+# How long a claimed batch stays hidden from other workers
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None):
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(minutes=min(2 ** attempts, 60))
+
+
+def claim_batch(batch_size):
+    """
+    Lock up to ``batch_size`` due messages, push their ``send_after`` past the
+    claim lease and commit. Other workers skip them meanwhile. If this worker
+    dies mid-send, they come due again once the lease runs out.
+    """
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", send_after__lte=timezone.now())
+            .order_by("send_after", "id")[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[item.pk for item in batch]).update(
+                send_after=timezone.now() + CLAIM_LEASE
+            )
+    return batch
+
+
+def record_failure(item, exc, max_attempts):
+    item.last_error = f"{type(exc).__name__}: {exc}"
+    if item.attempts >= max_attempts:
+        item.status = "failed"
+    else:
+        item.send_after = timezone.now() + retry_delay(item.attempts)
+
+
+def deliver_pending(batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS, connection=None):
+    """Send one batch of due messages; returns ``(sent, failed)`` counts."""
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    # Network I/O happens outside any transaction, with no row locks held
+    connection = connection or get_connection(fail_silently=False)
+    for item in batch:
+        item.attempts += 1
+    try:
+        connection.open()
+    except Exception as exc:
+        # Could not reach the server: an attempt for every message in the batch
+        logger.warning("SMTP connection failed: %s", exc)
+        for item in batch:
+            record_failure(item, exc, max_attempts)
+    else:
+        try:
+            for item in batch:
+                message = EmailMessage(
+                    item.subject, item.body, item.from_email or None, item.recipients, connection=connection
+                )
+                try:
+                    message.send()
+                except Exception as exc:
+                    record_failure(item, exc, max_attempts)
+                else:
+                    item.status = "sent"
+                    item.sent_at = timezone.now()
+                    item.last_error = ""
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                logger.warning("Could not close the SMTP connection", exc_info=True)
+
+    EmailOutbox.objects.bulk_update(batch, ["status", "attempts", "last_error", "send_after", "sent_at"])
+    sent = sum(item.status == "sent" for item in batch)
+    failed = sum(item.status == "failed" for item in batch)
+    return sent, failed
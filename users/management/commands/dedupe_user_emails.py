@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from users.authentication import forget_user_tokens
+from users.emails import describe, duplicate_emails
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Find accounts whose email addresses differ only in case and blank the address on all "
+        "but the most recently used account of each group, so the unique email constraint can apply."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List the shared addresses without changing any account.")
+
+    def handle(self, *args, **options):
+        # Only these columns are read or written, so this also runs before later migrations
+        groups = duplicate_emails(User.objects)
+        if not groups:
+            self.stdout.write("No shared email addresses.")
+            return
+        for line in describe(groups, limit=len(groups)):
+            self.stdout.write(line)
+        duplicates = [user["pk"] for accounts in groups.values() for user in accounts[1:]]
+        if options["dry_run"]:
+            self.stdout.write(f"{len(groups)} shared addresses. Would blank the email of {len(duplicates)} accounts.")
+            return
+        User.objects.filter(pk__in=duplicates).update(email="")
+        for pk in duplicates:
+            forget_user_tokens(pk)  # cached users carry the old address
+        self.stdout.write(
+            f"{len(groups)} shared addresses. Blanked the email of {len(duplicates)} accounts; "
+            "they can still sign in with their username."
+        )
@@ -0,0 +1,43 @@
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from backend.storage import document_storage
+from users.documents import extract_documents, new_process_pool
+from users.models import DocumentText
+
+
+class Command(BaseCommand):
+    help = "Extract the text of every stored CV and application document that has none yet, in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--retry", action="store_true",
+            help="Also redo documents that previously failed or had an unsupported format.",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry"]:
+            DocumentText.objects.exclude(status="extracted").delete()
+
+        names = set()
+        for model, field in document_storage().referencing_fields():
+            rows = model._default_manager.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+            names.update(rows.values_list(field, flat=True).distinct())
+        names = iter(sorted(names))
+
+        stored = 0
+        with new_process_pool(max(1, options["workers"])) as pool:
+            while batch := list(islice(names, options["batch_size"])):
+                stored += extract_documents(batch, pool)
+
+        counts = dict(DocumentText.objects.order_by().values_list("status").annotate(total=Count("pk")))
+        self.stdout.write(
+            f"Extracted {stored} new documents. "
+            + ", ".join(f"{total} {status}" for status, total in sorted(counts.items()))
+            + "."
+        )
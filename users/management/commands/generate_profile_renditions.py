@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from users.images import delete_renditions, generate_renditions
+from users.models import Student
+
+
+class Command(BaseCommand):
+    help = "Render profile picture sizes for students whose picture has no renditions yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-render every picture, replacing existing renditions.")
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        students = Student.objects.exclude(profile_picture="").exclude(profile_picture__isnull=True)
+        if not options["all"]:
+            students = students.filter(profile_picture_renditions={})
+        rows = list(students.values_list("pk", "profile_picture", "profile_picture_renditions"))
+
+        def render(row):
+            pk, source, old = row
+            try:
+                renditions = generate_renditions(pk, source)
+                if renditions:
+                    delete_renditions(old)
+                return renditions is not None
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            done = sum(pool.map(render, rows))
+        self.stdout.write(f"Rendered {done} of {len(rows)} profile pictures.")
@@ -0,0 +1,41 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.mail import DEFAULT_BATCH_SIZE, DEFAULT_MAX_ATTEMPTS, deliver_pending
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deliver queued EmailOutbox messages, batching them over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running, polling every INTERVAL seconds when the queue is empty (default: drain once and exit).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.drain(options["batch_size"], options["max_attempts"])
+            except Exception:
+                if not options["interval"]:
+                    raise
+                # e.g. the database is briefly unreachable; try again next round
+                logger.exception("Delivering queued email failed")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    def drain(self, batch_size, max_attempts):
+        while True:
+            sent, failed = deliver_pending(batch_size, max_attempts)
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}.")
+            if sent + failed < batch_size:
+                return
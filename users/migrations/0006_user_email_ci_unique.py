@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:44
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+from users.emails import describe, duplicate_emails
+
+
+def check_duplicate_emails(apps, schema_editor):
+    # The constraint below would fail with a bare IntegrityError; name the accounts instead
+    User = apps.get_model('users', 'User')
+    groups = duplicate_emails(User.objects.using(schema_editor.connection.alias))
+    if groups:
+        raise RuntimeError(
+            'Some accounts share an email address that differs only in case, so '
+            'users_user_email_ci_unique cannot be added. Run "manage.py dedupe_user_emails" '
+            '(--dry-run to only list them) and migrate again.\n' + '\n'.join(describe(groups))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0005_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('email'), condition=models.Q(('email', ''), _negated=True), name='users_user_email_ci_unique'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:10
+
+import backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_student_profile_picture_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='cv',
+            field=models.FileField(blank=True, null=True, storage=backend.storage.document_storage, upload_to='cvs/'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:19
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    # tsvector and GIN are PostgreSQL-only; other backends search with LIKE
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS users_documenttext_search_vector_gin '
+        'ON users_documenttext USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS users_documenttext_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_document_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('extracted', 'Extracted'), ('unsupported', 'Unsupported format'), ('failed', 'Failed')], max_length=12)),
+                ('text', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,5 +1,10 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from backend.storage import document_storage
 
 
 class User(AbstractUser):
@@ -17,6 +22,19 @@ class User(AbstractUser):
 
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES, blank=True, null=True)
+    # Latest authenticated API request, throttled (users.authentication).
+    # Kept apart from last_login, which password reset tokens hash.
+    last_seen = models.DateTimeField(blank=True, null=True, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # One account per email, case-insensitively; also indexes email logins
+            models.UniqueConstraint(
+                Upper("email"),
+                condition=~models.Q(email=""),
+                name="users_user_email_ci_unique",
+            ),
+        ]
 
     def is_student(self):
         return self.role == "student"
@@ -30,7 +48,7 @@ class Student(models.Model):
     student_id = models.CharField(max_length=50, unique=True)
     degree = models.CharField(max_length=100, blank=True)
     year_of_study = models.CharField(max_length=50, blank=True)
-    cv = models.FileField(upload_to="cvs/", blank=True, null=True)
+    cv = models.FileField(upload_to="cvs/", storage=document_storage, blank=True, null=True)
 
     bio = models.TextField(blank=True)
     address = models.CharField(max_length=255, blank=True, null=True)
@@ -39,6 +57,8 @@ class Student(models.Model):
     zip = models.CharField(max_length=20, blank=True, null=True)
 
     profile_picture = models.ImageField(upload_to="profile_pics/", blank=True, null=True)
+    # Resized WebP/JPEG copies of profile_picture, written by users.images
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.user.username or f"Student ID {self.student_id}"
@@ -53,3 +73,50 @@ class Employer(models.Model):
 
     def __str__(self):
         return self.company_name or self.user.username
+
+
+class EmailOutbox(models.Model):
+    """Outgoing mail queued by request handlers and delivered by ``manage.py send_queued_emails``."""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "send_after"], name="emailoutbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class DocumentText(models.Model):
+    """Normalized text of one stored document, kept once per distinct content (see users.documents)."""
+    STATUS_CHOICES = [
+        ("extracted", "Extracted"),
+        ("unsupported", "Unsupported format"),
+        ("failed", "Failed"),
+    ]
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    text = models.TextField(blank=True)
+    # GIN-indexed on PostgreSQL, maintained by users.documents
+    search_vector = SearchVectorField(null=True, editable=False)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.status}, {len(self.text)} chars)"
@@ -1,6 +1,10 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from backend.storage import release_on_commit
+from .documents import schedule_extraction
+from .images import RENDITIONS
 from .models import Student, Employer 
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_str
@@ -9,12 +13,27 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+def validate_unique_email(value, instance=None):
+    """Emails are unique case-insensitively (see users_user_email_ci_unique)."""
+    if value:
+        others = User.objects.filter(email__iexact=value)
+        if instance is not None:
+            others = others.exclude(pk=instance.pk)
+        if others.exists():
+            raise serializers.ValidationError("A user with this email already exists.")
+    return value
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         # Ensure 'phone_number' and 'gender' are included if you want them visible
         fields = ["id", "username", "email", "first_name", "last_name", "role", "phone_number", "gender"]
 
+    def validate_email(self, value):
+        return validate_unique_email(value, self.instance)
+
 
 class StudentSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -29,11 +48,31 @@ class StudentSerializer(serializers.ModelSerializer):
     def get_profile_picture(self, obj):
         request = self.context.get('request')
         if obj.profile_picture and request:
-            return request.build_absolute_uri(obj.profile_picture.url)
+            # The compressed full-size rendition once it exists, else the upload
+            full = (obj.profile_picture_renditions or {}).get('full')
+            path = full['jpeg'] if full else obj.profile_picture.name
+            return request.build_absolute_uri(default_storage.url(path))
         return None
     
     profile_picture = serializers.SerializerMethodField() 
 
+    def get_profile_picture_renditions(self, obj):
+        """{"avatar": {"webp": url, "jpeg": url, "width": 96, "height": 96}, ...}; empty until rendered."""
+        request = self.context.get('request')
+        if not request or not obj.profile_picture:
+            return {}
+        return {
+            name: {
+                **entry,
+                'webp': request.build_absolute_uri(default_storage.url(entry['webp'])),
+                'jpeg': request.build_absolute_uri(default_storage.url(entry['jpeg'])),
+            }
+            for name, entry in (obj.profile_picture_renditions or {}).items()
+            if name in RENDITIONS
+        }
+
+    profile_picture_renditions = serializers.SerializerMethodField()
+
 
     def update(self, instance, validated_data):
         user_data_to_update = {}
@@ -70,7 +109,8 @@ class StudentSerializer(serializers.ModelSerializer):
             "city",
             "province",
             "zip",
-            "profile_picture"
+            "profile_picture",
+            "profile_picture_renditions",
         ]
 
 
@@ -184,6 +224,9 @@ class RegisterSerializer(serializers.ModelSerializer):
 
         return user
     
+    def validate_email(self, value):
+        return validate_unique_email(value)
+
     def validate(self, data):
         if not data.get("role"):
             raise serializers.ValidationError("Role is required.")
@@ -236,7 +279,7 @@ class ForgotPasswordSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
     def validate_email(self, value):
-        if not User.objects.filter(email=value).exists():
+        if not User.objects.filter(email__iexact=value).exists():
             raise serializers.ValidationError("No user is registered with this email.")
         return value
 
@@ -274,6 +317,10 @@ class StudentCVUploadSerializer(serializers.ModelSerializer):
         fields = ["cv"]
 
     def update(self, instance, validated_data):
+        old_cv = instance.cv.name if instance.cv else None
         instance.cv = validated_data.get("cv", instance.cv)
         instance.save()
+        if old_cv != instance.cv.name:
+            release_on_commit(old_cv)
+        schedule_extraction(instance.cv.name)
         return instance
\ No newline at end of file
@@ -1,8 +1,14 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_login_failed
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.conf import settings
+from rest_framework.authtoken.models import Token
+from backend.metrics import logins_failed
+from backend.storage import release_on_commit
 from .models import User, Student, Employer
+from .cache import invalidate_employers
+from .authentication import forget_user_tokens
 
 
 # @receiver(post_save, sender=User)
@@ -18,3 +24,60 @@ from .models import User, Student, Employer
 #             [instance.email],
 #             fail_silently=False,
 #         )
+
+
+@receiver(post_save, sender=Employer)
+@receiver(post_delete, sender=Employer)
+def invalidate_employer_cache(sender, instance, **kwargs):
+    invalidate_employers(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_employer_cache(sender, instance, raw=False, **kwargs):
+    # EmployerSerializer renders the user's name, email and phone number
+    if raw or not instance.is_employer():
+        return
+    pks = list(Employer.objects.filter(user=instance).values_list('pk', flat=True))
+    if pks:
+        invalidate_employers(*pks)
+
+
+# ------------------------------
+# CACHED TOKEN AUTHENTICATION
+# ------------------------------
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    # logout
+    forget_user_tokens(instance.user_id, keys=[instance.key])
+
+
+@receiver(post_save, sender=User)
+def forget_updated_user(sender, instance, created=False, raw=False, **kwargs):
+    # profile edits, password changes and resets all save the user
+    if raw or created:
+        return
+    forget_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Employer)
+@receiver(post_delete, sender=Employer)
+def forget_profile_user(sender, instance, raw=False, **kwargs):
+    # the cached user carries its student/employer profile
+    if raw:
+        return
+    forget_user_tokens(instance.user_id)
+
+
+@receiver(user_login_failed)
+def count_failed_login(sender, credentials, request=None, **kwargs):
+    logins_failed.inc()
+
+
+# ------------------------------
+# DOCUMENT BLOBS
+# ------------------------------
+@receiver(post_delete, sender=Student)
+def release_student_cv(sender, instance, **kwargs):
+    release_on_commit(instance.cv.name if instance.cv else None)
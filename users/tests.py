@@ -0,0 +1,438 @@
+import importlib
+import os
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import zipfile
+from io import BytesIO, StringIO
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+from django.apps import apps
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from backend.testing import QueryBudgetMixin
+
+from .documents import document_texts, extract_documents
+from .extraction import DRAWING_NS, WORD_NS, extract_file
+from .images import RENDITIONS, generate_renditions, rendition_paths
+from .mail import deliver_pending, enqueue_email
+from .models import DocumentText, Employer, User, Student, EmailOutbox
+from .serializers import StudentSerializer
+
+
+# ------------------------------
+# OUTBOUND MAIL QUEUE
+# ------------------------------
+class EmailOutboxTests(APITestCase):
+    def setUp(self):
+        User.objects.create_user(username="thandi", email="thandi@example.com", password="pass12345", role="student")
+
+    def request_reset(self):
+        return self.client.post(reverse("users:forgot_password"), {"email": "thandi@example.com"})
+
+    def test_forgot_password_only_enqueues(self):
+        self.assertEqual(self.request_reset().status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = EmailOutbox.objects.get()
+        self.assertEqual((queued.status, queued.recipients), ("pending", ["thandi@example.com"]))
+
+    def test_worker_delivers_batch(self):
+        for _ in range(3):
+            self.request_reset()
+        self.assertEqual(deliver_pending(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("/reset-password/", mail.outbox[0].body)
+        self.assertEqual(EmailOutbox.objects.filter(status="sent").count(), 3)
+        self.assertEqual(deliver_pending(), (0, 0))
+
+    def test_failed_delivery_is_retried_then_abandoned(self):
+        self.request_reset()
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=SMTPServerDisconnected("gone")):
+            self.assertEqual(deliver_pending(max_attempts=2), (0, 0))
+            queued = EmailOutbox.objects.get()
+            self.assertEqual((queued.status, queued.attempts), ("pending", 1))
+            EmailOutbox.objects.update(send_after=queued.created_at)
+            self.assertEqual(deliver_pending(max_attempts=2), (0, 1))
+        self.assertEqual(EmailOutbox.objects.get().status, "failed")
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Just enough of an SMTP server on localhost to receive messages; no auth, no TLS."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPStubHandler)
+        self.connections = 0
+        self.messages = []
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stub ready")
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250 stub")
+            elif command == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                lines = []
+                for data in self.rfile:
+                    if data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data)
+                self.server.messages.append(b"".join(lines).decode())
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # MAIL FROM, RCPT TO, RSET, NOOP
+                self.reply("250 ok")
+
+
+class SMTPDeliveryTests(APITestCase):
+    """deliver_pending against a real SMTP conversation on localhost."""
+
+    def setUp(self):
+        self.smtp = SMTPStub()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        self.enterContext(override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=self.smtp.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="", EMAIL_TIMEOUT=5,
+        ))
+        for number in range(3):
+            enqueue_email(f"Reset {number}", "Follow the link.", ["thandi@example.com"])
+
+    def test_batch_is_sent_over_one_connection(self):
+        self.assertEqual(deliver_pending(), (3, 0))
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 3)
+        self.assertIn("Subject: Reset 0", self.smtp.messages[0])
+        self.assertEqual(EmailOutbox.objects.filter(status="sent").count(), 3)
+
+    def test_unreachable_server_counts_as_an_attempt(self):
+        with override_settings(EMAIL_PORT=self.closed_port()), self.assertLogs("users.mail", "WARNING"):
+            self.assertEqual(deliver_pending(), (0, 0))
+        for queued in EmailOutbox.objects.all():
+            self.assertEqual((queued.status, queued.attempts), ("pending", 1))
+            self.assertIn("ConnectionRefusedError", queued.last_error)
+            self.assertGreater(queued.send_after, timezone.now())
+        # Backed off: nothing is due, so nothing is retried right away
+        self.assertEqual(deliver_pending(), (0, 0))
+        self.assertEqual(self.smtp.connections, 0)
+
+    def test_worker_keeps_running_after_an_error(self):
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                raise KeyboardInterrupt
+
+        with mock.patch("users.management.commands.send_queued_emails.deliver_pending",
+                        side_effect=[DatabaseError("down"), (3, 0), (0, 0)]), \
+                mock.patch("users.management.commands.send_queued_emails.time.sleep", side_effect=sleep), \
+                self.assertLogs("users.management.commands.send_queued_emails", "ERROR"):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("send_queued_emails", "--interval", "1", "--batch-size", "3", stdout=StringIO())
+        self.assertEqual(sleeps, [1, 1])
+
+    @staticmethod
+    def closed_port():
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            return probe.getsockname()[1]
+
+
+# ------------------------------
+# LOGIN
+# ------------------------------
+class UsernameOrEmailLoginTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="thandi", email="Thandi@Example.com", password="pass12345", role="student"
+        )
+
+    def login(self, identifier, password="pass12345"):
+        return self.client.post(reverse("users:login"), {"username": identifier, "password": password})
+
+    def test_login_with_username_or_email(self):
+        self.assertEqual(self.login("thandi").status_code, 200)
+        self.assertEqual(self.login("thandi@example.com").status_code, 200)
+
+    def test_bad_credentials(self):
+        self.assertEqual(self.login("thandi@example.com", "wrong").status_code, 400)
+        self.assertEqual(self.login("nobody@example.com").status_code, 400)
+
+    def test_lookup_is_a_single_query_and_a_single_hash(self):
+        with mock.patch("django.contrib.auth.hashers.PBKDF2PasswordHasher.encode",
+                        wraps=lambda *a, **k: "") as encode:
+            with self.assertNumQueries(1):
+                self.assertEqual(self.login("nobody@example.com").status_code, 400)
+        self.assertEqual(encode.call_count, 1)
+
+    def test_register_rejects_duplicate_email(self):
+        response = self.client.post(reverse("users:register"), {
+            "username": "other", "email": "THANDI@example.com", "password": "pass12345",
+            "role": "employer", "company_name": "Acme", "industry": "Tech",
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.data)
+
+
+class DuplicateEmailTests(APITestCase):
+    """Accounts created before migration 0006 added the case-insensitive unique email constraint."""
+
+    def setUp(self):
+        # Rolled back with the test's transaction
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX users_user_email_ci_unique")
+        User.objects.create_user(username="old", email="thandi@example.com")
+        recent = User.objects.create_user(username="recent", email="Thandi@example.com")
+        User.objects.filter(pk=recent.pk).update(last_login=timezone.now())
+        User.objects.create_user(username="other", email="other@example.com")
+        self.migration = importlib.import_module("users.migrations.0006_user_email_ci_unique")
+
+    def check_migration(self):
+        self.migration.check_duplicate_emails(apps, mock.Mock(connection=connection))
+
+    def test_migration_names_the_conflicting_accounts(self):
+        with self.assertRaisesRegex(RuntimeError, r"dedupe_user_emails[\s\S]*#\d+ recent, #\d+ old"):
+            self.check_migration()
+
+    def test_dedupe_command_keeps_the_most_recently_used_account(self):
+        out = StringIO()
+        call_command("dedupe_user_emails", "--dry-run", stdout=out)
+        self.assertIn("Would blank the email of 1 accounts.", out.getvalue())
+        self.assertEqual(User.objects.filter(email="").count(), 0)
+
+        call_command("dedupe_user_emails", stdout=StringIO())
+        self.assertEqual(User.objects.get(username="old").email, "")
+        self.assertEqual(User.objects.get(username="recent").email, "Thandi@example.com")
+        self.check_migration()  # nothing left to block the constraint
+
+
+# ------------------------------
+# PROFILE PICTURE RENDITIONS
+# ------------------------------
+@override_settings(IMAGE_RENDITION_WORKERS=0)
+class ProfilePictureRenditionTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        user = User.objects.create_user(username="thandi", password="pass12345", role="student")
+        self.student = Student.objects.create(user=user, student_id="STU1")
+        self.client.force_authenticate(user=user)
+
+    def upload(self, size=(2400, 1600), name="phone.jpg"):
+        buffer = BytesIO()
+        Image.new("RGB", size, "teal").save(buffer, "JPEG")
+        picture = SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("users:upload-profile-picture"), {"profile_picture": picture})
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+        return self.student.profile_picture_renditions
+
+    def test_upload_renders_every_size(self):
+        renditions = self.upload()
+        self.assertEqual(set(renditions) - {"source"}, set(RENDITIONS))
+        self.assertEqual((renditions["avatar"]["width"], renditions["avatar"]["height"]), (96, 96))
+        self.assertEqual((renditions["full"]["width"], renditions["full"]["height"]), (1280, 853))
+        with default_storage.open(renditions["card"]["webp"]) as card:
+            self.assertEqual(Image.open(card).format, "WEBP")
+
+        data = StudentSerializer(self.student, context={"request": RequestFactory().get("/")}).data
+        self.assertTrue(data["profile_picture_renditions"]["avatar"]["jpeg"].startswith("http://testserver/media/"))
+        self.assertTrue(data["profile_picture"].endswith(renditions["full"]["jpeg"]))
+
+    def test_replacing_a_picture_removes_old_files(self):
+        first = self.upload(name="first.jpg")
+        old_files = [first["source"], *rendition_paths(first)]
+        second = self.upload(name="second.jpg")
+        self.assertFalse(any(default_storage.exists(path) for path in old_files))
+        self.assertTrue(all(default_storage.exists(path) for path in rendition_paths(second)))
+
+    def test_stale_job_discards_its_output(self):
+        first = self.upload(name="first.jpg")
+        self.upload(name="second.jpg")
+        self.assertIsNone(generate_renditions(self.student.pk, first["source"]))
+        renditions_dir = os.path.join(self.media, "profile_pics", "renditions", str(self.student.pk))
+        self.assertEqual(len(os.listdir(renditions_dir)), 2 * len(RENDITIONS))
+
+
+# ------------------------------
+# DOCUMENT TEXT EXTRACTION
+# ------------------------------
+def make_docx(*paragraphs):
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    return make_zip({"word/document.xml": f'<w:document xmlns:w="{WORD_NS[1:-1]}"><w:body>{body}</w:body></w:document>'})
+
+
+def make_pptx(*slides):
+    return make_zip({
+        f"ppt/slides/slide{number}.xml": f'<p:sld xmlns:a="{DRAWING_NS[1:-1]}" xmlns:p="urn:p"><a:p><a:r><a:t>{text}</a:t></a:r></a:p></p:sld>'
+        for number, text in enumerate(slides, start=1)
+    })
+
+
+def make_zip(members):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def damage_zip(data, encrypted=False, method=None):
+    # Rewrite the member's headers: set the encryption flag or an unsupported compression method
+    data = bytearray(data)
+    for signature, flags in ((b"PK\x03\x04", 6), (b"PK\x01\x02", 8)):
+        offset = data.find(signature) + flags
+        if encrypted:
+            data[offset] |= 0x1
+        if method is not None:
+            data[offset + 2:offset + 4] = method.to_bytes(2, "little")
+    return bytes(data)
+
+
+def make_pdf(text):
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 6\n0000000000 65535 f \n" + b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return pdf + b"trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % xref
+
+
+@override_settings(DOCUMENT_EXTRACTION_WORKERS=0)
+class DocumentExtractionTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        user = User.objects.create_user(username="thandi", password="pass12345", role="student")
+        self.student = Student.objects.create(user=user, student_id="STU1")
+        self.client.force_authenticate(user=user)
+
+    def write(self, name, content):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as handle:
+            handle.write(content)
+        return path
+
+    def test_formats(self):
+        cases = {
+            "cv.docx": (make_docx("Python  developer", "Django REST"), ("extracted", "Python developer\nDjango REST")),
+            "deck.pptx": (make_pptx("Merge sort", "Quick sort"), ("extracted", "Merge sort\n\nQuick sort")),
+            "cv.pdf": (make_pdf("Kubernetes and Terraform"), ("extracted", "Kubernetes and Terraform")),
+            "notes.txt": ("Café notes\n\n\n\nend".encode(), ("extracted", "Café notes\n\nend")),
+            "broken.docx": (b"not a zip", ("failed", "")),
+            "legacy.doc": (b"\xd0\xcf\x11\xe0", ("unsupported", "")),
+        }
+        for name, (content, expected) in cases.items():
+            with self.subTest(name):
+                self.assertEqual(extract_file(self.write(name, content)), expected)
+
+    def test_unexpected_errors_fail_the_file_not_the_batch(self):
+        cases = {
+            "encrypted.docx": damage_zip(make_docx("Secret"), encrypted=True),  # RuntimeError
+            "deflate64.docx": damage_zip(make_docx("Packed"), method=9),  # NotImplementedError
+        }
+        for name, content in cases.items():
+            with self.subTest(name), self.assertLogs("users.extraction", "ERROR"):
+                self.assertEqual(extract_file(self.write(name, content)), ("failed", ""))
+
+    def upload_cv(self, content, name="cv.docx"):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("users:upload_cv"), {"cv": SimpleUploadedFile(name, content)})
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+        return self.student.cv.name
+
+    def test_upload_cv_extracts_once_per_content(self):
+        name = self.upload_cv(make_docx("Data analyst", "SQL and Power BI"))
+        document = DocumentText.objects.get()
+        self.assertTrue(name.endswith(f"{document.sha256}.docx"))
+        self.assertEqual(document.text, "Data analyst\nSQL and Power BI")
+        self.assertEqual(document_texts([name]), {name: document.text})
+        self.upload_cv(make_docx("Data analyst", "SQL and Power BI"), name="copy.docx")
+        self.assertEqual(DocumentText.objects.count(), 1)
+        self.assertEqual(extract_documents([name]), 0)  # already stored
+
+    def test_backfill_command(self):
+        self.write("cvs/old.docx", make_docx("Legacy CV"))
+        self.write("cvs/broken.docx", b"not a zip")
+        Student.objects.filter(pk=self.student.pk).update(cv="cvs/old.docx")
+        other = Student.objects.create(
+            user=User.objects.create_user(username="sipho", password="pass12345", role="student"),
+            student_id="STU2", cv="cvs/broken.docx",
+        )
+        out = StringIO()
+        call_command("extract_documents", "--workers", "2", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Extracted 2 new documents. 1 extracted, 1 failed.")
+        self.assertEqual(DocumentText.objects.get(status="extracted").text, "Legacy CV")
+
+        self.write("cvs/broken.docx", make_docx("Fixed"))
+        Student.objects.filter(pk=other.pk).update(cv="cvs/broken.docx")
+        out = StringIO()
+        call_command("extract_documents", "--workers", "1", "--retry", stdout=out)
+        self.assertIn("Extracted 1 new documents. 2 extracted.", out.getvalue())
+
+
+# ------------------------------
+# QUERY BUDGETS
+# ------------------------------
+class UserQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        for i in range(5):
+            user = User.objects.create_user(username=f"student{i}", password="pass12345", role="student")
+            Student.objects.create(user=user, student_id=f"STU{i}", degree="BSc")
+            user = User.objects.create_user(username=f"employer{i}", password="pass12345", role="employer")
+            Employer.objects.create(user=user, employer_id=f"EMP{i}", company_name="Acme", industry="Tech")
+        self.student = Student.objects.first()
+
+    def test_profile_endpoints(self):
+        for name, kwargs in (
+            ("users:student-list", {}), ("users:student-detail", {"pk": self.student.pk}),
+            ("users:employer-list", {}), ("users:current-user", {}),
+        ):
+            self.client.force_authenticate(user=User.objects.get(pk=self.student.user_id))
+            with self.subTest(name):
+                response = self.assertWithinQueryBudget("GET", reverse(name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 200)
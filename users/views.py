@@ -4,15 +4,21 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from rest_framework.reverse import reverse
-from django.core.mail import send_mail
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.conf import settings
 from django.contrib.auth import authenticate
+from django.http import Http404
 
 
+from backend.instrumentation import query_budget
+from backend.routers import reads_from
 from .models import User, Student, Employer
+from .cache import get_cached_employer
+from .authentication import issue_token
+from .mail import enqueue_email
+from .images import replace_profile_picture
 from .serializers import (
     UserSerializer, StudentSerializer, EmployerSerializer,
     RegisterSerializer, LoginSerializer, ForgotPasswordSerializer,
@@ -26,14 +32,31 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
+@query_budget(3)
+@reads_from('replica', actions=['list'])
 class StudentViewSet(viewsets.ModelViewSet):
-    queryset = Student.objects.all()
+    queryset = Student.objects.select_related('user')
     serializer_class = StudentSerializer
 
+@query_budget(3)
+@reads_from('replica', actions=['list'])
 class EmployerViewSet(viewsets.ModelViewSet):
-    queryset = Employer.objects.all()
+    queryset = Employer.objects.select_related('user')
     serializer_class = EmployerSerializer
 
+    def get_object(self):
+        # Profile reads come from the cache; writes go through the normal lookup
+        if self.action != 'retrieve':
+            return super().get_object()
+        try:
+            employer = get_cached_employer(int(self.kwargs['pk']))
+        except ValueError:
+            raise Http404
+        if employer is None:
+            raise Http404
+        self.check_object_permissions(self.request, employer)
+        return employer
+
 # ------------------------------
 # AUTHENTICATION
 # ------------------------------
@@ -43,10 +66,9 @@ def register(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        token, _ = Token.objects.get_or_create(user=user)
         return Response({
             "user": UserSerializer(user).data,
-            "token": token.key,
+            "token": issue_token(user, created=True),
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -57,34 +79,24 @@ def login(request):
     username_or_email = request.data.get("username")
     password = request.data.get("password")
 
-    # Authenticate user using username
-    user = authenticate(username=username_or_email, password=password)
-
-    # If not found, try email
-    if user is None:
-        try:
-            user_obj = User.objects.get(email=username_or_email)
-            user = authenticate(username=user_obj.username, password=password)
-        except User.DoesNotExist:
-            user = None
+    # One indexed lookup by username or email, one password hash (users.backends)
+    user = authenticate(request, username=username_or_email, password=password)
 
     if user is None:
         return Response({"detail": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
 
-    token, _ = Token.objects.get_or_create(user=user)
+    token = issue_token(user)
     user_data = UserSerializer(user).data
     user_data['role'] = user.role if hasattr(user, 'role') else 'unknown'
 
-    return Response({"user": user_data, "token": token.key})
+    return Response({"user": user_data, "token": token})
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def logout(request):
-    try:
-        request.user.auth_token.delete()
-    except (AttributeError, Token.DoesNotExist):
-        pass
+    # Deleting the token also evicts it from the auth cache (see users.signals)
+    Token.objects.filter(user=request.user).delete()
     return Response({"detail": "Logged out successfully."}, status=status.HTTP_200_OK)
 
 
@@ -105,14 +117,15 @@ def forgot_password(request):
     if serializer.is_valid():
         email = serializer.validated_data["email"]
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get(email__iexact=email)
         except User.DoesNotExist:
             return Response({"detail": "No user found with this email"}, status=status.HTTP_404_NOT_FOUND)
 
         uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
         token = default_token_generator.make_token(user)
         reset_link = f"{settings.FRONTEND_URL}/reset-password/{uidb64}/{token}/"
-        send_mail(
+        # Delivered by `manage.py send_queued_emails`, off the request path
+        enqueue_email(
             subject="Password Reset Request",
             message=f"Click the link to reset your password:\n{reset_link}",
             from_email=settings.DEFAULT_FROM_EMAIL,
@@ -165,6 +178,7 @@ def user_api_root(request, format=None):
     })
 
 
+@query_budget(2)
 @api_view(['GET', 'PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def current_user(request):
@@ -246,12 +260,8 @@ def upload_profile_picture(request):
         return Response({"detail": "No image file provided."}, 
                        status=status.HTTP_400_BAD_REQUEST)
     
-    # Delete old profile picture if exists
-    if student.profile_picture:
-        student.profile_picture.delete(save=False)
-    
-    student.profile_picture = request.FILES['profile_picture']
-    student.save()
+    # Replaces the old picture and its renditions; new ones are rendered in the background
+    replace_profile_picture(student, request.FILES['profile_picture'])
     
     # Return FULL URL instead of relative path
     profile_picture_url = request.build_absolute_uri(student.profile_picture.url)